@@ -0,0 +1,148 @@
+"""
+Join latency and index size with transcript-ID meeting keys, before and after the integer key migration.
+
+    python -m benchmarks.bench_keys --meetings 2000 --utterances 500
+
+Builds a database in the schema where meetings were keyed by their AssemblyAI transcript ID (a 36-character UUID
+repeated in every utterance and query row), times joins of meetings with their utterances, migrates it with
+`migrations.migrate_integer_keys`, and times the same statements again. Also reports the size of each table and
+index (SQLite `dbstat`) and of the vacuumed database file.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from meeting_minutes.database import create_db_engine
+from meeting_minutes.migrations import migrate_integer_keys
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE meetings (id VARCHAR(255) PRIMARY KEY, name TEXT NOT NULL, date DATE, created DATETIME, "
+    "status TEXT, deleted DATETIME, content_hash VARCHAR(64))",
+    "CREATE INDEX ix_meetings_content_hash ON meetings (content_hash)",
+    "CREATE TABLE queries (id INTEGER PRIMARY KEY, meeting VARCHAR(255) NOT NULL REFERENCES meetings (id), "
+    "question TEXT NOT NULL, answer TEXT NOT NULL, created DATETIME NOT NULL, deleted DATETIME)",
+    "CREATE TABLE utterances (meeting VARCHAR(255) NOT NULL REFERENCES meetings (id), position INTEGER NOT NULL, "
+    "speaker VARCHAR(32) NOT NULL, start INTEGER, \"end\" INTEGER, text TEXT NOT NULL, "
+    "PRIMARY KEY (meeting, position))",
+    "CREATE INDEX ix_utterances_meeting_speaker ON utterances (meeting, speaker, position)",
+]
+
+STATEMENTS = {
+    "talk per meeting": (
+        "SELECT m.id, COUNT(*) FROM meetings m JOIN utterances u ON u.meeting = m.id "
+        "WHERE m.deleted IS NULL GROUP BY m.id"
+    ),
+    "speaker window": (
+        "SELECT u.position, u.text FROM meetings m JOIN utterances u ON u.meeting = m.id "
+        "WHERE m.name = :name AND u.speaker = 'B' ORDER BY u.position LIMIT 50"
+    ),
+    "queries per meeting": (
+        "SELECT m.name, COUNT(q.id) FROM meetings m LEFT JOIN queries q ON q.meeting = m.id GROUP BY m.id"
+    ),
+}
+
+
+def build_legacy(engine: Engine, meetings: int, utterances: int) -> None:
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+        for i in range(meetings):
+            remote_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            conn.execute(
+                text("INSERT INTO meetings (id, name, status) VALUES (:id, :name, 'completed')"),
+                {"id": remote_id, "name": f"Réunion {i}"},
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO utterances (meeting, position, speaker, start, \"end\", text) "
+                    "VALUES (:meeting, :position, :speaker, :start, :end, 'Bonjour à tous.')"
+                ),
+                [
+                    {"meeting": remote_id, "position": p, "speaker": "ABC"[p % 3], "start": p * 1000, "end": p * 1000}
+                    for p in range(utterances)
+                ],
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO queries (meeting, question, answer, created) "
+                    "VALUES (:meeting, 'Résumé ?', 'Réponse', '2025-01-06 10:00:00')"
+                ),
+                [{"meeting": remote_id}] * 3,
+            )
+
+
+def time_statements(engine: Engine, meetings: int, repeat: int) -> Dict[str, float]:
+    """Median milliseconds per statement."""
+    rng = random.Random(7)
+    results = {}
+    with engine.connect() as conn:
+        for label, statement in STATEMENTS.items():
+            timings: List[float] = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(text(statement), {"name": f"Réunion {rng.randrange(meetings)}"}).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[label] = statistics.median(timings)
+    return results
+
+
+def object_sizes(engine: Engine) -> Dict[str, int]:
+    """Bytes per table and index."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all()
+    return {name: size for name, size in rows if not name.startswith("sqlite_schema")}
+
+
+def vacuumed_size(engine: Engine, path: str) -> int:
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+    return os.path.getsize(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=2000)
+    parser.add_argument("--utterances", type=int, default=500, help="utterances per meeting")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per statement")
+    parser.add_argument("--workdir", default=None, help="where to create the database (default: temp folder)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as folder:
+        path = os.path.join(folder, "meetings.db")
+        engine = create_db_engine(f"sqlite:///{path}")
+        build_legacy(engine, args.meetings, args.utterances)
+
+        before = time_statements(engine, args.meetings, args.repeat)
+        sizes_before = object_sizes(engine)
+        file_before = vacuumed_size(engine, path)
+
+        start = time.perf_counter()
+        copied = migrate_integer_keys(engine)
+        print(f"migration: {sum(copied.values())} rows in {time.perf_counter() - start:.1f}s")
+
+        after = time_statements(engine, args.meetings, args.repeat)
+        sizes_after = object_sizes(engine)
+        file_after = vacuumed_size(engine, path)
+        engine.dispose()
+
+    print(f"{'statement':<22}{'before ms':>12}{'after ms':>12}")
+    for label in STATEMENTS:
+        print(f"{label:<22}{before[label]:12.2f}{after[label]:12.2f}")
+    print(f"\n{'table / index':<36}{'before KB':>12}{'after KB':>12}")
+    for name in sorted(set(sizes_before) | set(sizes_after)):
+        print(f"{name:<36}{sizes_before.get(name, 0) / 1024:12.0f}{sizes_after.get(name, 0) / 1024:12.0f}")
+    print(f"{'database file':<36}{file_before / 1024:12.0f}{file_after / 1024:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
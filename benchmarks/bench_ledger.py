@@ -0,0 +1,91 @@
+"""
+Time added to each AssemblyAI call by recording it in the call ledger, written synchronously or by `LedgerWriter`.
+
+    python -m benchmarks.bench_ledger --calls 2000 --threads 8
+
+`--threads` threads each record `--calls` entries, as concurrent transcriptions and LeMUR questions would.
+`sync` inserts and commits every entry in the calling thread, contending on the SQLite write lock; `queued` only
+hands it to the writer thread, which inserts batches. "flush" is the time the writer then took to catch up.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select
+
+from meeting_minutes.database import create_db_engine
+from meeting_minutes.ledger import LedgerWriter
+from meeting_minutes.models import CallLedger
+
+
+def entry(i: int) -> Dict:
+    return {
+        "created": datetime.now(timezone.utc).replace(tzinfo=None),
+        "operation": "lemur",
+        "remote_id": f"transcript-{i}",
+        "duration_ms": i % 5000,
+        "prompt_chars": 200,
+        "answer_chars": 800,
+        "input_tokens": 4000,
+        "output_tokens": 300,
+        "outcome": "ok",
+    }
+
+
+def run(mode: str, calls: int, threads: int, workdir: str) -> Dict[str, float]:
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, mode + '.db')}")
+    CallLedger.__table__.create(engine)
+    ledger = LedgerWriter(engine) if mode == "queued" else None
+
+    def record(thread: int) -> List[float]:
+        latencies = []
+        for i in range(calls):
+            fields = entry(thread * calls + i)
+            start = time.perf_counter()
+            if ledger:
+                ledger.record(**fields)
+            else:
+                with engine.begin() as conn:
+                    conn.execute(insert(CallLedger), fields)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = [latency for result in executor.map(record, range(threads)) for latency in result]
+    start = time.perf_counter()
+    if ledger:
+        ledger.close()
+    flush = time.perf_counter() - start
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(CallLedger)).scalar() == calls * threads
+    engine.dispose()
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+        "flush": flush,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000, help="entries recorded per thread")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--workdir", default=None, help="where to create the databases (default: temp folder)")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'p50 µs':>10}{'p95 µs':>10}{'flush s':>10}")
+    with tempfile.TemporaryDirectory(dir=args.workdir) as folder:
+        for mode in ("sync", "queued"):
+            result = run(mode, args.calls, args.threads, folder)
+            print(f"{mode:<8}{result['p50'] * 1e6:10.0f}{result['p95'] * 1e6:10.0f}{result['flush']:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Semantic search latency on a synthetic index.
+
+    python -m benchmarks.bench_search --chunks 100000 --target-ms 200
+
+Builds a memory-mapped index of `--chunks` synthetic transcript chunks, then reports indexing throughput, the
+latency of single queries and of query batches, and peak memory. Exits with status 1 when the p95 latency of a
+single query is above `--target-ms`.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+from meeting_minutes.search import CHUNK_WORDS, DEFAULT_DIMENSIONS, SearchIndex
+
+# A vocabulary large enough for hashing collisions to matter
+VOCABULARY = [f"mot{i}" for i in range(20_000)] + "budget prix tarif planning client livraison risque".split()
+
+
+def _chunks(rng: random.Random, count: int):
+    # Zipf-like word frequencies, as in real speech
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+    for _ in range(count):
+        yield " ".join(rng.choices(VOCABULARY, cum_weights=cum_weights, k=CHUNK_WORDS))
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=32, help="queries scored together in the batch phase")
+    parser.add_argument("--target-ms", type=float, default=0, help="maximum p95 latency, 0 to only report")
+    parser.add_argument("--workdir", default=None, help="where to create the index (default: temp folder)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory(dir=args.workdir) as folder:
+        index = SearchIndex(os.path.join(folder, "index"), args.dimensions)
+        chunks = _chunks(rng, args.chunks)
+        elapsed = 0.0
+        for first in range(0, args.chunks, 5000):
+            batch = [next(chunks) for _ in range(min(5000, args.chunks - first))]
+            start = time.perf_counter()
+            index.add(batch)
+            elapsed += time.perf_counter() - start
+        size_mb = os.path.getsize(os.path.join(folder, "index", "vectors.f32")) / 1024 / 1024
+        print(
+            f"indexed {index.rows} chunks in {elapsed:.1f}s ({index.rows / elapsed:.0f} chunks/s), "
+            f"{size_mb:.0f} MB on disk, peak RSS {_peak_rss_mb():.0f} MB"
+        )
+
+        questions = [" ".join(rng.choices(VOCABULARY[:2000], k=6)) for _ in range(args.queries)]
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            index.search([question], k=10)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50 = statistics.median(latencies)
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"single query: p50 {p50:.1f} ms, p95 {p95:.1f} ms")
+
+        start = time.perf_counter()
+        for first in range(0, len(questions), args.batch):
+            index.search(questions[first : first + args.batch], k=10)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            f"batches of {args.batch}: {elapsed / len(questions):.1f} ms per query, peak RSS {_peak_rss_mb():.0f} MB"
+        )
+
+    sys.exit(1 if args.target_ms and p95 > args.target_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
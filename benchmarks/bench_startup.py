@@ -0,0 +1,77 @@
+"""
+Cold start benchmark: import time of the application modules and time to first render of the Streamlit script.
+
+    python -m benchmarks.bench_startup --runs 5
+
+Every measure runs in a fresh interpreter, so nothing is cached by a previous import.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["meeting_minutes.services", "meeting_minutes.tab_history", "meeting_minutes.tab_new"]
+
+FIRST_RENDER = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("main.py", default_timeout=120)
+app.run()
+assert not app.exception, app.exception
+print(time.perf_counter() - start)
+"""
+
+IMPORT_TIME = """
+import importlib, time
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - start)
+"""
+
+
+def _run(code: str, env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _heaviest_imports(module: str, env: dict, count: int = 5) -> list:
+    """Top-level packages with the highest cumulative import time (`python -X importtime`)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, env=env, capture_output=True, text=True
+    ).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split("|"))
+        if not name.startswith(" ") and "." not in name.strip():
+            timings.append((int(cumulative) / 1000, name.strip()))
+    return sorted(timings, reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        env = os.environ | {"DATABASE_URL": f"sqlite:///{os.path.join(folder, 'startup.db')}"}
+        for module in MODULES:
+            timings = [_run(IMPORT_TIME.format(module=module), env) for _ in range(args.runs)]
+            print(f"import {module}: median {statistics.median(timings) * 1000:.0f} ms")
+        for milliseconds, name in _heaviest_imports("meeting_minutes.services", env):
+            print(f"    {name}: {milliseconds:.0f} ms")
+
+        timings = [_run(FIRST_RENDER, env) for _ in range(args.runs)]
+        print(f"time to first render: median {statistics.median(timings) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Time to first and to final transcript, with the best model only and in tiered mode (`ASSEMBLYAI_TIERED`).
+
+    python -m benchmarks.bench_tiered --recordings 5 --nano 5 --best 20
+
+Recordings are transcribed through `MeetingService.transcribe_meeting` against `tests.fake_assemblyai.FakeAssemblyAI`,
+whose transcripts take `--nano` or `--best` seconds depending on their speech model. "First" is when the meeting
+has a transcript that can be read and queried, "final" when it has the best-model one.
+"""
+
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy.orm import sessionmaker
+
+from meeting_minutes.database import create_db_engine
+from meeting_minutes.models import Meeting
+from meeting_minutes.services import MeetingService, TranscriptionService, reset_assemblyai
+from tests.fake_assemblyai import FakeAssemblyAI
+
+
+def run(mode: str, recordings: int, workdir: str) -> Dict[str, List[float]]:
+    os.environ["ASSEMBLYAI_TIERED"] = "true" if mode == "tiered" else "false"
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, mode + '.db')}")
+    Meeting.metadata.create_all(engine)
+    first: List[float] = []
+    final: List[float] = []
+    with sessionmaker(bind=engine)() as db:
+        service = MeetingService(db, TranscriptionService())
+        for i in range(recordings):
+            start = time.perf_counter()
+            service.transcribe_meeting(io.BytesIO(f"ID3 {mode} {i}".encode()), f"Réunion {i}")
+            first.append(time.perf_counter() - start)
+            for finalization in service.finalizations:
+                finalization.result()
+            service.finalizations.clear()
+            final.append(time.perf_counter() - start)
+    engine.dispose()
+    return {"first": first, "final": final}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", type=int, default=5)
+    parser.add_argument("--nano", type=float, default=5.0, help="seconds to transcribe with the nano model")
+    parser.add_argument("--best", type=float, default=20.0, help="seconds to transcribe with the best model")
+    parser.add_argument("--workdir", default=None, help="where to create the databases (default: temp folder)")
+    args = parser.parse_args()
+
+    with FakeAssemblyAI(processing_delays={"nano": args.nano, "best": args.best}) as fake:
+        os.environ |= {"ASSEMBLYAI_API_KEY": "bench", "ASSEMBLYAI_BASE_URL": fake.base_url}
+        os.environ["ASSEMBLYAI_POLLING_INTERVAL"] = str(min(args.nano, args.best) / 20)
+        os.environ.pop("ASSEMBLYAI_WEBHOOK_URL", None)
+        reset_assemblyai()
+        print(f"{'mode':<8}{'first p50 s':>14}{'final p50 s':>14}")
+        with tempfile.TemporaryDirectory(dir=args.workdir) as folder:
+            for mode in ("best", "tiered"):
+                result = run(mode, args.recordings, folder)
+                print(f"{mode:<8}{statistics.median(result['first']):14.2f}{statistics.median(result['final']):14.2f}")
+        reset_assemblyai()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Export/import throughput on a synthetic meeting database.
+
+    python -m benchmarks.bench_transfer --size-mb 10240 --format parquet --target-mbps 50
+
+Builds a SQLite database of roughly `--size-mb` of transcripts (10 GB for the reference run), exports it, imports
+it into an empty database and reports throughput and peak memory. Exits with status 1 when a phase is slower
+than `--target-mbps`.
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from meeting_minutes.database import create_db_engine
+from meeting_minutes.models import Meeting, Query, Transcript
+from meeting_minutes.repository import upsert_rows
+from meeting_minutes.transfer import FORMATS, export_database, import_database
+
+WORDS = "budget planning client réunion projet livraison risque équipe décision action suivi qualité".split()
+TRANSCRIPT_CHARS = 60_000  # about one hour of speech
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words = []
+    size = 0
+    while size < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def build_dataset(db, size_mb: int, batch: int = 100) -> int:
+    rng = random.Random(42)
+    meetings = max(1, size_mb * 1024 * 1024 // (2 * TRANSCRIPT_CHARS))
+    start = datetime(2024, 1, 1)
+    for first in range(0, meetings, batch):
+        ids = list(range(first + 1, min(first + batch, meetings) + 1))
+        text = _text(rng, TRANSCRIPT_CHARS)
+        upsert_rows(
+            db,
+            Meeting,
+            [
+                {
+                    "id": i,
+                    "remote_id": f"synthetic-{i:08d}",
+                    "name": f"synthetic-{i:08d}",
+                    "created": start + timedelta(hours=n),
+                    "status": "completed",
+                }
+                for n, i in enumerate(ids, first)
+            ],
+        )
+        upsert_rows(db, Transcript, [{"meeting": i, "text": text, "transcript": text} for i in ids])
+        upsert_rows(
+            db, Query, [{"meeting": i, "question": "Résumé ?", "answer": text[:2000]} for i in ids], ["id"]
+        )
+    return meetings
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--target-mbps", type=float, default=0, help="minimum throughput, 0 to only report")
+    parser.add_argument("--workdir", default=None, help="where to create the databases (default: temp folder)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as folder:
+        source = sessionmaker(bind=create_db_engine(f"sqlite:///{os.path.join(folder, 'source.db')}"))()
+        target = sessionmaker(bind=create_db_engine(f"sqlite:///{os.path.join(folder, 'target.db')}"))()
+        Meeting.metadata.create_all(source.get_bind())
+        Meeting.metadata.create_all(target.get_bind())
+
+        meetings = build_dataset(source, args.size_mb)
+        size_mb = os.path.getsize(os.path.join(folder, "source.db")) / 1024 / 1024
+        print(f"dataset: {meetings} meetings, {size_mb:.0f} MB, peak RSS {_peak_rss_mb():.0f} MB")
+
+        failed = False
+        dump = os.path.join(folder, "dump")
+        for phase, run in (
+            ("export", lambda: export_database(source, dump, args.format, batch_size=args.batch_size)),
+            ("import", lambda: import_database(target, dump, args.format, batch_size=args.batch_size)),
+        ):
+            start = time.perf_counter()
+            counts = run()
+            elapsed = time.perf_counter() - start
+            mbps = size_mb / elapsed
+            failed |= bool(args.target_mbps) and mbps < args.target_mbps
+            print(
+                f"{phase}: {sum(counts.values())} rows in {elapsed:.1f}s, {mbps:.1f} MB/s, "
+                f"peak RSS {_peak_rss_mb():.0f} MB"
+            )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Statements, commits and time to store transcribed meetings, one transaction per repository call or per meeting.
+
+    python -m benchmarks.bench_uow --meetings 200 --utterances 300
+
+Each meeting is stored as `MeetingService` stores a transcription: the meeting, its transcript, utterances and
+speaker aggregates, then a few questions. `per-call` reproduces the repositories committing and refreshing after
+every write, in sessions expiring their objects on commit; `unit` groups the writes of a meeting with
+`unit_of_work` in a `SessionLocal` session. Every commit is one journal write and fsync on SQLite.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from meeting_minutes.database import SessionLocal, create_db_engine
+from meeting_minutes.models import Meeting
+from meeting_minutes.repository import (
+    MeetingRepository,
+    QueryRepository,
+    SpeakerStatsRepository,
+    TranscriptRepository,
+    UtteranceRepository,
+    unit_of_work,
+)
+
+
+def store_meetings(engine, mode: str, meetings: int, utterances: int, questions: int) -> Dict[str, float]:
+    counts = {"statements": 0, "commits": 0}
+
+    def count(name: str):
+        return lambda *args: counts.__setitem__(name, counts[name] + 1)
+
+    event.listen(engine, "before_cursor_execute", count("statements"))
+    event.listen(engine, "commit", count("commits"))
+    unit = mode == "unit"
+    db = SessionLocal(bind=engine) if unit else sessionmaker(bind=engine)()
+    rows = [
+        {"speaker": "ABC"[p % 3], "start": p * 1000, "end": p * 1000 + 900, "text": f"Phrase {p} de la réunion."}
+        for p in range(utterances)
+    ]
+    stats = [
+        {"speaker": s, "talk_time_ms": 300_000, "turns": 10, "interruptions": 1, "words": 900, "words_per_minute": 180}
+        for s in "ABC"
+    ]
+    text = " ".join(row["text"] for row in rows)
+    start = time.perf_counter()
+    for i in range(meetings):
+        with unit_of_work(db) if unit else nullcontext():
+            meeting = MeetingRepository.insert_or_update(
+                db, f"{mode}-{i}", f"Réunion {i}", None, None, "completed", refresh=not unit
+            )
+            TranscriptRepository.insert_or_update(db, meeting.id, text, text, refresh=not unit)
+            UtteranceRepository.replace(db, meeting.id, rows)
+            SpeakerStatsRepository.replace(db, meeting.id, stats)
+        for q in range(questions):
+            QueryRepository.store_query(db, meeting.id, f"Question {q}", "Réponse", refresh=not unit)
+    elapsed = time.perf_counter() - start
+    db.close()
+    return counts | {"seconds": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=200)
+    parser.add_argument("--utterances", type=int, default=300, help="utterances per meeting")
+    parser.add_argument("--questions", type=int, default=3, help="questions asked per meeting")
+    parser.add_argument("--workdir", default=None, help="where to create the databases (default: temp folder)")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'statements':>12}{'commits':>10}{'seconds':>10}{'meetings/s':>12}")
+    with tempfile.TemporaryDirectory(dir=args.workdir) as folder:
+        for mode in ("per-call", "unit"):
+            engine = create_db_engine(f"sqlite:///{os.path.join(folder, mode + '.db')}")
+            Meeting.metadata.create_all(engine)
+            result = store_meetings(engine, mode, args.meetings, args.utterances, args.questions)
+            print(
+                f"{mode:<10}{result['statements']:>12}{result['commits']:>10}{result['seconds']:>10.2f}"
+                f"{args.meetings / result['seconds']:>12.1f}"
+            )
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
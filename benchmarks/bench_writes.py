@@ -0,0 +1,103 @@
+"""
+Write throughput of many concurrent sessions, with and without the write queue.
+
+    python -m benchmarks.bench_writes --sessions 50 --writes 40
+
+Each simulated session is a thread storing questions as fast as it can, either committing through its own
+connection (as every Streamlit session does by default) or through the group-committing write queue
+(`DB_WRITE_QUEUE=true`). Reports writes per second, write latency and the number of transactions.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, List
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from meeting_minutes.database import create_db_engine
+from meeting_minutes.models import Meeting
+from meeting_minutes.repository import QueryRepository
+from meeting_minutes.write_queue import WriteQueue
+
+
+def run_sessions(sessions: int, writes: int, write: Callable[[Session, int], None], engine) -> List[float]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+    start_line = threading.Barrier(sessions)
+
+    def session(number: int) -> None:
+        with sessionmaker(bind=engine)() as db:
+            start_line.wait()
+            for i in range(writes):
+                start = time.perf_counter()
+                write(db, number * writes + i)
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(number,)) for number in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def direct_write(db: Session, n: int) -> None:
+    # SQLite answers "database is locked" once its busy timeout expires: retry like a user clicking again
+    while True:
+        try:
+            QueryRepository.store_query(db, 1, f"Question {n}", "Réponse")
+            return
+        except OperationalError:
+            db.rollback()
+
+
+def report(mode: str, latencies: List[float], elapsed: float, transactions: int) -> None:
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p95 = latencies_ms[int(0.95 * (len(latencies_ms) - 1))]
+    print(
+        f"{mode:>6}: {len(latencies) / elapsed:8.0f} writes/s, p50 {statistics.median(latencies_ms):6.1f} ms, "
+        f"p95 {p95:6.1f} ms, {transactions} transactions"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--writes", type=int, default=40, help="writes per session")
+    parser.add_argument("--max-delay", type=float, default=0.005, help="group commit window, in seconds")
+    parser.add_argument("--workdir", default=None, help="where to create the databases (default: temp folder)")
+    args = parser.parse_args()
+
+    total = args.sessions * args.writes
+    with tempfile.TemporaryDirectory(dir=args.workdir) as folder:
+        for mode in ("direct", "queue"):
+            engine = create_db_engine(
+                f"sqlite:///{os.path.join(folder, mode + '.db')}", pool_size=args.sessions, max_overflow=0
+            )
+            Meeting.metadata.create_all(engine)
+            start = time.perf_counter()
+            if mode == "direct":
+                latencies = run_sessions(args.sessions, args.writes, direct_write, engine)
+                transactions = total
+            else:
+                queue = WriteQueue(engine, max_delay=args.max_delay)
+                latencies = run_sessions(
+                    args.sessions,
+                    args.writes,
+                    lambda db, n: queue.submit(QueryRepository.store_query, 1, f"Question {n}", "Réponse").result(),
+                    engine,
+                )
+                queue.close()
+                transactions = queue.transactions
+            report(mode, latencies, time.perf_counter() - start, transactions)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
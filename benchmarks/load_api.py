@@ -0,0 +1,78 @@
+"""
+Load test of the JSON API against the local AssemblyAI stand-in.
+
+    python -m benchmarks.load_api --clients 50 --requests 20
+
+The application runs in-process (ASGI transport) on a temporary SQLite database; every LeMUR and upload call goes
+to `tests.fake_assemblyai.FakeAssemblyAI`, whose `--latency` simulates the provider round trip.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+from meeting_minutes.api import create_app
+from tests.fake_assemblyai import FakeAssemblyAI
+
+
+async def _client_session(client: httpx.AsyncClient, meeting_id: int, requests: int, latencies: List[float]):
+    for i in range(requests):
+        start = time.perf_counter()
+        if i % 10 == 0:
+            response = await client.post(f"/meetings/{meeting_id}/queries", json={"question": f"Question {i}"})
+        elif i % 10 == 1:
+            response = await client.get(f"/meetings/{meeting_id}/queries")
+        else:
+            response = await client.get("/meetings")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(clients: int, requests: int) -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        app = create_app(f"sqlite:///{os.path.join(folder, 'load.db')}")
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+                response = await client.post(
+                    "/meetings",
+                    files={"file": ("load.mp3", io.BytesIO(b"ID3load"), "audio/mpeg")},
+                    data={"name": "Load test"},
+                )
+                meeting_id = response.json()["id"]
+
+                latencies: List[float] = []
+                start = time.perf_counter()
+                await asyncio.gather(
+                    *(_client_session(client, meeting_id, requests, latencies) for _ in range(clients))
+                )
+                elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies)} requests from {clients} clients in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"p50={quantiles[49] * 1000:.1f}ms p95={quantiles[94] * 1000:.1f}ms max={max(latencies) * 1000:.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated AssemblyAI latency (s)")
+    args = parser.parse_args()
+
+    with FakeAssemblyAI(latency=args.latency) as fake:
+        os.environ["ASSEMBLYAI_API_KEY"] = "load-test"
+        os.environ["ASSEMBLYAI_BASE_URL"] = fake.base_url
+        asyncio.run(run(args.clients, args.requests))
+        print("AssemblyAI calls:", dict(fake.requests))
+
+
+if __name__ == "__main__":
+    main()
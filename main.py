@@ -1,13 +1,11 @@
-import os
 import streamlit as st
-import pandas as pd
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
-from meeting_minutes import tab_history, tab_new, tab_prompts
-from meeting_minutes.database import init_db, get_db
-from meeting_minutes.services import MeetingService, TranscriptionService
+from meeting_minutes import tab_admin, tab_history, tab_new, tab_prompts
+from meeting_minutes.services import MeetingService, get_transcription_service
 from meeting_minutes.tabs import Tab
+from meeting_minutes.workspaces import get_current_workspace, get_workspace_db, list_workspaces, validate_workspace
 
 st.session_state["tabs"] = st.session_state.get("tabs", Tab.NEW_MEETING.value)
 st.set_page_config(layout="wide")
@@ -38,16 +36,33 @@ def switch_to_tab(tab_name):
 switch_to_tab(st.session_state["tabs"])
 
 
+def select_workspace() -> str:
+    """Sélection (ou création) de l'espace de travail dans la barre latérale."""
+    with st.sidebar:
+        selector = st.container()
+        new_workspace = st.text_input("Nouvel espace de travail")
+        if st.button("Créer l'espace de travail") and new_workspace:
+            try:
+                st.session_state["workspace"] = validate_workspace(new_workspace.strip().lower())
+            except ValueError as e:
+                st.error(str(e))
+    st.session_state.setdefault("workspace", get_current_workspace())
+    workspaces = list_workspaces()
+    if st.session_state["workspace"] not in workspaces:
+        workspaces.append(st.session_state["workspace"])
+    with selector:
+        return st.selectbox("Espace de travail", workspaces, key="workspace")
+
+
 def main() -> None:
     load_dotenv()
-    init_db()
-    db: Session = next(get_db())
+    db: Session = next(get_workspace_db(select_workspace()))
 
     st.title("Meeting Minutes")
 
-    tab1, tab2, tab3 = st.tabs([Tab.NEW_MEETING.value, Tab.HISTORY.value, Tab.PROMPTS.value])
-    meeting_service = MeetingService(db)
-    transcription_service = TranscriptionService()
+    tab1, tab2, tab3, tab4 = st.tabs([Tab.NEW_MEETING.value, Tab.HISTORY.value, Tab.PROMPTS.value, Tab.ADMIN.value])
+    transcription_service = get_transcription_service()
+    meeting_service = MeetingService(db, transcription_service)
 
     with tab1:
         tab_new.tab_new(meeting_service)
@@ -58,6 +73,9 @@ def main() -> None:
     with tab3:
         tab_prompts.tab_prompts(db)
 
+    with tab4:
+        tab_admin.tab_admin()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,3 @@
+from meeting_minutes.cli import main
+
+main()
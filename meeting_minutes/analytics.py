@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Sequence
+
+
+def compute_speaker_stats(utterances: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    Per-speaker talk time, turns, interruptions and speaking rate of a diarized transcript.
+
+    A turn is a run of consecutive utterances by the same speaker. A turn is an interruption when it starts
+    before the previous speakers have finished talking.
+
+    Args:
+        utterances: AssemblyAI utterances (`speaker`, `start`, `end` in milliseconds, `text`, optional `words`),
+            in chronological order.
+
+    Returns:
+        One dict per speaker, with the columns of `SpeakerStats` (except `meeting`).
+    """
+    if not utterances:
+        return []
+    import numpy as np
+
+    speakers, codes = np.unique([str(u.speaker) for u in utterances], return_inverse=True)
+    count = len(speakers)
+    start = np.fromiter((u.start for u in utterances), dtype=np.int64, count=len(utterances))
+    end = np.fromiter((u.end for u in utterances), dtype=np.int64, count=len(utterances))
+    words = np.fromiter(
+        (len(u.words) if u.words else len(u.text.split()) for u in utterances), dtype=np.int64, count=len(utterances)
+    )
+
+    talk_time = np.bincount(codes, weights=np.clip(end - start, 0, None), minlength=count)
+    turn_starts = np.ones(len(codes), dtype=bool)
+    turn_starts[1:] = codes[1:] != codes[:-1]
+    interruptions = np.zeros(len(codes), dtype=bool)
+    interruptions[1:] = turn_starts[1:] & (start[1:] < np.maximum.accumulate(end)[:-1])
+    word_counts = np.bincount(codes, weights=words, minlength=count)
+    words_per_minute = np.divide(
+        word_counts * 60_000, talk_time, out=np.zeros(count, dtype=np.float64), where=talk_time > 0
+    )
+
+    return [
+        {
+            "speaker": str(speaker),
+            "talk_time_ms": int(talk),
+            "turns": int(turns),
+            "interruptions": int(interrupted),
+            "words": int(word_count),
+            "words_per_minute": round(float(wpm), 1),
+        }
+        for speaker, talk, turns, interrupted, word_count, wpm in zip(
+            speakers,
+            talk_time,
+            np.bincount(codes[turn_starts], minlength=count),
+            np.bincount(codes[interruptions], minlength=count),
+            word_counts,
+            words_per_minute,
+        )
+    ]
@@ -0,0 +1,279 @@
+"""
+Headless JSON API over the meeting database.
+
+Run with `uvicorn --factory meeting_minutes.api:create_app`.
+Database access goes through an async session; the AssemblyAI SDK is blocking, so remote calls run in worker threads.
+"""
+
+import asyncio
+import hmac
+import os
+from contextlib import asynccontextmanager
+from datetime import date as datetime_date, datetime, timezone
+from typing import AsyncIterator, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import BackgroundTasks, Depends, FastAPI, File, Form, HTTPException, Request, Response, UploadFile, status
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .audio import HashingReader
+from .database import Base, SessionLocal, add_missing_columns, async_session_factory, create_async_db_engine
+from .migrations import migrate_integer_keys
+from .models import Meeting
+from .repository import MeetingRepository, PromptRepository, QueryRepository, TranscriptRepository
+from .services import (
+    WEBHOOK_AUTH_HEADER,
+    MeetingService,
+    TranscriptionService,
+    get_transcription_service as get_shared_transcription_service,
+)
+from .workspaces import DEFAULT_WORKSPACE, get_workspace_engine, validate_workspace, workspace_exists
+
+
+class MeetingOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    remote_id: str
+    name: Optional[str]
+    date: Optional[datetime_date]
+    created: Optional[datetime]
+    status: Optional[str]
+    deleted: Optional[datetime]
+    draft_id: Optional[str] = None
+
+
+class TranscriptOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    meeting: int
+    text: str
+    transcript: str
+
+
+class QueryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    meeting: int
+    question: str
+    answer: str
+    created: Optional[datetime]
+    draft: Optional[bool] = None
+
+
+class PromptOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    prompt: str
+
+
+class QuestionIn(BaseModel):
+    question: str
+
+
+class TranscriptWebhookIn(BaseModel):
+    transcript_id: str
+    status: str
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    async with request.app.state.sessions() as db:
+        yield db
+
+
+def get_transcription_service(request: Request) -> TranscriptionService:
+    return request.app.state.transcription_service
+
+
+async def _get_meeting(db: AsyncSession, meeting_id: int) -> Meeting:
+    meeting = await db.get(Meeting, meeting_id)
+    if meeting is None or meeting.deleted is not None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Meeting {meeting_id} not found")
+    return meeting
+
+
+async def _ask(
+    db: AsyncSession, transcription_service: TranscriptionService, meeting_id: int, question: str
+) -> QueryOut:
+    meeting = await _get_meeting(db, meeting_id)
+    answer = await asyncio.to_thread(
+        transcription_service.lemur_task, meeting.remote_id, question, meeting.transcript_ids
+    )
+    if not answer:
+        raise HTTPException(status.HTTP_502_BAD_GATEWAY, "LeMUR returned an empty answer")
+    query = await db.run_sync(
+        QueryRepository.store_query, meeting_id, question, answer, draft=meeting.draft_id is not None
+    )
+    return QueryOut.model_validate(query)
+
+
+async def _complete_transcription(app: FastAPI, transcript_id: str, workspace: Optional[str] = None) -> None:
+    transcription_service: TranscriptionService = app.state.transcription_service
+    transcript = await asyncio.to_thread(transcription_service.get_transcript, transcript_id)
+
+    def complete(session) -> None:
+        MeetingService(session, transcription_service).complete_transcription(transcript)
+
+    def complete_in_workspace() -> None:
+        with SessionLocal(bind=get_workspace_engine(workspace)) as session:
+            complete(session)
+
+    if workspace and workspace != DEFAULT_WORKSPACE:
+        # Submitted from another workspace: its meeting is in that workspace's database
+        await asyncio.to_thread(complete_in_workspace)
+        return
+    async with app.state.sessions() as db:
+        await db.run_sync(complete)
+
+
+def create_app(
+    database_url: Optional[str] = None, transcription_service: Optional[TranscriptionService] = None
+) -> FastAPI:
+    """
+    Build the API application.
+
+    Args:
+        database_url: Database to serve (defaults to `DATABASE_URL` / `DB_PATH`).
+        transcription_service: Service used for remote calls (defaults to the shared `TranscriptionService`).
+    """
+    load_dotenv()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async with app.state.engine.connect() as conn:
+            await conn.run_sync(migrate_integer_keys)
+        async with app.state.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(add_missing_columns)
+        yield
+        await app.state.engine.dispose()
+
+    app = FastAPI(title="Meeting Minutes", lifespan=lifespan)
+    app.state.engine = create_async_db_engine(database_url)
+    app.state.sessions = async_session_factory(app.state.engine)
+    app.state.transcription_service = transcription_service or get_shared_transcription_service()
+
+    @app.get("/meetings", response_model=List[MeetingOut])
+    async def list_meetings(include_deleted: bool = False, db: AsyncSession = Depends(get_session)):
+        meetings = await db.run_sync(MeetingRepository.get_all, include_deleted)
+        return list(meetings.values())
+
+    @app.post("/meetings", response_model=MeetingOut, status_code=status.HTTP_202_ACCEPTED)
+    async def submit_meeting(
+        response: Response,
+        file: UploadFile = File(...),
+        name: str = Form(...),
+        meeting_date: Optional[datetime_date] = Form(None),
+        db: AsyncSession = Depends(get_session),
+        transcription_service: TranscriptionService = Depends(get_transcription_service),
+    ):
+        audio = HashingReader(file.file)
+        upload_url = await asyncio.to_thread(transcription_service.upload_audio, audio)
+        if duplicate := await db.run_sync(MeetingRepository.get_by_content_hash, audio.hexdigest()):
+            # Already transcribed from the same audio
+            response.status_code = status.HTTP_200_OK
+            return duplicate
+        transcript = await asyncio.to_thread(transcription_service.submit_audio, upload_url)
+        if not transcript.id:
+            raise HTTPException(status.HTTP_502_BAD_GATEWAY, "Transcription could not be submitted")
+        return await db.run_sync(
+            MeetingRepository.insert_or_update,
+            transcript.id,
+            name,
+            meeting_date,
+            datetime.now(timezone.utc),
+            transcript.status.name,
+            content_hash=audio.hexdigest(),
+        )
+
+    @app.get("/meetings/{meeting_id}", response_model=MeetingOut)
+    async def get_meeting(meeting_id: int, db: AsyncSession = Depends(get_session)):
+        return await _get_meeting(db, meeting_id)
+
+    @app.delete("/meetings/{meeting_id}", status_code=status.HTTP_204_NO_CONTENT)
+    async def delete_meeting(
+        meeting_id: int,
+        db: AsyncSession = Depends(get_session),
+        transcription_service: TranscriptionService = Depends(get_transcription_service),
+    ):
+        meeting = await _get_meeting(db, meeting_id)
+        # The final transcript of a drafted meeting too, or it would still complete the deleted meeting
+        remote_ids = meeting.remote_ids
+        await db.run_sync(MeetingRepository.soft_delete, meeting_id)
+        for transcript_id in remote_ids:
+            await asyncio.to_thread(transcription_service.delete_transcript, transcript_id)
+
+    @app.get("/meetings/{meeting_id}/transcript", response_model=TranscriptOut)
+    async def get_transcript(meeting_id: int, db: AsyncSession = Depends(get_session)):
+        transcript = await db.run_sync(TranscriptRepository.get_transcript, meeting_id)
+        if transcript is None or transcript.deleted is not None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, f"No transcript for meeting {meeting_id}")
+        return transcript
+
+    @app.get("/meetings/{meeting_id}/queries", response_model=List[QueryOut])
+    async def list_queries(meeting_id: int, db: AsyncSession = Depends(get_session)):
+        queries = await db.run_sync(QueryRepository.get_by_meeting, meeting_id)
+        return list(queries.values())
+
+    @app.post("/meetings/{meeting_id}/queries", response_model=QueryOut, status_code=status.HTTP_201_CREATED)
+    async def ask_question(
+        meeting_id: int,
+        body: QuestionIn,
+        db: AsyncSession = Depends(get_session),
+        transcription_service: TranscriptionService = Depends(get_transcription_service),
+    ):
+        return await _ask(db, transcription_service, meeting_id, body.question)
+
+    @app.get("/prompts", response_model=List[PromptOut])
+    async def list_prompts(db: AsyncSession = Depends(get_session)):
+        prompts = await db.run_sync(PromptRepository.get_all)
+        return list(prompts.values())
+
+    @app.post(
+        "/meetings/{meeting_id}/prompts/{prompt_id}",
+        response_model=QueryOut,
+        status_code=status.HTTP_201_CREATED,
+    )
+    async def run_prompt(
+        meeting_id: int,
+        prompt_id: int,
+        db: AsyncSession = Depends(get_session),
+        transcription_service: TranscriptionService = Depends(get_transcription_service),
+    ):
+        prompt = await db.run_sync(PromptRepository.get_by_id, prompt_id)
+        if prompt is None or prompt.deleted is not None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, f"Prompt {prompt_id} not found")
+        return await _ask(db, transcription_service, meeting_id, prompt.prompt)
+
+    @app.post("/webhooks/assemblyai", status_code=status.HTTP_204_NO_CONTENT)
+    async def transcript_webhook(
+        body: TranscriptWebhookIn,
+        request: Request,
+        background_tasks: BackgroundTasks,
+        workspace: Optional[str] = None,
+    ):
+        """
+        Completion notification sent by AssemblyAI to `ASSEMBLYAI_WEBHOOK_URL`.
+
+        When `ASSEMBLYAI_WEBHOOK_SECRET` is set, calls must carry it in the `X-Webhook-Secret` header.
+        The transcript is fetched and stored after the answer, so that AssemblyAI is acknowledged at once, in the
+        database of the `workspace` it was submitted from (default: the database served). Only meetings already
+        in that database are updated: transcripts submitted elsewhere are ignored.
+        """
+        secret = os.getenv("ASSEMBLYAI_WEBHOOK_SECRET")
+        if secret and not hmac.compare_digest(request.headers.get(WEBHOOK_AUTH_HEADER, ""), secret):
+            raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid webhook secret")
+        if workspace is not None:
+            try:
+                validate_workspace(workspace)
+            except ValueError as e:
+                raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e)) from e
+            if not workspace_exists(workspace):
+                return
+        background_tasks.add_task(_complete_transcription, request.app, body.transcript_id, workspace)
+
+    return app
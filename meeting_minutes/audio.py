@@ -0,0 +1,229 @@
+"""
+Audio file helpers.
+"""
+
+import hashlib
+import os
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+# MPEG audio frame header tables, indexed by the header fields (version: 3 = MPEG 1, 2 = MPEG 2, 0 = MPEG 2.5;
+# layer: 3 = Layer I, 2 = Layer II, 1 = Layer III)
+_BITRATES_KBPS = {
+    (3, 3): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (3, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (3, 1): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 3): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 1): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+class HashingReader:
+    """
+    Binary stream wrapper computing the SHA-256 of the bytes read through it.
+
+    The digest covers the stream from its position when wrapped; it is only meaningful once the stream was read
+    to the end (see `read_to_end`). Seeking back to the start resets it.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._hash.update(data)
+        self.size += len(data)
+        return data
+
+    def __iter__(self) -> Iterator[bytes]:
+        while data := self.read(CHUNK_SIZE):
+            yield data
+
+    def read_to_end(self) -> None:
+        for _ in self:
+            pass
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    # Lets HTTP clients find the length of the upload and send it with a `Content-Length`
+    def fileno(self) -> int:
+        return self._stream.fileno()
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        position = self._stream.seek(offset, whence)
+        if position == 0:
+            self._hash = hashlib.sha256()
+            self.size = 0
+        return position
+
+
+@contextmanager
+def open_audio(file: str | BinaryIO) -> Iterator[BinaryIO]:
+    """Open a path in binary mode; an already open stream is returned as is (and left open)."""
+    if isinstance(file, str):
+        with open(file, "rb") as stream:
+            yield stream
+    else:
+        yield file
+
+
+def hash_stream(stream: BinaryIO) -> str:
+    """SHA-256 of the rest of a stream, read in chunks."""
+    reader = HashingReader(stream)
+    reader.read_to_end()
+    return reader.hexdigest()
+
+
+@dataclass(frozen=True)
+class Mp3Frame:
+    offset: int
+    size: int
+    duration_ms: float
+
+
+@dataclass(frozen=True)
+class AudioSegment:
+    """Byte range of an audio file, and the time range it covers, in milliseconds from the start of the file."""
+
+    offset: int
+    size: int
+    start_ms: int
+    end_ms: int
+
+
+def _parse_frame_header(header: bytes) -> Optional[Tuple[int, float]]:
+    """Size in bytes and duration in milliseconds of the MPEG audio frame starting with `header` (4 bytes)."""
+    if header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    # Reserved values, and free-format frames whose size is not in their header
+    if version == 1 or layer == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    bitrate = _BITRATES_KBPS[(3 if version == 3 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 3:
+        samples = 384
+        size = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == 1 and version != 3 else 1152
+        size = samples // 8 * bitrate // sample_rate + padding
+    return size, samples * 1000 / sample_rate
+
+
+def _id3v2_size(header: bytes) -> int:
+    """Size of the ID3v2 tag starting with `header` (10 bytes), 0 when there is none."""
+    if len(header) < 10 or header[:3] != b"ID3":
+        return 0
+    size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def mp3_frames(stream: BinaryIO) -> Iterator[Mp3Frame]:
+    """
+    Frames of the MP3 stream read from the current position, with their offsets from that position.
+
+    A leading ID3v2 tag is skipped. Yields nothing when the audio does not start with an MPEG audio frame. Junk
+    between frames (other tags, corruption) is skipped by looking for the next two consecutive frame headers.
+    """
+    buffer = b""
+    base = 0  # offset of `buffer[0]` in the stream
+    position = 0  # position in `buffer`, possibly past its end when skipping a tag
+    eof = False
+
+    def fill(size: int) -> bool:
+        """Whether `size` bytes are available from `position`, reading more of the stream if needed."""
+        nonlocal buffer, base, position, eof
+        if len(buffer) - position >= size:
+            return True
+        base += min(position, len(buffer))
+        buffer, position = buffer[position:], max(0, position - len(buffer))
+        while position and not eof:
+            skipped = len(stream.read(min(CHUNK_SIZE, position)))
+            eof = not skipped
+            base += skipped
+            position -= skipped
+        while len(buffer) < size and not eof:
+            data = stream.read(CHUNK_SIZE)
+            eof = not data
+            buffer += data
+        return not position and len(buffer) >= size
+
+    fill(10)
+    position = _id3v2_size(buffer[:10])
+    synced = True
+    found = False
+    while fill(4):
+        parsed = _parse_frame_header(buffer[position : position + 4])
+        if parsed and not synced:
+            # When resynchronizing, only trust a header followed by another one, or by the end of the stream
+            size = parsed[0]
+            if fill(size + 4):
+                parsed = parsed if _parse_frame_header(buffer[position + size : position + size + 4]) else None
+            elif len(buffer) - position != size:
+                parsed = None
+        if parsed is None:
+            if not found:
+                return
+            synced = False
+            next_sync = buffer.find(b"\xff", position + 1)
+            position = next_sync if next_sync >= 0 else len(buffer)
+            continue
+        size, duration_ms = parsed
+        synced = found = True
+        yield Mp3Frame(base + position, size, duration_ms)
+        position += size
+
+
+def split_mp3(stream: BinaryIO, segment_ms: int, overlap_ms: int) -> List[AudioSegment]:
+    """
+    Split an MP3 stream at frame boundaries into segments of about `segment_ms`, each starting `overlap_ms` before
+    the end of the previous one.
+
+    The segments are read from the current position of the stream, which is left at an undefined position.
+    Their offsets are relative to that position.
+
+    Returns:
+        The segments, or an empty list when the audio is not MP3.
+    """
+    if overlap_ms >= segment_ms:
+        raise ValueError("The overlap must be shorter than the segments")
+    frames = list(mp3_frames(stream))
+    if not frames:
+        return []
+    starts = list(accumulate((frame.duration_ms for frame in frames), initial=0.0))
+    total_ms = starts.pop()
+
+    segments = []
+    first = 0
+    while True:
+        # The last segment takes the rest of the audio rather than leaving a segment made only of overlap
+        if starts[first] + segment_ms >= total_ms - overlap_ms:
+            last = len(frames)
+        else:
+            last = max(bisect_left(starts, starts[first] + segment_ms), first + 1)
+        end = frames[last - 1].offset + frames[last - 1].size
+        end_ms = total_ms if last == len(frames) else starts[last]
+        segments.append(
+            AudioSegment(frames[first].offset, end - frames[first].offset, round(starts[first]), round(end_ms))
+        )
+        if last == len(frames):
+            return segments
+        first = max(bisect_right(starts, end_ms - overlap_ms) - 1, first + 1)
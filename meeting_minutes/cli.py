@@ -0,0 +1,181 @@
+"""
+Command line entry point: `meeting-minutes <command>` (or `python -m meeting_minutes <command>`).
+"""
+
+import argparse
+import os
+import signal
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from .database import SessionLocal
+from .services import DEFAULT_BACKFILL_WORKERS, MeetingService
+from .transfer import DEFAULT_BATCH_SIZE, FORMATS, TABLES, export_database, import_database
+from .worker import DEFAULT_INTERVAL, DEFAULT_JITTER, DEFAULT_PORT, SyncWorker, serve_health
+from .workspaces import (
+    export_workspaces,
+    get_current_workspace,
+    get_workspace_engine,
+    list_workspaces,
+    search_workspaces,
+)
+
+
+def _session(args: argparse.Namespace):
+    return SessionLocal(bind=get_workspace_engine(args.workspace))
+
+
+def _export(args: argparse.Namespace) -> None:
+    if args.all_workspaces:
+        results = export_workspaces(args.folder, args.format, tables=args.tables, batch_size=args.batch_size)
+        for workspace, counts in results.items():
+            for table, count in counts.items():
+                print(f"{workspace}/{table}: {count} rows exported")
+        return
+    with _session(args) as db:
+        counts = export_database(db, args.folder, args.format, args.tables, args.batch_size)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows exported")
+
+
+def _import(args: argparse.Namespace) -> None:
+    with _session(args) as db:
+        counts = import_database(db, args.folder, args.format, args.tables, args.batch_size)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows imported")
+
+
+def _backfill_analytics(args: argparse.Namespace) -> None:
+    with _session(args) as db:
+        count = MeetingService(db).backfill_speaker_stats(max_workers=args.workers)
+    print(f"{count} meetings backfilled")
+
+
+def _backfill_hashes(args: argparse.Namespace) -> None:
+    with _session(args) as db:
+        count = MeetingService(db).backfill_content_hashes(max_workers=args.workers)
+    print(f"{count} meetings hashed")
+
+
+def _search(args: argparse.Namespace) -> None:
+    workspaces = None if args.all_workspaces else [args.workspace]
+    for workspace, hit in search_workspaces(args.question, args.k, workspaces):
+        print(f"{hit.score:.3f}  {workspace}/{hit.meeting}  {hit.text[:100]}")
+
+
+def _reindex(args: argparse.Namespace) -> None:
+    from .search import rebuild_index
+
+    with _session(args) as db:
+        count = rebuild_index(db)
+    print(f"{count} chunks indexed")
+
+
+def _worker(args: argparse.Namespace) -> None:
+    def engines():
+        workspaces = list_workspaces() if args.all_workspaces else [args.workspace]
+        return {workspace: get_workspace_engine(workspace) for workspace in workspaces}
+
+    worker = SyncWorker(engines, interval=args.interval, jitter=args.jitter, lease_seconds=args.lease_seconds)
+    if args.once:
+        worker.run_once()
+        worker.release()
+        print(f"{worker.metrics.syncs} databases synced, {worker.metrics.completed} meetings completed")
+        if worker.metrics.last_failed:
+            raise SystemExit(1)
+        return
+    server = serve_health(worker, args.port) if args.port else None
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    print(f"Worker {worker.owner} syncing every {args.interval:.0f}s")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.release()
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+def _add_transfer_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("folder", help="folder containing one file per table")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES), help="tables to transfer (default: all)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="meeting-minutes", description="Meeting Minutes administration commands")
+    parser.add_argument(
+        "--workspace", default=get_current_workspace(), help="workspace to work on (default: WORKSPACE or 'default')"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="stream the database to JSONL or Parquet files")
+    _add_transfer_arguments(export_parser)
+    export_parser.add_argument(
+        "--all-workspaces", action="store_true", help="export every workspace to <folder>/<workspace>/"
+    )
+    export_parser.set_defaults(handler=_export)
+
+    import_parser = commands.add_parser("import", help="upsert JSONL or Parquet files into the database")
+    _add_transfer_arguments(import_parser)
+    import_parser.set_defaults(handler=_import)
+
+    backfill_parser = commands.add_parser("backfill-analytics", help="compute missing speaker analytics")
+    backfill_parser.add_argument("--workers", type=int, default=DEFAULT_BACKFILL_WORKERS)
+    backfill_parser.set_defaults(handler=_backfill_analytics)
+
+    hashes_parser = commands.add_parser("backfill-hashes", help="hash the audio of meetings uploaded before hashing")
+    hashes_parser.add_argument("--workers", type=int, default=DEFAULT_BACKFILL_WORKERS)
+    hashes_parser.set_defaults(handler=_backfill_hashes)
+
+    search_parser = commands.add_parser("search", help="semantic search over the meeting transcripts")
+    search_parser.add_argument("question")
+    search_parser.add_argument("-k", type=int, default=10, help="number of passages")
+    search_parser.add_argument("--all-workspaces", action="store_true", help="search every workspace")
+    search_parser.set_defaults(handler=_search)
+
+    reindex_parser = commands.add_parser("reindex", help="rebuild the semantic search index from the transcripts")
+    reindex_parser.set_defaults(handler=_reindex)
+
+    worker_parser = commands.add_parser("worker", help="sync the databases with AssemblyAI in the background")
+    worker_parser.add_argument(
+        "--interval",
+        type=float,
+        default=float(os.getenv("WORKER_INTERVAL", DEFAULT_INTERVAL)),
+        help="seconds between syncs",
+    )
+    worker_parser.add_argument(
+        "--jitter",
+        type=float,
+        default=float(os.getenv("WORKER_JITTER", DEFAULT_JITTER)),
+        help="random share of the interval",
+    )
+    worker_parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=float(os.getenv("WORKER_LEASE_SECONDS", 0)) or None,
+        help="seconds before a silent worker's lease is taken over (default: three intervals)",
+    )
+    worker_parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.getenv("WORKER_PORT", DEFAULT_PORT)),
+        help="health and metrics port (0: none)",
+    )
+    worker_parser.add_argument("--all-workspaces", action="store_true", help="sync every workspace")
+    worker_parser.add_argument("--once", action="store_true", help="run a single sync and exit")
+    worker_parser.set_defaults(handler=_worker)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,215 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+from sqlalchemy import Engine, create_engine, event, inspect, make_url, text
+from sqlalchemy.engine import URL, Connection
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Mapped, mapped_column
 import os
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
 
 class Base(DeclarativeBase):
     pass
 
 
 # Database configuration
-DB_PATH = os.getenv("DB_PATH", "meetings.db")
-os.makedirs("data", exist_ok=True)
-engine = create_engine(f"sqlite:///data/{DB_PATH}", echo=False)  # `echo=True` pour le débogage
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DEFAULT_DB_PATH = "meetings.db"
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_RECYCLE = 1800  # seconds
+# File-backed SQLite: journal mode (WAL lets readers work while one connection writes) and milliseconds a connection
+# waits for the write lock before failing
+DEFAULT_SQLITE_JOURNAL_MODE = "wal"
+DEFAULT_SQLITE_BUSY_TIMEOUT = 5000
+
+# Async drivers used by the API for each synchronous backend
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# Objects stay readable after commit: a session reading back what it just wrote needs no SELECT (sessions live
+# for one Streamlit rerun, one request or one command, and `sync_meetings` expires them after syncs by others)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+def get_database_url() -> str:
+    """
+    Resolve the database URL from the environment.
+
+    `DATABASE_URL` takes precedence; otherwise the historical `DB_PATH` file in the `data` folder is used.
+    """
+    if url := os.getenv("DATABASE_URL"):
+        return url
+    return f"sqlite:///data/{os.getenv('DB_PATH', DEFAULT_DB_PATH)}"
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_options(url: str | URL) -> Dict[str, Any]:
+    """
+    Build the `create_engine` keyword arguments for a database URL.
+
+    Pool settings come from `DB_POOL_SIZE`, `DB_MAX_OVERFLOW`, `DB_POOL_PRE_PING` and `DB_POOL_RECYCLE`.
+    In-memory SQLite uses a single-connection pool, so pool sizing does not apply to it.
+    """
+    url = make_url(url)
+    options: Dict[str, Any] = {
+        "echo": _env_bool("DB_ECHO", False),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+    if _is_memory_sqlite(url):
+        return options
+
+    options |= {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", DEFAULT_POOL_SIZE)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", DEFAULT_MAX_OVERFLOW)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", DEFAULT_POOL_RECYCLE)),
+    }
+    if url.get_backend_name() == "sqlite":
+        # Streamlit reruns the script in worker threads; connections are never shared concurrently.
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def _ensure_sqlite_folder(url: URL) -> None:
+    if url.get_backend_name() == "sqlite" and not _is_memory_sqlite(url):
+        if folder := os.path.dirname(url.database):
+            os.makedirs(folder, exist_ok=True)
+
+
+def _configure_sqlite(engine: Engine) -> None:
+    """
+    Set the journal mode (`SQLITE_JOURNAL_MODE`) and busy timeout (`SQLITE_BUSY_TIMEOUT`, in milliseconds) of every
+    connection to a file-backed SQLite database, so that concurrent writers (sessions, the write queue, the sync
+    worker) wait for each other instead of failing at once, and readers do not block them.
+    """
+    url = engine.url
+    if url.get_backend_name() != "sqlite" or _is_memory_sqlite(url):
+        return
+    journal_mode = os.getenv("SQLITE_JOURNAL_MODE", DEFAULT_SQLITE_JOURNAL_MODE)
+    busy_timeout = int(os.getenv("SQLITE_BUSY_TIMEOUT", DEFAULT_SQLITE_BUSY_TIMEOUT))
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+        cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+        cursor.close()
+
+
+def create_db_engine(url: Optional[str | URL] = None, **overrides: Any) -> Engine:
+    """
+    Create an engine for `url` (defaults to `get_database_url()`).
+
+    The parent folder of a file-backed SQLite database is created when missing (see `_configure_sqlite` for its
+    connection settings).
+    """
+    url = make_url(url or get_database_url())
+    _ensure_sqlite_folder(url)
+    engine = create_engine(url, **(engine_options(url) | overrides))
+    _configure_sqlite(engine)
+    return engine
 
 
-def init_db():
-    """Create databases if not exists."""
+def get_async_database_url(url: Optional[str | URL] = None) -> URL:
+    """Same database as `url` (defaults to `get_database_url()`), reached through its async driver."""
+    url = make_url(url or get_database_url())
+    if url.get_dialect().is_async:
+        return url
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+def create_async_db_engine(url: Optional[str | URL] = None, **overrides: Any) -> "AsyncEngine":
+    """Async counterpart of `create_db_engine`, sharing the same pool settings."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = get_async_database_url(url)
+    _ensure_sqlite_folder(url)
+    options = engine_options(url)
+    options.pop("connect_args", None)  # aiosqlite runs every connection in its own thread
+    engine = create_async_engine(url, **(options | overrides))
+    _configure_sqlite(engine.sync_engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """Process-wide engine, created on first use so that `.env` is loaded beforehand."""
+    return create_db_engine()
+
+
+def async_session_factory(engine: "AsyncEngine") -> "async_sessionmaker[AsyncSession]":
+    """Async sessions bound to `engine`; objects stay readable after commit."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+@lru_cache(maxsize=1)
+def get_async_engine() -> "AsyncEngine":
+    """Process-wide async engine, created on first use."""
+    return create_async_db_engine()
+
+
+def add_missing_columns(bind: Engine | Connection) -> List[str]:
+    """
+    Add to existing tables the nullable model columns they lack, with their indexes.
+
+    `create_all` only creates missing tables, so databases created before a column was added need this.
+
+    Returns:
+        The added columns, as `table.column`.
+    """
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            return add_missing_columns(conn)
+
+    inspector = inspect(bind)
+    quote = bind.dialect.identifier_preparer.quote
+    added: List[str] = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing and column.nullable]
+        for column in missing:
+            column_type = column.type.compile(dialect=bind.dialect)
+            bind.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+            added.append(f"{table.name}.{column.name}")
+        for index in table.indexes:
+            if any(column in missing for column in index.columns):
+                index.create(bind, checkfirst=True)
+    return added
+
+
+def init_db(engine: Optional[Engine] = None):
+    """Create databases if not exists, and bring older ones up to date."""
+    from .migrations import migrate_integer_keys
+
+    engine = engine or get_engine()
+    migrate_integer_keys(engine)
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
 
 
 def get_db():
     """Dependency for database session"""
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator["AsyncSession"]:
+    """Dependency for async database session"""
+    async with async_session_factory(get_async_engine())() as db:
+        yield db
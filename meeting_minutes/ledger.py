@@ -0,0 +1,176 @@
+"""
+Append-only ledger of the AssemblyAI calls (`call_ledger` table), for tuning concurrency and spotting slowdowns or
+failures on the provider side.
+
+Every transcription, upload and LeMUR call of a `TranscriptionService` given a ledger is recorded with its duration,
+audio length or prompt and answer sizes (and tokens), and outcome. Recording only queues the entry: a writer thread
+inserts them `LEDGER_BATCH_SIZE` at a time, or every `LEDGER_FLUSH_SECONDS`, in one statement per batch, so calls
+never wait for the database. Entries go to the default database; disable with `CALL_LEDGER=false`.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from sqlalchemy import Engine, insert
+
+from .models import CallLedger
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_SECONDS = 2.0  # seconds a queued entry waits for others before being written
+
+# Columns of an entry; those it leaves out are null
+_COLUMNS = [column.name for column in CallLedger.__table__.columns if column.name != "id"]
+# Queue items: an entry, an event set once the entries queued before it are written, or None to stop
+_Item = Union[Dict[str, Any], threading.Event, None]
+
+
+class LedgerWriter:
+    """
+    Writer thread inserting ledger entries in batches.
+
+    Args:
+        engine: Database written to; the table is created there if missing.
+        batch_size: Maximum number of entries per insert.
+        flush_seconds: Seconds to wait for more entries before inserting a batch.
+    """
+
+    def __init__(
+        self, engine: Engine, batch_size: int = DEFAULT_BATCH_SIZE, flush_seconds: float = DEFAULT_FLUSH_SECONDS
+    ):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.batches = 0
+        self.written = 0
+        # Entries lost because their batch could not be inserted
+        self.dropped = 0
+        self._queue: "queue.SimpleQueue[_Item]" = queue.SimpleQueue()
+        self._table_ready = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="call-ledger", daemon=True)
+        self._thread.start()
+
+    def record(self, operation: str, duration_ms: int, outcome: str = "ok", **fields: Any) -> None:
+        """Queue an entry (`CallLedger` columns); returns at once."""
+        if self._closed:
+            return
+        fields.setdefault("created", datetime.now(timezone.utc).replace(tzinfo=None))
+        self._queue.put({"operation": operation, "duration_ms": duration_ms, "outcome": outcome, **fields})
+
+    @contextmanager
+    def timed(self, operation: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Record the call made in the block, timed, and failed if it raises.
+
+        The block can add columns (e.g. `answer_chars`, or `outcome` and `error`) to the yielded entry.
+        """
+        entry: Dict[str, Any] = {"created": datetime.now(timezone.utc).replace(tzinfo=None), **fields}
+        start = time.perf_counter()
+        try:
+            yield entry
+        except Exception as e:
+            entry.update(outcome="error", error=str(e) or type(e).__name__)
+            raise
+        finally:
+            self.record(operation, round((time.perf_counter() - start) * 1000), **entry)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the entries queued so far are written; False on timeout."""
+        if self._closed:
+            return True
+        written = threading.Event()
+        self._queue.put(written)
+        return written.wait(timeout)
+
+    def close(self) -> None:
+        """Write the queued entries and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def _next_batch(self) -> tuple[List[Dict[str, Any]], List[threading.Event], bool]:
+        batch: List[Dict[str, Any]] = []
+        flushes: List[threading.Event] = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            if item is None:
+                return batch, flushes, True
+            if isinstance(item, threading.Event):
+                # Written as soon as what precedes it is
+                flushes.append(item)
+                return batch, flushes, False
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, flushes, False
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return batch, flushes, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch, flushes, stop = self._next_batch()
+            if batch:
+                self._insert(batch)
+            for flushed in flushes:
+                flushed.set()
+
+    def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            if not self._table_ready:
+                CallLedger.__table__.create(self.engine, checkfirst=True)
+                self._table_ready = True
+            rows = [{column: entry.get(column) for column in _COLUMNS} for entry in batch]
+            with self.engine.begin() as conn:
+                conn.execute(insert(CallLedger), rows)
+        except Exception as e:
+            # The ledger must never get in the way of the calls it records
+            print(f"Could not write {len(batch)} call ledger entries: {e}")
+            self.dropped += len(batch)
+            return
+        self.batches += 1
+        self.written += len(batch)
+
+
+def transcript_fields(transcript: Any) -> Dict[str, Any]:
+    """Ledger columns of a returned transcript: its ID, audio length, and error if it failed."""
+    fields: Dict[str, Any] = {"remote_id": transcript.id, "audio_seconds": transcript.audio_duration}
+    if transcript.status == "error":
+        fields.update(outcome="error", error=transcript.error)
+    return fields
+
+
+def ledger_enabled() -> bool:
+    return os.getenv("CALL_LEDGER", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+_ledger: Optional[LedgerWriter] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Optional[LedgerWriter]:
+    """Process-wide ledger writer on the default database, started on first use; None when disabled."""
+    global _ledger
+    if not ledger_enabled():
+        return None
+    with _ledger_lock:
+        if _ledger is None:
+            from .database import get_engine
+
+            _ledger = LedgerWriter(
+                get_engine(),
+                batch_size=int(os.getenv("LEDGER_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+                flush_seconds=float(os.getenv("LEDGER_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)),
+            )
+            # Entries still queued at exit are written
+            atexit.register(_ledger.close)
+        return _ledger
@@ -0,0 +1,298 @@
+"""
+Online migration of databases created when meetings were keyed by their AssemblyAI transcript ID.
+
+`meetings.id` used to be the transcript ID, a long string repeated in the `meeting` column of every table holding
+meeting rows. Meetings now have an integer key, the transcript ID being kept in `meetings.remote_id`.
+
+SQLite cannot change a primary key in place, so each table is rebuilt as a shadow table (`_new_<table>`):
+
+1. `start` creates the shadow tables and, on SQLite, triggers logging the meetings whose rows change from then on.
+2. `copy` fills the shadow tables in batches, one transaction each: the application keeps reading and writing the
+   old tables meanwhile.
+3. `catch_up` copies again the meetings changed since, until few changes remain.
+4. `finish`, in one short transaction, copies the last changes, replaces the old tables by the shadow ones and
+   creates the indexes.
+
+On other databases there are no triggers: the copy runs within the final transaction, with the old tables locked
+against writes (reads go on).
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    inspect,
+    insert,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.engine import Connection, Engine
+
+# Through the models, so that their tables are registered
+from .models import Base
+
+SHADOW_PREFIX = "_new_"
+CHANGES_TABLE = "_migration_changes"
+DEFAULT_BATCH_SIZE = 1000
+# Changes left for the final transaction, below which `catch_up` stops
+MAX_FINAL_CHANGES = 100
+
+MEETINGS = "meetings"
+
+
+def needs_integer_keys(conn: Connection) -> bool:
+    """Whether the database has a `meetings` table still keyed by transcript ID."""
+    inspector = inspect(conn)
+    return inspector.has_table(MEETINGS) and "remote_id" not in {
+        column["name"] for column in inspector.get_columns(MEETINGS)
+    }
+
+
+def _shadow_table(table: Table, metadata: MetaData) -> Table:
+    """Copy of a model table named `_new_<name>`, referencing the shadow tables, without its indexes."""
+    columns = [
+        Column(
+            column.name,
+            column.type,
+            *[ForeignKey(SHADOW_PREFIX + foreign_key.target_fullname) for foreign_key in column.foreign_keys],
+            primary_key=column.primary_key,
+            nullable=column.nullable,
+            unique=column.unique,
+            autoincrement=column.autoincrement,
+        )
+        for column in table.columns
+    ]
+    return Table(SHADOW_PREFIX + table.name, metadata, *columns)
+
+
+class IntegerKeyMigration:
+    """
+    Moves the meeting tables of a database to integer meeting keys, in the steps described in the module docstring.
+
+    Args:
+        conn: Connection to the database; each step commits its own transactions.
+        batch_size: Rows copied per transaction.
+    """
+
+    def __init__(self, conn: Connection, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.online = conn.dialect.name == "sqlite"
+        inspector = inspect(conn)
+        # The meeting tables of the database; those created since the previous schema may be missing
+        model_tables = [
+            table
+            for table in Base.metadata.sorted_tables
+            if table.name == MEETINGS or any(fk.column.table.name == MEETINGS for fk in table.foreign_keys)
+        ]
+        self.tables = [table for table in model_tables if inspector.has_table(table.name)]
+        self.legacy = MetaData()
+        for table in self.tables:
+            Table(table.name, self.legacy, autoload_with=conn)
+        shadow_metadata = MetaData()
+        self.shadows = {table.name: _shadow_table(table, shadow_metadata) for table in self.tables}
+        self.changes = Table(
+            CHANGES_TABLE,
+            shadow_metadata,
+            Column("seq", Integer, primary_key=True),
+            Column("remote_id", String(255), nullable=True),
+        )
+        self.copied: Dict[str, int] = {table.name: 0 for table in self.tables}
+
+    def run(self) -> Dict[str, int]:
+        """
+        Run every step.
+
+        Returns:
+            The number of rows copied per table.
+        """
+        self.start()
+        if self.online:
+            self.copy()
+            while self.catch_up() > MAX_FINAL_CHANGES:
+                pass
+        self.finish()
+        return self.copied
+
+    def start(self) -> None:
+        """Create the shadow tables and the change log, dropping those left by an interrupted migration."""
+        self._drop_triggers()
+        for shadow in [self.changes, *reversed(self.shadows.values())]:
+            shadow.drop(self.conn, checkfirst=True)
+        for shadow in [self.changes, *self.shadows.values()]:
+            shadow.create(self.conn)
+        if self.online:
+            quote = self.conn.dialect.identifier_preparer.quote
+            for table in self.tables:
+                key = "id" if table.name == MEETINGS else "meeting"
+                for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+                    values = ", ".join(f"({row}.{quote(key)})" for row in rows)
+                    self.conn.execute(
+                        text(
+                            f"CREATE TRIGGER {self._trigger(table.name, event)} AFTER {event} ON {quote(table.name)} "
+                            f"BEGIN INSERT INTO {CHANGES_TABLE} (remote_id) VALUES {values}; END"
+                        )
+                    )
+        self.conn.commit()
+
+    def copy(self) -> None:
+        """Copy every row to the shadow tables, a batch per transaction."""
+        for table in self.tables:
+            last: Optional[tuple] = None
+            while True:
+                last = self._copy_batch(table.name, after=last)
+                self.conn.commit()
+                if last is None:
+                    break
+
+    def catch_up(self) -> int:
+        """
+        Copy again, in one transaction, the meetings whose rows changed since the last call.
+
+        Returns:
+            The number of meetings copied.
+        """
+        count = self._copy_changes()
+        self.conn.commit()
+        return count
+
+    def finish(self) -> None:
+        """Copy the last changes and replace the old tables by the shadow ones, in one transaction."""
+        quote = self.conn.dialect.identifier_preparer.quote
+        if self.online:
+            # pysqlite only opens a transaction before a data change: make one, so that the database stays locked
+            # from now on and the renames below are not committed one by one
+            self.conn.execute(insert(self.changes).values(remote_id=None))
+            self._drop_triggers()
+            self._copy_changes()
+        else:
+            if self.conn.dialect.name == "postgresql":
+                tables = ", ".join(quote(table.name) for table in self.tables)
+                self.conn.execute(text(f"LOCK TABLE {tables} IN EXCLUSIVE MODE"))
+            self.copy_in_transaction()
+        for table in reversed(self.tables):
+            self.conn.execute(text(f"DROP TABLE {quote(table.name)}"))
+        for table in self.tables:
+            self.conn.execute(text(f"ALTER TABLE {quote(SHADOW_PREFIX + table.name)} RENAME TO {quote(table.name)}"))
+            for index in table.indexes:
+                index.create(self.conn, checkfirst=True)
+            if self.conn.dialect.name == "postgresql" and table.autoincrement_column is not None:
+                # Rows were copied with their IDs: move the sequence past them
+                column = table.autoincrement_column.name
+                self.conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', '{column}'), "
+                        f"COALESCE(MAX({quote(column)}), 1)) FROM {quote(table.name)}"
+                    )
+                )
+        self.changes.drop(self.conn)
+        self.conn.commit()
+
+    def copy_in_transaction(self) -> None:
+        """Copy every row within the current transaction (migrations without change log)."""
+        for table in self.tables:
+            last: Optional[tuple] = None
+            while (last := self._copy_batch(table.name, after=last)) is not None:
+                pass
+
+    def _trigger(self, table: str, event: str) -> str:
+        return f"{CHANGES_TABLE}_{table}_{event.lower()}"
+
+    def _drop_triggers(self) -> None:
+        if self.online:
+            for table in self.tables:
+                for event in ("INSERT", "UPDATE", "DELETE"):
+                    self.conn.execute(text(f"DROP TRIGGER IF EXISTS {self._trigger(table.name, event)}"))
+
+    def _select(self, name: str):
+        """Rows of an old table, in the columns of its shadow table, with integer meeting keys."""
+        legacy = self.legacy.tables[name]
+        shadow = self.shadows[name]
+        if name == MEETINGS:
+            # The new IDs are assigned by the shadow table
+            columns = [legacy.c.id.label("remote_id")] + [
+                legacy.c[column.name] for column in shadow.columns if column.name in legacy.c and column.name != "id"
+            ]
+            return select(*columns), legacy, [legacy.c.id]
+        meetings = self.shadows[MEETINGS]
+        columns = [
+            meetings.c.id.label("meeting") if column.name == "meeting" else legacy.c[column.name]
+            for column in shadow.columns
+            if column.name in legacy.c
+        ]
+        # Rows of meetings that no longer exist are left behind
+        statement = select(*columns).join(meetings, meetings.c.remote_id == legacy.c.meeting)
+        return statement, legacy, list(legacy.primary_key.columns)
+
+    def _copy_batch(self, name: str, after: Optional[tuple]) -> Optional[tuple]:
+        """Copy the next batch of rows by primary key order; returns the key of its last row, None when done."""
+        statement, legacy, keys = self._select(name)
+        key_columns = [key.label(f"_key_{i}") for i, key in enumerate(keys)]
+        statement = statement.add_columns(*key_columns).order_by(*keys).limit(self.batch_size)
+        if after is not None:
+            statement = statement.where(tuple_(*keys) > tuple_(*after) if len(keys) > 1 else keys[0] > after[0])
+        rows = [row._asdict() for row in self.conn.execute(statement)]
+        if not rows:
+            return None
+        last = tuple(rows[-1][column.name] for column in key_columns)
+        for row in rows:
+            for column in key_columns:
+                del row[column.name]
+        self.conn.execute(insert(self.shadows[name]), rows)
+        self.copied[name] += len(rows)
+        return last
+
+    def _copy_meetings(self, remote_ids: Sequence[str]) -> None:
+        """Replace the shadow rows of these meetings by those of the old tables."""
+        meetings = self.shadows[MEETINGS]
+        shadow_ids = select(meetings.c.id).where(meetings.c.remote_id.in_(remote_ids)).scalar_subquery()
+        for table in reversed(self.tables):
+            shadow = self.shadows[table.name]
+            key = shadow.c.id if table.name == MEETINGS else shadow.c.meeting
+            self.conn.execute(delete(shadow).where(key.in_(shadow_ids)))
+        for table in self.tables:
+            statement, legacy, _ = self._select(table.name)
+            key = legacy.c.id if table.name == MEETINGS else legacy.c.meeting
+            rows = [row._asdict() for row in self.conn.execute(statement.where(key.in_(remote_ids)))]
+            if rows:
+                self.conn.execute(insert(self.shadows[table.name]), rows)
+
+    def _copy_changes(self) -> int:
+        last_seq = self.conn.execute(select(self.changes.c.seq).order_by(self.changes.c.seq.desc()).limit(1)).scalar()
+        if last_seq is None:
+            return 0
+        remote_ids: List[str] = [
+            remote_id
+            for (remote_id,) in self.conn.execute(
+                select(self.changes.c.remote_id)
+                .where(self.changes.c.seq <= last_seq, self.changes.c.remote_id.is_not(None))
+                .distinct()
+            )
+        ]
+        for start in range(0, len(remote_ids), self.batch_size):
+            self._copy_meetings(remote_ids[start : start + self.batch_size])
+        self.conn.execute(delete(self.changes).where(self.changes.c.seq <= last_seq))
+        return len(remote_ids)
+
+
+def migrate_integer_keys(bind: Engine | Connection, batch_size: int = DEFAULT_BATCH_SIZE) -> Optional[Dict[str, int]]:
+    """
+    Migrate a database keyed by transcript IDs to integer meeting keys, if needed (see `IntegerKeyMigration`).
+
+    Returns:
+        The number of rows copied per table, None when the database did not need it.
+    """
+    if isinstance(bind, Engine):
+        with bind.connect() as conn:
+            return migrate_integer_keys(conn, batch_size)
+    if not needs_integer_keys(bind):
+        bind.commit()
+        return None
+    return IntegerKeyMigration(bind, batch_size).run()
@@ -1,7 +1,7 @@
 # models.py
 from typing import Optional
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
 from .database import Base
 from datetime import datetime, timezone, date as datetime_date
 
@@ -9,16 +9,37 @@ from datetime import datetime, timezone, date as datetime_date
 class Meeting(Base):
     __tablename__ = "meetings"
 
-    id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # ID of the AssemblyAI transcript
+    remote_id: Mapped[str] = mapped_column(String(255), unique=True)
     name: Mapped[str] = mapped_column(Text)
     date: Mapped[Optional[datetime_date]] = mapped_column(Date, nullable=True)
     created: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     status: Mapped[str] = mapped_column(Text, nullable=True)
     deleted: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # SHA-256 of the uploaded audio, to recognise re-uploads of the same recording
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    # Space-separated IDs of the segment transcripts of a recording transcribed in segments (the first is
+    # `remote_id`)
+    segment_ids: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # ID of the fast draft transcript stored while `remote_id` is transcribed with the best model (tiered mode)
+    draft_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
     transcripts_rel: Mapped[list["Transcript"]] = relationship(back_populates="meeting_rel")
     queries_rel: Mapped[list["Query"]] = relationship(back_populates="meeting_rel")
 
+    @property
+    def transcript_ids(self) -> list[str]:
+        """AssemblyAI transcripts of the stored transcript: the draft one while there is a draft"""
+        if self.draft_id:
+            return [self.draft_id]
+        return self.segment_ids.split() if self.segment_ids else [self.remote_id]
+
+    @property
+    def remote_ids(self) -> list[str]:
+        """Every AssemblyAI transcript of the meeting"""
+        return self.transcript_ids + [self.remote_id] if self.draft_id else self.transcript_ids
+
 
 class Prompt(Base):
     __tablename__ = "prompts"
@@ -33,11 +54,15 @@ class Query(Base):
     __tablename__ = "queries"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    meeting: Mapped[str] = mapped_column(ForeignKey("meetings.id"))
+    meeting: Mapped[int] = mapped_column(ForeignKey("meetings.id"))
     question: Mapped[str] = mapped_column(Text)
     answer: Mapped[str] = mapped_column(Text)
     created: Mapped[datetime] = mapped_column(DateTime, default=datetime.now())
     deleted: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Whether the answer was computed against the draft transcript of the meeting (tiered mode)
+    draft: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
+    # Start of the question, when loaded with `with_expression` (see `MeetingRepository.get_detail`)
+    question_preview: Mapped[Optional[str]] = query_expression()
 
     meeting_rel: Mapped["Meeting"] = relationship(back_populates="queries_rel")
 
@@ -45,9 +70,74 @@ class Query(Base):
 class Transcript(Base):
     __tablename__ = "transcripts"
 
-    meeting: Mapped[str] = mapped_column(ForeignKey("meetings.id"), primary_key=True)
+    meeting: Mapped[int] = mapped_column(ForeignKey("meetings.id"), primary_key=True)
     text: Mapped[str] = mapped_column(Text)
     transcript: Mapped[str] = mapped_column(Text)
     deleted: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     meeting_rel: Mapped["Meeting"] = relationship(back_populates="transcripts_rel")
+
+
+class SpeakerStats(Base):
+    __tablename__ = "speaker_stats"
+
+    meeting: Mapped[int] = mapped_column(ForeignKey("meetings.id"), primary_key=True)
+    speaker: Mapped[str] = mapped_column(String(32), primary_key=True)
+    talk_time_ms: Mapped[int] = mapped_column(Integer)
+    turns: Mapped[int] = mapped_column(Integer)
+    interruptions: Mapped[int] = mapped_column(Integer)
+    words: Mapped[int] = mapped_column(Integer)
+    words_per_minute: Mapped[float] = mapped_column(Float)
+
+
+class Utterance(Base):
+    __tablename__ = "utterances"
+    __table_args__ = (Index("ix_utterances_meeting_speaker", "meeting", "speaker", "position"),)
+
+    meeting: Mapped[int] = mapped_column(ForeignKey("meetings.id"), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    speaker: Mapped[str] = mapped_column(String(32))
+    start: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    end: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    text: Mapped[str] = mapped_column(Text)
+
+
+class SearchChunk(Base):
+    __tablename__ = "search_chunks"
+
+    # Row of the chunk vector in the search index matrix
+    row: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    meeting: Mapped[int] = mapped_column(ForeignKey("meetings.id"), index=True)
+    position: Mapped[int] = mapped_column(Integer)
+    text: Mapped[str] = mapped_column(Text)
+
+
+class WorkerLease(Base):
+    __tablename__ = "worker_leases"
+
+    # Job the lease is for, e.g. "sync"
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Worker holding the lease, until `expires` (naive UTC) unless it renews it
+    owner: Mapped[str] = mapped_column(String(255))
+    expires: Mapped[datetime] = mapped_column(DateTime)
+
+
+class CallLedger(Base):
+    __tablename__ = "call_ledger"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Start of the call (naive UTC)
+    created: Mapped[datetime] = mapped_column(DateTime, index=True)
+    # "transcribe", "transcribe_draft", "submit", "upload", "wait" or "lemur"
+    operation: Mapped[str] = mapped_column(String(32))
+    # AssemblyAI transcript the call is about: `Meeting.remote_id`, or one of its segments or its draft
+    remote_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
+    duration_ms: Mapped[int] = mapped_column(Integer)
+    audio_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    prompt_chars: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    answer_chars: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    input_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    output_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # "ok" or "error" (an exception, or a transcript in error)
+    outcome: Mapped[str] = mapped_column(String(16))
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
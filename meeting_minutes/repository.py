@@ -1,56 +1,286 @@
-from sqlalchemy.orm import Session
-from datetime import date, datetime, timezone
-from typing import Dict, Optional
-from .models import Meeting, Prompt, Query, Transcript
+import importlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from sqlalchemy import case, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, load_only, with_expression
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from .database import Base
+from .models import (
+    CallLedger,
+    Meeting,
+    Prompt,
+    Query,
+    SearchChunk,
+    SpeakerStats,
+    Transcript,
+    Utterance,
+    WorkerLease,
+)
+
+# Dialects supporting `INSERT ... ON CONFLICT DO UPDATE`
+_ON_CONFLICT_DIALECTS = {"sqlite", "postgresql"}
+
+# `Session.info` key holding the depth of the `unit_of_work` blocks open on a session
+_UNIT_OF_WORK = "unit_of_work"
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Group repository writes in one transaction.
+
+    Inside the block, the write methods of the repositories only flush (generated IDs are assigned), and the
+    block commits once on exit, or rolls back if it raises. Blocks can be nested: only the outermost one commits.
+    """
+    depth = db.info.get(_UNIT_OF_WORK, 0)
+    db.info[_UNIT_OF_WORK] = depth + 1
+    try:
+        yield db
+        if not depth:
+            db.commit()
+    except BaseException:
+        if not depth:
+            db.rollback()
+        raise
+    finally:
+        db.info[_UNIT_OF_WORK] = depth
+
+
+def _save(db: Session, obj: Optional[Base] = None, refresh: bool = False) -> None:
+    """End a repository write: commit it, or only flush it inside a `unit_of_work`; reload `obj` if `refresh`."""
+    if db.info.get(_UNIT_OF_WORK):
+        db.flush()
+    else:
+        db.commit()
+    if refresh and obj is not None:
+        db.refresh(obj)
+
+
+@dataclass
+class MeetingDetail:
+    """
+    A meeting with its transcript metadata and its questions, as loaded by `MeetingRepository.get_detail`.
+
+    The transcript text and the answers are deferred: they are loaded when first accessed.
+    """
+
+    meeting: Meeting
+    transcript: Optional[Transcript]
+    queries: List[Query]
+
+
+@dataclass
+class CallRollup:
+    """Calls of one operation in the call ledger, as summed up by `CallLedgerRepository.rollup`."""
+
+    operation: str
+    calls: int
+    failures: int
+    # Nearest-rank percentiles of the call durations
+    p50_ms: int
+    p95_ms: int
+    max_ms: int
+    audio_seconds: float
+    input_tokens: int
+    output_tokens: int
+
+
+def upsert_rows(
+    db: Session, model: type[Base], rows: Sequence[Dict[str, Any]], index_elements: Optional[List[str]] = None
+) -> int:
+    """
+    Insert rows, updating the existing ones matching `index_elements` (default: primary key).
+
+    Uses a native `ON CONFLICT` statement on SQLite and PostgreSQL and falls back to a portable
+    `Session.merge` on other dialects, or to a lookup of each row when matching other columns.
+
+    Returns:
+        The number of rows sent to the database.
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    keys = index_elements or [column.name for column in table.primary_key]
+    dialect = db.get_bind().dialect.name
+    if dialect in _ON_CONFLICT_DIALECTS:
+        stmt = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert(table)
+        update_columns = {name: stmt.excluded[name] for name in rows[0] if name not in keys}
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(index_elements=keys, set_=update_columns)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+        db.execute(stmt, list(rows))
+    elif index_elements:
+        for row in rows:
+            existing = db.query(model).filter_by(**{key: row[key] for key in keys}).first()
+            if existing is None:
+                db.add(model(**row))
+            else:
+                for name, value in row.items():
+                    setattr(existing, name, value)
+    else:
+        for row in rows:
+            db.merge(model(**row))
+    _save(db)
+    return len(rows)
+
+
+def _contains(term: str) -> str:
+    """`LIKE` pattern matching `term` anywhere, with wildcards escaped."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
 
 
 class MeetingRepository:
     @staticmethod
-    def get_all(db: Session, include_deleted: bool = False) -> Dict[str, Meeting]:
+    def get_all(db: Session, include_deleted: bool = False) -> Dict[int, Meeting]:
         query = db.query(Meeting)
         if not include_deleted:
             query = query.filter(Meeting.deleted.is_(None))
         return {meeting.id: meeting for meeting in query.all()}
 
     @staticmethod
-    def soft_delete(db: Session, meeting_id: str) -> None:
+    def search(db: Session, term: str, include_deleted: bool = False) -> Dict[int, Meeting]:
+        """Meetings whose name or transcript contains `term` (case-insensitive)."""
+        pattern = _contains(term)
+        query = (
+            db.query(Meeting)
+            .outerjoin(Transcript, Transcript.meeting == Meeting.id)
+            .filter(or_(Meeting.name.ilike(pattern, escape="\\"), Transcript.text.ilike(pattern, escape="\\")))
+        )
+        if not include_deleted:
+            query = query.filter(Meeting.deleted.is_(None))
+        return {meeting.id: meeting for meeting in query.all()}
+
+    @staticmethod
+    def get_by_remote_id(db: Session, remote_id: str) -> Optional[Meeting]:
+        """Meeting of an AssemblyAI transcript"""
+        return db.query(Meeting).filter(Meeting.remote_id == remote_id).first()
+
+    @staticmethod
+    def get_by_remote_ids(db: Session, remote_ids: Sequence[str]) -> Dict[str, Meeting]:
+        """Meetings of AssemblyAI transcripts, by transcript ID"""
+        return {meeting.remote_id: meeting for meeting in db.query(Meeting).filter(Meeting.remote_id.in_(remote_ids))}
+
+    @staticmethod
+    def get_by_status(db: Session, statuses: Sequence[str]) -> List[Meeting]:
+        """Non-deleted meetings with one of `statuses`"""
+        return db.query(Meeting).filter(Meeting.status.in_(statuses), Meeting.deleted.is_(None)).all()
+
+    @staticmethod
+    def get_by_content_hash(db: Session, content_hash: str) -> Optional[Meeting]:
+        """Oldest non-deleted meeting transcribed from the audio with this SHA-256"""
+        return (
+            db.query(Meeting)
+            .filter(Meeting.content_hash == content_hash, Meeting.deleted.is_(None))
+            .order_by(Meeting.created)
+            .first()
+        )
+
+    @staticmethod
+    def set_content_hash(db: Session, meeting_id: int, content_hash: str) -> None:
+        db.query(Meeting).filter(Meeting.id == meeting_id).update({"content_hash": content_hash})
+        _save(db)
+
+    @staticmethod
+    def get_without_content_hash(db: Session) -> List[Meeting]:
+        """Non-deleted meetings whose audio was never hashed"""
+        return db.query(Meeting).filter(Meeting.content_hash.is_(None), Meeting.deleted.is_(None)).all()
+
+    @staticmethod
+    def get_detail(db: Session, meeting_id: int, question_length: int = 80) -> Optional[MeetingDetail]:
+        """
+        A non-deleted meeting with its live transcript and queries, in a single statement.
+
+        Both relationships are joined eagerly (a meeting has at most one transcript, so the join does not multiply
+        the query rows), restricted to their non-deleted rows. Only the transcript keys and, for queries, the ID, date
+        and first `question_length` characters of the question (`Query.question_preview`) are selected.
+        """
+        statement = (
+            select(Meeting)
+            .where(Meeting.id == meeting_id, Meeting.deleted.is_(None))
+            .options(
+                joinedload(Meeting.transcripts_rel.and_(Transcript.deleted.is_(None))).options(
+                    load_only(Transcript.meeting, Transcript.deleted)
+                ),
+                joinedload(Meeting.queries_rel.and_(Query.deleted.is_(None))).options(
+                    load_only(Query.id, Query.meeting, Query.created, Query.deleted),
+                    with_expression(Query.question_preview, func.substr(Query.question, 1, question_length)),
+                ),
+            )
+            # Collections already loaded in the session would otherwise be kept as is, deleted rows included
+            .execution_options(populate_existing=True)
+        )
+        meeting = db.execute(statement).unique().scalar_one_or_none()
+        if meeting is None:
+            return None
+        return MeetingDetail(
+            meeting=meeting,
+            transcript=meeting.transcripts_rel[0] if meeting.transcripts_rel else None,
+            queries=sorted(meeting.queries_rel, key=lambda query: query.created, reverse=True),
+        )
+
+    @staticmethod
+    def soft_delete(db: Session, meeting_id: int) -> None:
         db.query(Meeting).filter(Meeting.id == meeting_id).update({"deleted": datetime.now()})
         db.query(Query).filter(Query.meeting == meeting_id).update({"deleted": datetime.now()})
         db.query(Transcript).filter(Transcript.meeting == meeting_id).update({"deleted": datetime.now()})
-        db.commit()
+        _save(db)
 
     @staticmethod
     def insert_or_update(
         db: Session,
-        meeting_id: str,
+        remote_id: str,
         name: str,
         meeting_date: Optional[date],
         created: datetime,
         status: str,
         deleted: Optional[datetime] = None,
+        content_hash: Optional[str] = None,
+        segment_ids: Optional[str] = None,
+        draft_id: Optional[str] = None,
+        refresh: bool = False,
     ) -> Meeting:
-        existing = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+        """Store the meeting of the AssemblyAI transcript `remote_id`; its `id` is assigned on insertion."""
+        existing = MeetingRepository.get_by_remote_id(db, remote_id)
         if existing:
             existing.name = name
             existing.date = meeting_date
             existing.created = created
             existing.status = status
             existing.deleted = deleted
+            existing.content_hash = content_hash or existing.content_hash
+            existing.segment_ids = segment_ids or existing.segment_ids
+            existing.draft_id = draft_id or existing.draft_id
         else:
             existing = Meeting(
-                id=meeting_id, name=name, date=meeting_date, created=created, status=status, deleted=deleted
+                remote_id=remote_id,
+                name=name,
+                date=meeting_date,
+                created=created,
+                status=status,
+                deleted=deleted,
+                content_hash=content_hash,
+                segment_ids=segment_ids,
+                draft_id=draft_id,
             )
             db.add(existing)
 
-        db.commit()
-        db.refresh(existing)
+        _save(db, existing, refresh)
         return existing
 
 
 class TranscriptRepository:
     @staticmethod
     def insert_or_update(
-        db: Session, meeting_id: str, text: str, transcript: str, deleted: Optional[datetime] = None
+        db: Session,
+        meeting_id: int,
+        text: str,
+        transcript: str,
+        deleted: Optional[datetime] = None,
+        refresh: bool = False,
     ) -> Transcript:
         existing = db.query(Transcript).filter(Transcript.meeting == meeting_id).first()
         if existing:
@@ -60,25 +290,33 @@ class TranscriptRepository:
         else:
             existing = Transcript(meeting=meeting_id, text=text, transcript=transcript, deleted=deleted)
             db.add(existing)
-        db.commit()
-        db.refresh(existing)
+        from .search import remove_meeting, schedule_indexing  # numpy is only loaded once transcripts are written
+
+        if deleted is None:
+            schedule_indexing(db, meeting_id, transcript or text)
+        else:
+            remove_meeting(db, meeting_id)
+        _save(db, existing, refresh)
         return existing
 
     @staticmethod
-    def get_transcript(db: Session, meeting_id: str) -> Optional[Transcript]:
+    def get_transcript(db: Session, meeting_id: int) -> Optional[Transcript]:
         return db.query(Transcript).filter(Transcript.meeting == meeting_id).first()
 
     @staticmethod
-    def get_all(db: Session, include_deleted: bool = False) -> Dict[str, Transcript]:
+    def get_all(db: Session, include_deleted: bool = False) -> Dict[int, Transcript]:
         query = db.query(Transcript)
         if not include_deleted:
             query = query.filter(Transcript.deleted.is_(None))
         return {transcript.meeting: transcript for transcript in query.all()}
 
     @staticmethod
-    def soft_delete(db: Session, meeting_id: str) -> None:
+    def soft_delete(db: Session, meeting_id: int) -> None:
+        from .search import remove_meeting
+
         db.query(Transcript).filter(Transcript.meeting == meeting_id).update({"deleted": datetime.now()})
-        db.commit()
+        remove_meeting(db, meeting_id)
+        _save(db)
 
 
 class PromptRepository:
@@ -101,16 +339,15 @@ class PromptRepository:
         return db.query(Prompt).filter(Prompt.name == name).first()
 
     @staticmethod
-    def create(db: Session, name: str, prompt_text: str) -> Prompt:
+    def create(db: Session, name: str, prompt_text: str, refresh: bool = False) -> Prompt:
         prompt = Prompt(name=name, prompt=prompt_text)
         db.add(prompt)
 
-        db.commit()
-        db.refresh(prompt)
+        _save(db, prompt, refresh)
         return prompt
 
     @staticmethod
-    def update(db: Session, id: int, name: str, prompt_text: str) -> Prompt:
+    def update(db: Session, id: int, name: str, prompt_text: str, refresh: bool = False) -> Prompt:
         """Update operation for prompts"""
         existing = db.query(Prompt).filter(Prompt.id == id).first()
         if not existing:
@@ -118,20 +355,19 @@ class PromptRepository:
         existing.name = name
         existing.prompt = prompt_text
 
-        db.commit()
-        db.refresh(existing)
+        _save(db, existing, refresh)
         return existing
 
     @staticmethod
     def soft_delete(db: Session, prompt_id: int) -> None:
         """Mark prompt as deleted"""
         db.query(Prompt).filter(Prompt.id == prompt_id).update({"deleted": datetime.now()})
-        db.commit()
+        _save(db)
 
 
 class QueryRepository:
     @staticmethod
-    def get_by_meeting(db: Session, meeting_id: str) -> Dict[int, Query]:
+    def get_by_meeting(db: Session, meeting_id: int) -> Dict[int, Query]:
         """Get all queries for a specific meeting"""
         return {
             query.id: query
@@ -142,22 +378,36 @@ class QueryRepository:
             .all()
         }
 
+    @staticmethod
+    def get_by_id(db: Session, query_id: int) -> Optional[Query]:
+        """Get a single query, with its full question and answer"""
+        return db.query(Query).filter(Query.id == query_id).first()
+
     @staticmethod
     def store_query(
-        db: Session, meeting_id: str, question: str, answer: str, created: Optional[datetime] = None
+        db: Session,
+        meeting_id: int,
+        question: str,
+        answer: str,
+        created: Optional[datetime] = None,
+        draft: bool = False,
+        refresh: bool = False,
     ) -> Query:
-        """Persist new query in database"""
+        """Persist new query in database; `draft` when it was answered from the draft transcript of the meeting"""
         if not created:
             created = datetime.now()
-        new_query = Query(meeting=meeting_id, question=question, answer=answer, created=created)
+        new_query = Query(meeting=meeting_id, question=question, answer=answer, created=created, draft=draft)
         db.add(new_query)
-        db.commit()
-        db.refresh(new_query)
+        _save(db, new_query, refresh)
         return new_query
 
     @staticmethod
     def update_query(
-        db: Session, query_id: int, question: Optional[str] = None, answer: Optional[str] = None
+        db: Session,
+        query_id: int,
+        question: Optional[str] = None,
+        answer: Optional[str] = None,
+        refresh: bool = False,
     ) -> Query:
         """Update query in database"""
         existing = db.query(Query).filter(Query.id == query_id).first()
@@ -168,20 +418,261 @@ class QueryRepository:
         if answer:
             existing.answer = answer
 
-        db.commit()
-        db.refresh(existing)
+        _save(db, existing, refresh)
         return existing
 
+    @staticmethod
+    def flag_draft_answers(db: Session, meeting_id: int) -> int:
+        """Mark the queries of a meeting as answered from its draft transcript, which is being replaced"""
+        flagged = db.query(Query).filter(Query.meeting == meeting_id).update({"draft": True})
+        _save(db)
+        return flagged
+
     @staticmethod
     def soft_delete(db: Session, query_id: int) -> None:
         """Mark query as deleted"""
         db.query(Query).filter(Query.id == query_id).update({"deleted": datetime.now()})
-        db.commit()
+        _save(db)
 
     @staticmethod
-    def get_all_history(db: Session, meeting_id: str) -> Dict[int, Query]:
+    def get_all_history(db: Session, meeting_id: int) -> Dict[int, Query]:
         """Retrieve full history including deleted queries"""
         return {
             query.id: query
             for query in db.query(Query).filter(Query.meeting == meeting_id).order_by(Query.created.desc()).all()
         }
+
+
+class SpeakerStatsRepository:
+    @staticmethod
+    def get_by_meeting(db: Session, meeting_id: int) -> Dict[str, SpeakerStats]:
+        """Speaker aggregates of a meeting, by speaker label"""
+        return {
+            stats.speaker: stats
+            for stats in db.query(SpeakerStats)
+            .filter(SpeakerStats.meeting == meeting_id)
+            .order_by(SpeakerStats.talk_time_ms.desc())
+            .all()
+        }
+
+    @staticmethod
+    def replace(db: Session, meeting_id: int, stats: Sequence[Dict[str, Any]]) -> None:
+        """Replace the speaker aggregates of a meeting"""
+        db.query(SpeakerStats).filter(SpeakerStats.meeting == meeting_id).delete()
+        db.add_all(SpeakerStats(meeting=meeting_id, **row) for row in stats)
+        _save(db)
+
+    @staticmethod
+    def get_meeting_ids(db: Session) -> Set[int]:
+        """IDs of the meetings having aggregates"""
+        return {meeting_id for (meeting_id,) in db.query(SpeakerStats.meeting).distinct()}
+
+
+class UtteranceRepository:
+    @staticmethod
+    def replace(db: Session, meeting_id: int, utterances: Sequence[Dict[str, Any]]) -> None:
+        """Replace the utterances of a meeting; `position` is their index in `utterances`"""
+        db.query(Utterance).filter(Utterance.meeting == meeting_id).delete()
+        if utterances:
+            db.execute(
+                insert(Utterance),
+                [{"meeting": meeting_id, "position": i, **utterance} for i, utterance in enumerate(utterances)],
+            )
+        _save(db)
+
+    @staticmethod
+    def count(db: Session, meeting_id: int) -> int:
+        return db.query(func.count(Utterance.position)).filter(Utterance.meeting == meeting_id).scalar()
+
+    @staticmethod
+    def get_window(db: Session, meeting_id: int, offset: int, limit: int) -> List[Utterance]:
+        """Utterances from `offset` (position), at most `limit` of them"""
+        return (
+            db.query(Utterance)
+            .filter(Utterance.meeting == meeting_id, Utterance.position >= offset)
+            .order_by(Utterance.position)
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def find(db: Session, meeting_id: int, term: str, limit: int = 100) -> List[int]:
+        """Positions of the utterances containing `term` (case-insensitive)"""
+        return [
+            position
+            for (position,) in db.query(Utterance.position)
+            .filter(Utterance.meeting == meeting_id, Utterance.text.ilike(_contains(term), escape="\\"))
+            .order_by(Utterance.position)
+            .limit(limit)
+        ]
+
+    @staticmethod
+    def get_speakers(db: Session, meeting_id: int) -> List[str]:
+        return [
+            speaker
+            for (speaker,) in db.query(Utterance.speaker)
+            .filter(Utterance.meeting == meeting_id)
+            .distinct()
+            .order_by(Utterance.speaker)
+        ]
+
+    @staticmethod
+    def next_for_speaker(db: Session, meeting_id: int, speaker: str, after: int) -> Optional[int]:
+        """Position of the next utterance of `speaker` after position `after`, wrapping to the first one"""
+        query = db.query(func.min(Utterance.position)).filter(
+            Utterance.meeting == meeting_id, Utterance.speaker == speaker
+        )
+        position = query.filter(Utterance.position > after).scalar()
+        return position if position is not None else query.scalar()
+
+
+class SearchChunkRepository:
+    @staticmethod
+    def get_rows(db: Session, meeting_id: Optional[int] = None) -> List[int]:
+        """Index rows of the chunks of a meeting (default: of every meeting)"""
+        query = db.query(SearchChunk.row)
+        if meeting_id is not None:
+            query = query.filter(SearchChunk.meeting == meeting_id)
+        return [row for (row,) in query.order_by(SearchChunk.row)]
+
+    @staticmethod
+    def replace(db: Session, meeting_id: int, rows: Sequence[int], texts: Sequence[str]) -> None:
+        """Replace the chunks of a meeting, without committing"""
+        db.query(SearchChunk).filter(SearchChunk.meeting == meeting_id).delete()
+        if rows:
+            db.execute(
+                insert(SearchChunk),
+                [
+                    {"row": row, "meeting": meeting_id, "position": position, "text": text}
+                    for position, (row, text) in enumerate(zip(rows, texts))
+                ],
+            )
+
+    @staticmethod
+    def next_row(db: Session) -> int:
+        """First index row after those of the chunks"""
+        last = db.query(func.max(SearchChunk.row)).scalar()
+        return 0 if last is None else last + 1
+
+    @staticmethod
+    def get_texts(db: Session, limit: int) -> List[Tuple[int, str]]:
+        """Row and text of the `limit` chunks with the highest rows"""
+        query = db.query(SearchChunk.row, SearchChunk.text).order_by(SearchChunk.row.desc()).limit(limit)
+        return [(row, text) for row, text in query]
+
+    @staticmethod
+    def iter_texts(db: Session, batch_size: int = 1000) -> Iterator[List[Tuple[int, str]]]:
+        """Row and text of every chunk, in batches of `batch_size`"""
+        query = select(SearchChunk.row, SearchChunk.text).order_by(SearchChunk.row)
+        for batch in db.execute(query.execution_options(yield_per=batch_size)).partitions():
+            yield [(row, text) for row, text in batch]
+
+    @staticmethod
+    def clear(db: Session) -> None:
+        db.query(SearchChunk).delete()
+        _save(db)
+
+    @staticmethod
+    def get_visible(db: Session, rows: Sequence[int]) -> Dict[int, SearchChunk]:
+        """Chunks at the given index rows whose meeting and transcript are not deleted, by row"""
+        return {
+            chunk.row: chunk
+            for chunk in db.query(SearchChunk)
+            .join(Meeting, Meeting.id == SearchChunk.meeting)
+            .join(Transcript, Transcript.meeting == SearchChunk.meeting)
+            .filter(SearchChunk.row.in_(rows), Meeting.deleted.is_(None), Transcript.deleted.is_(None))
+        }
+
+
+class LeaseRepository:
+    @staticmethod
+    def acquire(db: Session, name: str, owner: str, seconds: float) -> bool:
+        """
+        Take or renew the lease `name` for `seconds`; fails while another owner holds it unexpired.
+
+        Commits at once, so that other workers see the lease: not to be called inside a `unit_of_work`.
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        expires = now + timedelta(seconds=seconds)
+        updated = (
+            db.query(WorkerLease)
+            .filter(WorkerLease.name == name, or_(WorkerLease.owner == owner, WorkerLease.expires < now))
+            .update({"owner": owner, "expires": expires})
+        )
+        if not updated:
+            db.add(WorkerLease(name=name, owner=owner, expires=expires))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Held by another owner
+            db.rollback()
+            return False
+        return True
+
+    @staticmethod
+    def release(db: Session, name: str, owner: str) -> None:
+        """Let other workers take the lease `name` at once, if `owner` holds it."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        db.query(WorkerLease).filter(WorkerLease.name == name, WorkerLease.owner == owner).update({"expires": now})
+        db.commit()
+
+    @staticmethod
+    def get(db: Session, name: str) -> Optional[WorkerLease]:
+        return db.query(WorkerLease).filter(WorkerLease.name == name).first()
+
+
+class CallLedgerRepository:
+    @staticmethod
+    def rollup(db: Session, since: Optional[datetime] = None) -> List[CallRollup]:
+        """
+        Calls recorded since `since` (naive UTC; default: all), by operation.
+
+        Percentiles are computed in one statement with window functions: the durations of each operation are ranked,
+        and p50 and p95 are the smallest ones ranked at or above 50% and 95% of its calls.
+        """
+        ranked = select(
+            CallLedger.operation,
+            CallLedger.duration_ms,
+            CallLedger.outcome,
+            CallLedger.audio_seconds,
+            CallLedger.input_tokens,
+            CallLedger.output_tokens,
+            func.row_number()
+            .over(partition_by=CallLedger.operation, order_by=CallLedger.duration_ms)
+            .label("rank"),
+            func.count().over(partition_by=CallLedger.operation).label("total"),
+        )
+        if since is not None:
+            ranked = ranked.where(CallLedger.created >= since)
+        ranked = ranked.subquery()
+
+        def percentile(fraction: float):
+            return func.min(case((ranked.c.rank >= fraction * ranked.c.total, ranked.c.duration_ms)))
+
+        rows = db.execute(
+            select(
+                ranked.c.operation,
+                func.count(),
+                func.count(case((ranked.c.outcome != "ok", 1))),
+                percentile(0.5),
+                percentile(0.95),
+                func.max(ranked.c.duration_ms),
+                func.coalesce(func.sum(ranked.c.audio_seconds), 0),
+                func.coalesce(func.sum(ranked.c.input_tokens), 0),
+                func.coalesce(func.sum(ranked.c.output_tokens), 0),
+            )
+            .group_by(ranked.c.operation)
+            .order_by(ranked.c.operation)
+        )
+        return [CallRollup(*row) for row in rows]
+
+    @staticmethod
+    def recent_failures(db: Session, limit: int = 20) -> List[CallLedger]:
+        """Last failed calls, most recent first."""
+        return (
+            db.query(CallLedger)
+            .filter(CallLedger.outcome != "ok")
+            .order_by(CallLedger.created.desc(), CallLedger.id.desc())
+            .limit(limit)
+            .all()
+        )
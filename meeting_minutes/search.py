@@ -0,0 +1,588 @@
+"""
+Offline semantic search over meeting transcripts.
+
+Transcripts are split into chunks of a few utterances, each turned into a hashed TF-IDF vector: tokens are hashed
+into a fixed number of signed features (no vocabulary to maintain), term frequencies are dampened with `log1p` and
+rows are L2-normalised. Inverse document frequencies are applied to the query only, so adding or removing chunks
+never rewrites the vectors already stored.
+
+Vectors live in a memory-mapped `float32` matrix, one per database (see `index_folder`); the chunk text and
+meeting of each matrix row are kept in the `search_chunks` table. Queries are scored in batches, one block of
+rows at a time, so memory use does not depend on the index size.
+
+Several processes can write to an index (e.g. the interface and the sync worker): writers hold a file lock, and
+new chunks take rows after those of the index and of `search_chunks`. Index writes follow the transaction of the
+session: the vectors of replaced chunks are only cleared once it commits, and those of new chunks are cleared if
+it rolls back. When the matrix no longer matches `search_chunks` (index folder lost, moved, or from another
+database), it is restored from the chunk texts on opening.
+
+Transcript writes do not index anything themselves (see `schedule_indexing`): once they are committed, a background
+thread indexes the committed transcripts, so that vectorising and the index file lock stay off the write path. Call
+`wait_for_indexing` to search what was just written.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import Connection, Engine, event, make_url
+from sqlalchemy.orm import Session
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialised within a process
+    fcntl = None
+
+from .repository import SearchChunkRepository, TranscriptRepository
+
+DEFAULT_DIMENSIONS = 1024
+# Words per chunk; utterances are never split, so chunks may be slightly longer
+CHUNK_WORDS = 120
+# Rows scored at once by `SearchIndex.search`
+BLOCK_ROWS = 16384
+INITIAL_CAPACITY = 1024
+# Latest chunks whose vectors are compared with their text when an index is opened
+CHECKED_CHUNKS = 32
+
+_TOKEN = re.compile(r"\w\w+")
+_TRANSCRIPT_SPEAKER = re.compile(r"^\[Speaker [^\]]+\]\s*")
+
+
+@lru_cache(maxsize=65536)
+def _feature(token: str) -> Tuple[int, float]:
+    # Stable across processes, unlike `hash()`; the top bit gives the sign
+    digest = zlib.crc32(token.encode("utf-8"))
+    return digest & 0x7FFFFFFF, -1.0 if digest & 0x80000000 else 1.0
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def vectorize(texts: Sequence[str], dimensions: int = DEFAULT_DIMENSIONS) -> np.ndarray:
+    """Hashed, log-scaled and L2-normalised term frequency vectors, one row per text."""
+    rows, columns, signs = [], [], []
+    for i, text in enumerate(texts):
+        for token in tokenize(text):
+            index, sign = _feature(token)
+            rows.append(i)
+            columns.append(index % dimensions)
+            signs.append(sign)
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+    np.add.at(vectors, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), signs)
+    np.copysign(np.log1p(np.abs(vectors)), vectors, out=vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def chunk_transcript(transcript: str, words: int = CHUNK_WORDS) -> List[str]:
+    """
+    Split a formatted transcript (one `[Speaker X] text` utterance per paragraph) into chunks of about `words`
+    words. Plain text without speaker labels is split on words.
+    """
+    utterances = [_TRANSCRIPT_SPEAKER.sub("", line).strip() for line in transcript.splitlines()]
+    utterances = [utterance for utterance in utterances if utterance]
+    if len(utterances) == 1:
+        tokens = utterances[0].split()
+        utterances = [" ".join(tokens[i : i + words]) for i in range(0, len(tokens), words)]
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for utterance in utterances:
+        current.append(utterance)
+        size += len(utterance.split())
+        if size >= words:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class SearchIndex:
+    """
+    Growable matrix of chunk vectors with the document frequency of each feature.
+
+    Args:
+        folder: Where the index files live (`vectors.f32`, `df.npy`, `index.json`), `None` to keep it in memory.
+        dimensions: Number of hashed features, fixed when the index is created.
+    """
+
+    def __init__(self, folder: Optional[str], dimensions: int = DEFAULT_DIMENSIONS):
+        self.folder = folder
+        self.dimensions = dimensions
+        self.rows = 0
+        self.chunks = 0
+        # Incremented at every save, so that other processes reload the index
+        self.version = 0
+        self.df = np.zeros(dimensions, dtype=np.int64)
+        self._lock = threading.Lock()
+        self._writing = threading.local()
+        self._vectors = np.zeros((0, dimensions), dtype=np.float32)
+        if folder is not None:
+            os.makedirs(folder, exist_ok=True)
+            self._open()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    def _open(self) -> None:
+        if os.path.exists(self._path("index.json")):
+            with open(self._path("index.json"), encoding="utf-8") as file:
+                meta = json.load(file)
+            self.dimensions, self.rows, self.chunks = meta["dimensions"], meta["rows"], meta["chunks"]
+            self.version = meta.get("version", 0)
+            self.df = np.load(self._path("df.npy"))
+        path = self._path("vectors.f32")
+        capacity = os.path.getsize(path) // (4 * self.dimensions) if os.path.exists(path) else 0
+        self._map(max(capacity, self.rows, INITIAL_CAPACITY))
+
+    def _map(self, capacity: int) -> None:
+        path = self._path("vectors.f32")
+        self._vectors = None  # release the previous mapping before resizing the file
+        with open(path, "ab") as file:
+            file.truncate(capacity * 4 * self.dimensions)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions))
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self._vectors)
+        if rows <= capacity:
+            return
+        capacity = max(rows, 2 * capacity, INITIAL_CAPACITY)
+        if self.folder is None:
+            vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            vectors[: self.rows] = self._vectors[: self.rows]
+            self._vectors = vectors
+        else:
+            self._vectors.flush()
+            self._map(capacity)
+
+    def _save(self) -> None:
+        if self.folder is None:
+            return
+        self._vectors.flush()
+        self.version += 1
+        np.save(self._path("df.tmp.npy"), self.df)
+        os.replace(self._path("df.tmp.npy"), self._path("df.npy"))
+        with open(self._path("index.tmp.json"), "w", encoding="utf-8") as file:
+            meta = {"dimensions": self.dimensions, "rows": self.rows, "chunks": self.chunks, "version": self.version}
+            json.dump(meta, file)
+        os.replace(self._path("index.tmp.json"), self._path("index.json"))
+
+    def _refresh(self) -> None:
+        """Reload the index when another process saved it since it was loaded."""
+        if self.folder is None or not os.path.exists(self._path("index.json")):
+            return
+        with open(self._path("index.json"), encoding="utf-8") as file:
+            version = json.load(file).get("version", 0)
+        if version != self.version:
+            self._open()
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        """Lock on the index folder: exclusive for writers, shared for readers."""
+        if self.folder is None or fcntl is None:
+            yield
+            return
+        with open(self._path("lock"), "a") as file:
+            # Released when the file is closed
+            fcntl.flock(file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """
+        Hold the index for writing, against the other threads and processes, with what they wrote reloaded.
+        Can be nested.
+        """
+        if getattr(self._writing, "active", False):
+            yield
+            return
+        with self._file_lock(exclusive=True), self._lock:
+            self._writing.active = True
+            try:
+                self._refresh()
+                yield
+            finally:
+                self._writing.active = False
+
+    def add(self, texts: Sequence[str], start: int = 0) -> List[int]:
+        """Append the vectors of `texts`, from row `start` at least, and return their rows."""
+        vectors = vectorize(texts, self.dimensions)
+        with self.writing():
+            first = max(self.rows, start)
+            self._reserve(first + len(texts))
+            self._vectors[first : first + len(texts)] = vectors
+            self.rows = first + len(texts)
+            self.chunks += int(np.count_nonzero(np.any(vectors, axis=1)))
+            self.df += np.count_nonzero(vectors, axis=0)
+            self._save()
+        return list(range(first, first + len(texts)))
+
+    def remove(self, rows: Sequence[int]) -> None:
+        """Clear the vectors at `rows`; cleared rows never match and are reclaimed by `clear` + a full rebuild."""
+        with self.writing():
+            rows = np.asarray([row for row in rows if row < self.rows], dtype=np.intp)
+            if not len(rows):
+                return
+            self.df -= np.count_nonzero(self._vectors[rows], axis=0)
+            self.chunks -= int(np.count_nonzero(np.any(self._vectors[rows], axis=1)))
+            self._vectors[rows] = 0
+            self._save()
+
+    def matches(self, rows: Sequence[int], texts: Sequence[str]) -> bool:
+        """Whether the vectors at `rows` are those of `texts`."""
+        with self.writing():
+            if any(row >= self.rows for row in rows):
+                return False
+            stored = self._vectors[np.asarray(rows, dtype=np.intp)]
+            return bool(np.allclose(stored, vectorize(texts, self.dimensions), atol=1e-6))
+
+    def restore(self, chunks: Iterable[Sequence[Tuple[int, str]]], block_rows: int = BLOCK_ROWS) -> None:
+        """
+        Write the vectors of `chunks` (batches of `(row, text)` pairs) at their rows, then recount the document
+        frequencies. Other rows are left as they are: they may belong to chunks not committed yet.
+        """
+        with self.writing():
+            for batch in chunks:
+                rows = np.asarray([row for row, _ in batch], dtype=np.intp)
+                if not len(rows):
+                    continue
+                self._reserve(max(self.rows, int(rows.max()) + 1))
+                self._vectors[rows] = vectorize([text for _, text in batch], self.dimensions)
+                self.rows = max(self.rows, int(rows.max()) + 1)
+            self.chunks = 0
+            self.df = np.zeros(self.dimensions, dtype=np.int64)
+            for start in range(0, self.rows, block_rows):
+                block = np.asarray(self._vectors[start : min(start + block_rows, self.rows)])
+                self.chunks += int(np.count_nonzero(np.any(block, axis=1)))
+                self.df += np.count_nonzero(block, axis=0)
+            self._save()
+
+    def clear(self) -> None:
+        with self.writing():
+            self.rows = self.chunks = 0
+            self.df = np.zeros(self.dimensions, dtype=np.int64)
+            if self.folder is None:
+                self._vectors = np.zeros((0, self.dimensions), dtype=np.float32)
+            else:
+                self._map(0)
+                self._map(INITIAL_CAPACITY)
+            self._save()
+
+    def idf(self) -> np.ndarray:
+        return (np.log((1 + self.chunks) / (1 + self.df)) + 1).astype(np.float32)
+
+    def search(
+        self, queries: Sequence[str], k: int = 10, block_rows: int = BLOCK_ROWS
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Best `k` rows for each query, as `(row, score)` pairs sorted by decreasing score.
+
+        All queries are scored together against one block of `block_rows` rows at a time.
+        """
+        with self._file_lock(exclusive=False):
+            with self._lock:
+                self._refresh()
+                rows, vectors, idf = self.rows, self._vectors, self.idf()
+            return self._search(vectorize(queries, self.dimensions) * idf, vectors[:rows], k, block_rows)
+
+    @staticmethod
+    def _search(
+        weighted: np.ndarray, vectors: np.ndarray, k: int, block_rows: int
+    ) -> List[List[Tuple[int, float]]]:
+        best_rows = np.empty((len(weighted), 0), dtype=np.intp)
+        best_scores = np.empty((len(weighted), 0), dtype=np.float32)
+        rows = len(vectors)
+        for start in range(0, rows, block_rows):
+            block = np.asarray(vectors[start : min(start + block_rows, rows)])
+            scores = np.concatenate([best_scores, weighted @ block.T], axis=1)
+            candidates = np.concatenate(
+                [best_rows, np.broadcast_to(np.arange(start, start + len(block)), (len(weighted), len(block)))],
+                axis=1,
+            )
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                candidates = np.take_along_axis(candidates, keep, axis=1)
+            best_scores, best_rows = scores, candidates
+
+        results = []
+        for scores, candidates in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            results.append([(int(candidates[i]), float(scores[i])) for i in order if scores[i] > 0])
+        return results
+
+
+def index_folder(bind: Engine) -> Optional[str]:
+    """
+    Folder of the search index of a database, one per database: `<database>.index` next to a SQLite file, else a
+    folder named after the database in `SEARCH_INDEX_PATH` (default `data/search_index`), which holds the indexes
+    of SQLite databases too when it is set. In-memory SQLite databases get an in-memory index.
+    """
+    url = make_url(bind.url)
+    sqlite = url.get_backend_name() == "sqlite"
+    if sqlite and url.database in (None, "", ":memory:"):
+        return None
+    base = os.getenv("SEARCH_INDEX_PATH")
+    if sqlite and not base:
+        return f"{os.path.splitext(url.database)[0]}.index"
+    # A digest of the database location tells apart databases of the same name
+    location = os.path.abspath(url.database) if sqlite else url.render_as_string(hide_password=True)
+    name = re.sub(r"[^\w.-]", "_", os.path.splitext(os.path.basename(url.database or ""))[0]) or "database"
+    digest = hashlib.sha256(location.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(base or os.path.join("data", "search_index"), f"{name}-{digest}")
+
+
+# Indexes by folder, so that engines opened again on a database share its index; in-memory ones by engine
+_indexes: Dict[str, SearchIndex] = {}
+_memory_indexes: "weakref.WeakKeyDictionary[Engine, SearchIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+# Key of `Session.info` holding the index writes waiting for the end of the session's transaction
+_PENDING = "search_index_pending"
+# Key of `Session.info`, then of `Connection.info`, holding the meetings to index once their transcript is committed
+_TO_INDEX = "search_index_meetings"
+# Background indexing: one thread for every database, and its jobs not done yet by database and meeting
+_indexer: Optional[ThreadPoolExecutor] = None
+_jobs: Dict[Tuple[Engine, int], Future] = {}
+_jobs_lock = threading.Lock()
+# Engines whose connections index the meetings of their transaction once checked in
+_checkin_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def _engine(db: Session) -> Engine:
+    bind = db.get_bind()
+    # Sessions joined to a connection's transaction (write queue, batched uploads)
+    return bind.engine if isinstance(bind, Connection) else bind
+
+
+def get_search_index(db: Session) -> SearchIndex:
+    """
+    Search index of the database `db` is bound to, opened once per process, and restored from `search_chunks`
+    when it does not match them.
+    """
+    engine = _engine(db)
+    folder = index_folder(engine)
+    with _indexes_lock:
+        if folder is None:
+            if engine not in _memory_indexes:
+                _memory_indexes[engine] = SearchIndex(None)
+            return _memory_indexes[engine]
+        if folder not in _indexes:
+            index = SearchIndex(folder)
+            latest = SearchChunkRepository.get_texts(db, limit=CHECKED_CHUNKS)
+            if latest and not index.matches([row for row, _ in latest], [text for _, text in latest]):
+                print(f"Search index {folder} does not match the database: restoring it.")
+                index.restore(SearchChunkRepository.iter_texts(db))
+            _indexes[folder] = index
+        return _indexes[folder]
+
+
+def reset_search_indexes() -> None:
+    """Forget the indexes opened so far: they are opened (and checked) again on next use."""
+    with _indexes_lock:
+        _indexes.clear()
+        _memory_indexes.clear()
+
+
+def _after_commit(db: Session) -> None:
+    if db.in_nested_transaction():
+        return
+    for index, _, removed in db.info.get(_PENDING, []):
+        index.remove(removed)
+    meeting_ids = db.info.get(_TO_INDEX)
+    if meeting_ids:
+        bind = db.get_bind()
+        if isinstance(bind, Connection):
+            # Only a savepoint was released: the connection's owner commits the transaction before checking it in
+            bind.info.setdefault(_TO_INDEX, set()).update(meeting_ids)
+            _index_on_checkin(bind.engine)
+        else:
+            _submit(bind, meeting_ids)
+
+
+def _after_rollback(db: Session) -> None:
+    if db.in_nested_transaction():
+        return
+    for index, added, _ in db.info.get(_PENDING, []):
+        index.remove(added)
+
+
+def _after_transaction_end(db: Session, transaction) -> None:
+    if transaction.parent is None:
+        # Also ends sessions closed without committing: their new rows are left unused
+        db.info[_PENDING] = []
+        db.info[_TO_INDEX] = set()
+
+
+def _listen(db: Session) -> None:
+    if _PENDING not in db.info:
+        event.listen(db, "after_commit", _after_commit)
+        event.listen(db, "after_rollback", _after_rollback)
+        event.listen(db, "after_transaction_end", _after_transaction_end)
+        db.info[_PENDING] = []
+        db.info[_TO_INDEX] = set()
+
+
+def _defer(db: Session, index: SearchIndex, added: Sequence[int], removed: Sequence[int]) -> None:
+    """Clear the rows `removed` once the transaction of `db` commits, or the rows `added` if it rolls back."""
+    _listen(db)
+    db.info[_PENDING].append((index, list(added), list(removed)))
+
+
+def _index_on_checkin(engine: Engine) -> None:
+    """Index the meetings left in the info of the connections of `engine` once they are checked in, committed."""
+    with _jobs_lock:
+        if engine in _checkin_engines:
+            return
+        _checkin_engines.add(engine)
+
+    def checkin(dbapi_connection, connection_record) -> None:
+        meeting_ids = connection_record.info.pop(_TO_INDEX, None)
+        if meeting_ids:
+            _submit(engine, meeting_ids)
+
+    event.listen(engine, "checkin", checkin)
+
+
+def _submit(engine: Engine, meeting_ids: Iterable[int]) -> None:
+    """Queue the indexing of the committed transcripts of `meeting_ids`, unless it is queued and not started yet."""
+    global _indexer
+    with _jobs_lock:
+        if _indexer is None:
+            _indexer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-indexer")
+        for meeting_id in meeting_ids:
+            key = (engine, meeting_id)
+            job = _jobs.get(key)
+            if job is not None and not job.running() and not job.done():
+                # It starts after this commit, so it indexes what was just written
+                continue
+            job = _jobs[key] = _indexer.submit(_index_committed, engine, meeting_id)
+            job.add_done_callback(lambda done, key=key: _forget(key, done))
+
+
+def _forget(key: Tuple[Engine, int], job: Future) -> None:
+    with _jobs_lock:
+        if _jobs.get(key) is job:
+            del _jobs[key]
+
+
+def wait_for_indexing() -> None:
+    """Wait until the transcripts committed so far are indexed."""
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    wait(jobs)
+
+
+def _begin_write(db: Session) -> None:
+    connection = db.connection()
+    if connection.dialect.name == "sqlite":
+        # Write lock first: a transaction upgrading from reads would fail at once while another writes
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _index_committed(engine: Engine, meeting_id: int) -> None:
+    """
+    Index the committed transcript of a meeting. Its vectors are added outside of any transaction, then its chunk
+    rows are committed, unless the transcript changed meanwhile: the job of that change indexes it.
+    """
+    try:
+        with Session(bind=engine) as db:
+            stored = TranscriptRepository.get_transcript(db, meeting_id)
+            if stored is None or stored.deleted is not None:
+                return
+            transcript = stored.transcript or stored.text or ""
+            index = get_search_index(db)
+            texts = chunk_transcript(transcript)
+            start = SearchChunkRepository.next_row(db)
+            db.rollback()
+            rows = index.add(texts, start) if texts else []
+            _defer(db, index, rows, [])
+            _begin_write(db)
+            stored = TranscriptRepository.get_transcript(db, meeting_id)
+            if stored is None or stored.deleted is not None or (stored.transcript or stored.text or "") != transcript:
+                db.rollback()
+                return
+            _defer(db, index, [], SearchChunkRepository.get_rows(db, meeting_id))
+            SearchChunkRepository.replace(db, meeting_id, rows, texts)
+            db.commit()
+    except Exception as e:
+        print(f"Failed to index the transcript of meeting {meeting_id}: {e}")
+
+
+def schedule_indexing(db: Session, meeting_id: int, transcript: str) -> None:
+    """
+    Index the transcript of a meeting once the transaction of `db` commits, in the background. In-memory databases,
+    private to this process and its threads, are indexed at once instead.
+    """
+    if index_folder(_engine(db)) is None:
+        index_transcript(db, meeting_id, transcript)
+        return
+    _listen(db)
+    db.info[_TO_INDEX].add(meeting_id)
+
+
+def index_transcript(db: Session, meeting_id: int, transcript: str) -> int:
+    """Replace the chunks of a meeting in the index; the chunk rows are committed by the caller."""
+    index = get_search_index(db)
+    texts = chunk_transcript(transcript)
+    rows: List[int] = []
+    if texts:
+        with index.writing():
+            rows = index.add(texts, SearchChunkRepository.next_row(db))
+    _defer(db, index, rows, SearchChunkRepository.get_rows(db, meeting_id))
+    SearchChunkRepository.replace(db, meeting_id, rows, texts)
+    return len(texts)
+
+
+def remove_meeting(db: Session, meeting_id: int) -> None:
+    """Drop the chunks of a meeting from the index; the chunk rows are committed by the caller."""
+    _defer(db, get_search_index(db), [], SearchChunkRepository.get_rows(db, meeting_id))
+    SearchChunkRepository.replace(db, meeting_id, [], [])
+
+
+def rebuild_index(db: Session) -> int:
+    """Index every transcript from scratch, reclaiming the rows of removed chunks."""
+    index = get_search_index(db)
+    SearchChunkRepository.clear(db)
+    index.clear()
+    count = 0
+    for meeting_id, transcript in TranscriptRepository.get_all(db).items():
+        count += index_transcript(db, meeting_id, transcript.transcript or transcript.text or "")
+        db.commit()
+    return count
+
+
+@dataclass
+class SearchHit:
+    meeting: int
+    position: int
+    text: str
+    score: float
+
+
+def search_meetings(db: Session, questions: Sequence[str], k: int = 10) -> List[List[SearchHit]]:
+    """Best `k` chunks of non-deleted meetings for each question."""
+    # Oversample: chunks of deleted meetings or transcripts are filtered out afterwards
+    results = get_search_index(db).search(questions, 4 * k)
+    chunks = SearchChunkRepository.get_visible(db, sorted({row for result in results for row, _ in result}))
+    return [
+        [
+            SearchHit(chunks[row].meeting, chunks[row].position, chunks[row].text, score)
+            for row, score in result
+            if row in chunks
+        ][:k]
+        for result in results
+    ]
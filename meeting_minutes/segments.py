@@ -0,0 +1,165 @@
+"""
+Stitching of the transcripts of overlapping audio segments (see `audio.split_mp3`) into one transcript.
+
+Each segment is diarized on its own, so its speaker labels only mean something within the segment. Labels are
+matched across two consecutive segments by how long their utterances coincide in the audio both segments cover;
+speakers of a segment without counterpart in the previous one get new labels.
+"""
+
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .audio import AudioSegment
+
+
+@dataclass
+class StitchedWord:
+    text: str
+    start: int
+    end: int
+
+
+@dataclass
+class StitchedUtterance:
+    speaker: str
+    start: int
+    end: int
+    text: str
+    words: Optional[List[StitchedWord]] = None
+
+
+@dataclass
+class StitchedTranscript:
+    """Transcript of a recording transcribed in segments, with the attributes of an AssemblyAI transcript used here."""
+
+    id: str
+    segment_ids: List[str]
+    utterances: List[StitchedUtterance] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return " ".join(utterance.text for utterance in self.utterances)
+
+
+def _speaker_labels() -> Iterator[str]:
+    """A, B, ..., Z, AA, AB, ... as AssemblyAI labels speakers."""
+    for length in count(1):
+        for number in range(26**length):
+            label = ""
+            for _ in range(length):
+                number, letter = divmod(number, 26)
+                label = chr(ord("A") + letter) + label
+            yield label
+
+
+def _match_speakers(
+    previous: Sequence[StitchedUtterance], current: Sequence[StitchedUtterance], start_ms: int, end_ms: int
+) -> Dict[str, str]:
+    """
+    Labels of the previous segment for the speakers of the current one, from the time their utterances coincide
+    between `start_ms` and `end_ms`. Greedy one-to-one matching, longest coincidence first.
+    """
+    coincidence: Dict[tuple, int] = {}
+    for ours in current:
+        for theirs in previous:
+            overlap = min(ours.end, theirs.end, end_ms) - max(ours.start, theirs.start, start_ms)
+            if overlap > 0:
+                key = (ours.speaker, theirs.speaker)
+                coincidence[key] = coincidence.get(key, 0) + overlap
+    mapping: Dict[str, str] = {}
+    for (ours, theirs), _ in sorted(coincidence.items(), key=lambda item: item[1], reverse=True):
+        if ours not in mapping and theirs not in mapping.values():
+            mapping[ours] = theirs
+    return mapping
+
+
+def _side_of_cut(utterance: StitchedUtterance, cut: int, before: bool) -> Optional[StitchedUtterance]:
+    """
+    Part of an utterance kept on one side of `cut`: before it (`before`), or from it on. An utterance crossing
+    `cut` is split by the start of its words; without words, it stays whole on the earlier side.
+    """
+    if utterance.start >= cut:
+        return None if before else utterance
+    if utterance.end <= cut:
+        return utterance if before else None
+    if not utterance.words:
+        return utterance if before else None
+    words = [word for word in utterance.words if (word.start < cut) == before]
+    if not words:
+        return None
+    text = " ".join(word.text for word in words)
+    return StitchedUtterance(utterance.speaker, words[0].start, words[-1].end, text, words)
+
+
+def stitch_transcripts(segments: Sequence[AudioSegment], transcripts: Sequence[Any]) -> StitchedTranscript:
+    """
+    Join the transcripts of consecutive overlapping segments.
+
+    Timestamps are shifted by the start of their segment. Within the audio two segments share, the transcript
+    switches from one to the other at the first utterance of the later segment starting after the middle of the
+    shared audio that no utterance of the earlier segment crosses. When each of them is crossed, utterances
+    crossing the first one are split between both sides by the start of their words, so that no word is kept
+    twice; those without words stay whole in the earlier segment's part, and the later one resumes after them.
+
+    Args:
+        segments: The segments, in order.
+        transcripts: Their AssemblyAI transcripts (`id`, `utterances` with `speaker`, `start`, `end`, `text`, and
+            optionally `words`).
+
+    Returns:
+        A transcript identified by the ID of the first segment's transcript.
+    """
+    stitched = StitchedTranscript(id=transcripts[0].id, segment_ids=[transcript.id for transcript in transcripts])
+    labels = _speaker_labels()
+    used: set = set()
+    previous: List[StitchedUtterance] = []
+    previous_segment: Optional[AudioSegment] = None
+
+    for segment, transcript in zip(segments, transcripts):
+        utterances = [
+            StitchedUtterance(
+                str(utterance.speaker),
+                utterance.start + segment.start_ms,
+                utterance.end + segment.start_ms,
+                utterance.text,
+                [
+                    StitchedWord(word.text, word.start + segment.start_ms, word.end + segment.start_ms)
+                    for word in utterance.words
+                ]
+                if getattr(utterance, "words", None)
+                else None,
+            )
+            for utterance in transcript.utterances or []
+        ]
+        if previous_segment is None:
+            mapping = {utterance.speaker: utterance.speaker for utterance in utterances}
+            cut = resume = segment.start_ms
+        else:
+            mapping = _match_speakers(previous, utterances, segment.start_ms, previous_segment.end_ms)
+            middle = (segment.start_ms + previous_segment.end_ms) / 2
+            starts = [utterance.start for utterance in utterances if utterance.start >= middle]
+            if not starts:
+                # Nothing starts in the second half of the shared audio: the previous segment covers this one
+                continue
+            # Preferably where no utterance of the previous segment is still running
+            running = [utterance for utterance in previous if utterance.end > middle]
+            cut = next((start for start in starts if not any(u.start < start < u.end for u in running)), starts[0])
+            stitched.utterances = [
+                part for utterance in stitched.utterances if (part := _side_of_cut(utterance, cut, before=True))
+            ]
+            # Utterances without words kept whole across the cut cover the start of this segment's part
+            resume = max([cut] + [u.end for u in stitched.utterances if u.end > cut and not u.words])
+        for utterance in utterances:
+            if utterance.speaker not in mapping:
+                mapping[utterance.speaker] = next(label for label in labels if label not in used)
+            utterance.speaker = mapping[utterance.speaker]
+            used.add(utterance.speaker)
+        stitched.utterances.extend(
+            part
+            for utterance in utterances
+            if (part := _side_of_cut(utterance, cut, before=False)) and part.start >= resume
+        )
+        previous, previous_segment = utterances, segment
+
+    return stitched
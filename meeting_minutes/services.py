@@ -1,23 +1,327 @@
+import hashlib
+import io
 import os
-from typing import BinaryIO, Dict, Optional, Tuple, Union
+import re
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 from datetime import date, datetime, timezone
-import assemblyai as aai
+from urllib.parse import parse_qs, urlencode, urlparse
+from sqlalchemy.orm import Session
+from .analytics import compute_speaker_stats
+from .audio import CHUNK_SIZE, AudioSegment, HashingReader, hash_stream, open_audio, split_mp3
+from .database import SessionLocal
+from .ledger import LedgerWriter, get_ledger, transcript_fields
 from .models import Meeting
-from .repository import MeetingRepository, TranscriptRepository
+from .repository import (
+    MeetingRepository,
+    QueryRepository,
+    SpeakerStatsRepository,
+    TranscriptRepository,
+    UtteranceRepository,
+    unit_of_work,
+)
+from .segments import StitchedTranscript, stitch_transcripts
+from .workspaces import DEFAULT_WORKSPACE
+from .write_queue import write
+from .sync import get_sync_flight, sync_key
+
+if TYPE_CHECKING:
+    import assemblyai as aai
+    from sqlalchemy import Engine
+    from .transport import ResilientTransport
+
+T = TypeVar("T")
+
+DEFAULT_BASE_URL = "https://api.eu.assemblyai.com"
+DEFAULT_BACKFILL_WORKERS = 8
+# `audio_url` of the transcripts whose audio was deleted
+DELETED_AUDIO_URL = "http://deleted_by_user"
+# Header carrying `ASSEMBLYAI_WEBHOOK_SECRET` in the webhook calls
+WEBHOOK_AUTH_HEADER = "X-Webhook-Secret"
+# Seconds between status polls of the SDK, and when webhooks deliver completions
+DEFAULT_POLLING_INTERVAL = 3.0
+WEBHOOK_POLLING_INTERVAL = 60.0
+# Transcript statuses still waiting for a result
+PENDING_STATUSES = ("queued", "processing")
+# Recordings transcribed in segments (`ASSEMBLYAI_SEGMENT_MINUTES`): overlap and concurrent transcriptions
+DEFAULT_SEGMENT_OVERLAP_SECONDS = 30
+DEFAULT_SEGMENT_WORKERS = 4
+# Files of a multi-file upload transcribed concurrently, and meetings stored per transaction
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_UPLOAD_BATCH_SIZE = 10
+# Seconds between progress reports of a multi-file upload
+PROGRESS_INTERVAL = 0.5
+# Meetings merged per transaction by a remote sync, their missing transcripts fetched beforehand
+SYNC_BATCH_SIZE = 20
+# Drafted meetings waited for concurrently, without webhooks, until their final transcript replaces the draft
+DEFAULT_FINALIZE_WORKERS = 4
+
+# Line of a transcript formatted by `TranscriptionService.format_transcript`
+_TRANSCRIPT_LINE = re.compile(r"^\[Speaker (?P<speaker>[^\]]*)\] (?P<text>.*)$")
+
+
+_assemblyai = None
+_http_transport: Optional["ResilientTransport"] = None
+_assemblyai_lock = threading.RLock()
+_finalizer: Optional[ThreadPoolExecutor] = None
+
+
+def get_http_transport() -> "ResilientTransport":
+    """Process-wide transport of the AssemblyAI calls, configured from the environment."""
+    global _http_transport
+    from .transport import ResilientTransport
+
+    with _assemblyai_lock:
+        if _http_transport is None:
+            _http_transport = ResilientTransport(
+                max_connections=int(os.getenv("ASSEMBLYAI_MAX_CONNECTIONS", 20)),
+                max_retries=int(os.getenv("ASSEMBLYAI_MAX_RETRIES", 5)),
+                backoff_base=float(os.getenv("ASSEMBLYAI_BACKOFF_BASE", 0.5)),
+            )
+        return _http_transport
+
+
+def get_assemblyai():
+    """
+    Import the AssemblyAI SDK and configure it from the environment, once per process.
+
+    The SDK is heavy to import, so it is only loaded on the first remote call. Every SDK call goes through the
+    default client, whose HTTP client is replaced by one using the shared `ResilientTransport`.
+    """
+    global _assemblyai
+    if _assemblyai is not None:
+        return _assemblyai
+    with _assemblyai_lock:
+        if _assemblyai is None:
+            _assemblyai = _configure_assemblyai()
+        return _assemblyai
+
+
+def reset_assemblyai() -> None:
+    """Forget the SDK configuration and transport, so that the next call reads the environment again."""
+    global _assemblyai, _http_transport
+    with _assemblyai_lock:
+        if _http_transport is not None:
+            _http_transport.close()
+        _assemblyai = _http_transport = None
+
+
+def _configure_assemblyai():
+    import assemblyai as aai
+    import httpx
+
+    aai.settings.api_key = os.getenv("ASSEMBLYAI_API_KEY")
+    aai.settings.base_url = os.getenv("ASSEMBLYAI_BASE_URL", DEFAULT_BASE_URL)
+    # With webhooks, polling is only a fallback
+    aai.settings.polling_interval = float(
+        os.getenv(
+            "ASSEMBLYAI_POLLING_INTERVAL", WEBHOOK_POLLING_INTERVAL if webhooks_enabled() else DEFAULT_POLLING_INTERVAL
+        )
+    )
+    if aai.settings.api_key:
+        client = aai.Client.get_default()
+        sdk_http_client = client.http_client
+        client._http_client = httpx.Client(
+            base_url=sdk_http_client.base_url,
+            headers=sdk_http_client.headers,
+            timeout=sdk_http_client.timeout,
+            event_hooks=sdk_http_client.event_hooks,
+            transport=get_http_transport(),
+        )
+        sdk_http_client.close()
+    return aai
+
+
+def webhooks_enabled() -> bool:
+    """Whether AssemblyAI reports completed transcripts to `ASSEMBLYAI_WEBHOOK_URL`."""
+    return bool(os.getenv("ASSEMBLYAI_WEBHOOK_URL"))
+
+
+def tiered_enabled() -> bool:
+    """Whether uploads get a fast draft transcript first, replaced by the best-model one (`ASSEMBLYAI_TIERED`)."""
+    return os.getenv("ASSEMBLYAI_TIERED", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def import_remote_enabled() -> bool:
+    """
+    Whether remote syncs and webhooks of the default workspace create meetings for the transcripts only found on
+    AssemblyAI, e.g. after losing the database (`ASSEMBLYAI_IMPORT_REMOTE`, on by default).
+    """
+    return os.getenv("ASSEMBLYAI_IMPORT_REMOTE", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def submitted_workspace(transcript: "aai.Transcript") -> str:
+    """Workspace a transcript was submitted from, given to its webhook (see `TranscriptionService._config`)."""
+    webhook_url = (transcript.json_response or {}).get("webhook_url") or ""
+    return parse_qs(urlparse(webhook_url).query).get("workspace", [DEFAULT_WORKSPACE])[0]
+
+
+def get_finalizer() -> ThreadPoolExecutor:
+    """Process-wide threads replacing drafts by their final transcripts (`ASSEMBLYAI_FINALIZE_WORKERS`)."""
+    global _finalizer
+    with _assemblyai_lock:
+        if _finalizer is None:
+            _finalizer = ThreadPoolExecutor(
+                max_workers=int(os.getenv("ASSEMBLYAI_FINALIZE_WORKERS", DEFAULT_FINALIZE_WORKERS)),
+                thread_name_prefix="finalize",
+            )
+        return _finalizer
+
+
+def finalize_transcript(
+    engine: "Engine", remote_id: str, transcription_service: Optional["TranscriptionService"] = None
+) -> Optional[int]:
+    """
+    Wait for the final transcript `remote_id` of a drafted meeting, and replace the draft with it.
+
+    Returns:
+        The meeting ID, None when the meeting is no longer in the database.
+    """
+    transcription_service = transcription_service or get_transcription_service()
+    transcript = transcription_service.wait_for_transcript(remote_id)
+    with SessionLocal(bind=engine) as db:
+        meeting = MeetingService(db, transcription_service).complete_transcription(transcript)
+        return meeting.id if meeting else None
+
+
+def segment_duration_ms() -> Optional[int]:
+    """Length of the segments long MP3 recordings are split into, when `ASSEMBLYAI_SEGMENT_MINUTES` is set."""
+    minutes = os.getenv("ASSEMBLYAI_SEGMENT_MINUTES")
+    return int(float(minutes) * 60_000) if minutes else None
+
+
+@lru_cache(maxsize=1)
+def get_transcription_service() -> "TranscriptionService":
+    """Process-wide `TranscriptionService` instance, recording its calls in the call ledger (unless disabled)."""
+    return TranscriptionService(ledger=get_ledger())
+
+
+@dataclass
+class MeetingUpload:
+    """
+    An audio file to transcribe as a meeting, and where `MeetingService.transcribe_meetings` is with it.
+
+    `status` goes from "pending" to "transcribing", "storing", then "stored"; or to "duplicate" when the audio was
+    already transcribed (`meeting_id` is then that meeting), or "failed" (with an `error`).
+    """
+
+    file: str | BinaryIO
+    name: str
+    date: Optional[date] = None
+    status: str = "pending"
+    meeting_id: Optional[int] = None
+    error: Optional[str] = None
+    content_hash: Optional[str] = None
+    # Seconds from the start of the upload until its first transcript was stored, and whether it is a draft
+    seconds: Optional[float] = None
+    draft: bool = False
+
+
+@dataclass
+class DraftTranscript:
+    """
+    Fast transcript of a recording whose best-model transcription (`final`) is still running, with the attributes
+    of an AssemblyAI transcript used here: ID and status of the final transcript, text and utterances of the draft.
+    """
+
+    draft: "aai.Transcript"
+    final: "aai.Transcript"
+
+    @property
+    def id(self) -> str:
+        return self.final.id
+
+    @property
+    def status(self) -> "aai.TranscriptStatus":
+        return self.final.status
+
+    @property
+    def text(self) -> Optional[str]:
+        return self.draft.text
+
+    @property
+    def utterances(self) -> Optional[List["aai.Utterance"]]:
+        return self.draft.utterances
 
 
 class MeetingService:
-    def __init__(self, db_session):
+    def __init__(
+        self,
+        db_session,
+        transcription_service: Optional["TranscriptionService"] = None,
+        checkpoint: Optional[Callable[[], None]] = None,
+    ):
         self.db = db_session
-        aai.settings.api_key = os.getenv("ASSEMBLYAI_API_KEY")
-        aai.settings.base_url = os.getenv("ASSEMBLYAI_BASE_URL", "https://api.eu.assemblyai.com")
+        self.transcription_service = transcription_service or get_transcription_service()
+        # Called between the steps of remote syncs and pending refreshes; raising aborts them
+        self.checkpoint = checkpoint or (lambda: None)
+        # Background replacements of the drafts stored by this service (see `finalize_transcript`)
+        self.finalizations: List["Future[Optional[int]]"] = []
+
+    @property
+    def workspace(self) -> Optional[str]:
+        """Workspace of the session (see `workspaces.get_workspace_db`), given to the webhook with submissions."""
+        return self.db.info.get("workspace")
+
+    @property
+    def imports_remote(self) -> bool:
+        """
+        Whether transcripts only found on AssemblyAI get a meeting in this database. Only the default workspace
+        imports them (see `import_remote_enabled`): the AssemblyAI account is shared by every workspace, so the
+        others only merge the transcripts of their own meetings.
+        """
+        return self.workspace in (None, DEFAULT_WORKSPACE) and import_remote_enabled()
+
+    def _owns(self, transcript: "aai.Transcript") -> bool:
+        """Whether a transcript this database does not know can be imported into it."""
+        return self.imports_remote and submitted_workspace(transcript) == DEFAULT_WORKSPACE
+
+    def _write(self, operation: Callable[["MeetingService"], T]) -> T:
+        """
+        Run the write `operation` on a service bound to the session it gets (see `write_queue.write`): this one,
+        or a session of the write queue with `DB_WRITE_QUEUE`, given this one's workspace. Objects of this session
+        are then expired, so that they are reloaded with what the queue wrote.
+        """
+        queued = False
+
+        def run(db: Session) -> T:
+            nonlocal queued
+            queued = db is not self.db
+            if not queued:
+                return operation(self)
+            if self.workspace is not None:
+                db.info["workspace"] = self.workspace
+            return operation(MeetingService(db, self.transcription_service))
+
+        result = write(self.db, run)
+        if queued:
+            self.db.expire_all()
+        return result
 
     def transcribe_meeting(
         self,
         uploaded_file: str | BinaryIO,
         meeting_name: str,
         meeting_date: Optional[date] = None,
-    ) -> str:
+    ) -> Optional[int]:
         """
         Transcribe an audio file and store the meeting in the database.
 
@@ -26,61 +330,442 @@ class MeetingService:
             meeting_name: Name of the meeting.
             meeting_date: Optional date or tuple of dates for the meeting.
 
+        The audio is hashed while it is uploaded; when a meeting was already transcribed from the same audio,
+        its ID is returned without transcribing the audio again.
+
+        With `ASSEMBLYAI_SEGMENT_MINUTES` set, MP3 recordings longer than that are split into overlapping segments
+        transcribed concurrently, then stitched back together (see `segments.stitch_transcripts`).
+
+        With `ASSEMBLYAI_TIERED` set, other recordings are stored with a fast draft transcript, replaced by the
+        best-model transcript once it completes (see `finalize_transcript`).
+
         Returns:
-            The ID of the transcribed meeting.
+            The ID of the transcribed meeting, None when the transcription failed.
         """
-        transcript = TranscriptionService().transcribe_audio(uploaded_file)
-        if not transcript.id or not transcript.text:
+        started = time.perf_counter()
+        with open_audio(uploaded_file) as stream:
+            if segments := self._split_audio(stream):
+                start = stream.tell()
+                content_hash = hash_stream(stream)
+                stream.seek(start)
+                if duplicate := MeetingRepository.get_by_content_hash(self.db, content_hash):
+                    print(f"Audio already transcribed as meeting {duplicate.id}.")
+                    return duplicate.id
+                transcript = self._transcribe_segments(stream, segments)
+            else:
+                audio = HashingReader(stream)
+                upload_url = self.transcription_service.upload_audio(audio)
+                content_hash = audio.hexdigest()
+                if duplicate := MeetingRepository.get_by_content_hash(self.db, content_hash):
+                    print(f"Audio already transcribed as meeting {duplicate.id}.")
+                    return duplicate.id
+                transcript = self._transcribe_upload(upload_url)
+        if transcript is None:
             print("Transcription failed.")
-            return ""
-
-        meeting_id: str = transcript.id
-
-        # Store the meeting in the database
-        meeting = Meeting(
-            id=meeting_id,
-            name=meeting_name,
-            date=meeting_date,
-            created=datetime.now(timezone.utc),
-            status="transcribed",
-            deleted=None,
-        )
-        self.db.add(meeting)
+            return None
+        meeting_id = self._store_meeting(transcript, meeting_name, meeting_date, content_hash)
+        self._finalize_later(transcript)
+        kind = "draft" if isinstance(transcript, DraftTranscript) else "transcript"
+        print(f"First {kind} of meeting {meeting_id} stored after {time.perf_counter() - started:.1f}s.")
+        return meeting_id
+
+    def transcribe_meetings(
+        self,
+        uploads: Sequence["MeetingUpload"],
+        max_workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        on_progress: Optional[Callable[["MeetingUpload"], None]] = None,
+    ) -> List["MeetingUpload"]:
+        """
+        Transcribe several audio files concurrently and store their meetings, a batch of meetings per transaction.
+
+        Files are hashed first, from the calling thread: those already transcribed, or repeated in `uploads`, are
+        not sent. The others are uploaded and transcribed by `max_workers` threads (`UPLOAD_WORKERS`), which do
+        not use the database session; their meetings are stored from the calling thread, `batch_size`
+        (`UPLOAD_BATCH_SIZE`) per commit, as they complete.
+
+        Args:
+            uploads: The files, with their meeting name and date. Their `status`, `meeting_id`, `error`, `seconds`
+                and `draft` are updated in place.
+            on_progress: Called from the calling thread with an upload whenever its status changes.
+
+        Returns:
+            `uploads`.
+        """
+        started = time.perf_counter()
+        max_workers = max_workers or int(os.getenv("UPLOAD_WORKERS", DEFAULT_UPLOAD_WORKERS))
+        batch_size = batch_size or int(os.getenv("UPLOAD_BATCH_SIZE", DEFAULT_UPLOAD_BATCH_SIZE))
+        notify = on_progress or (lambda upload: None)
+
+        def update(upload: MeetingUpload, status: str, **fields: Any) -> None:
+            upload.status = status
+            for name, value in fields.items():
+                setattr(upload, name, value)
+            notify(upload)
+
+        # Hash every file, and only send those whose audio is new
+        to_send: List[MeetingUpload] = []
+        repeated: List[Tuple[MeetingUpload, MeetingUpload]] = []
+        first_by_hash: Dict[str, MeetingUpload] = {}
+        for upload in uploads:
+            try:
+                with open_audio(upload.file) as stream:
+                    start = stream.tell()
+                    upload.content_hash = hash_stream(stream)
+                    stream.seek(start)
+            except OSError as e:
+                update(upload, "failed", error=str(e))
+                continue
+            if upload.content_hash in first_by_hash:
+                repeated.append((upload, first_by_hash[upload.content_hash]))
+            elif duplicate := MeetingRepository.get_by_content_hash(self.db, upload.content_hash):
+                update(upload, "duplicate", meeting_id=duplicate.id)
+            else:
+                first_by_hash[upload.content_hash] = upload
+                to_send.append(upload)
+        # The batches are written through other connections: do not hold this session's transaction meanwhile
         self.db.commit()
 
-        # Store the transcript in the database
-        transcript_text = TranscriptionService.format_transcript(transcript)
+        def transcribe(upload: MeetingUpload) -> Union["aai.Transcript", StitchedTranscript, None]:
+            upload.status = "transcribing"  # reported by the calling thread
+            with open_audio(upload.file) as stream:
+                if segments := self._split_audio(stream):
+                    return self._transcribe_segments(stream, segments)
+                return self._transcribe_upload(self.transcription_service.upload_audio(stream))
+
+        transcribed: List[Tuple[MeetingUpload, Union["aai.Transcript", StitchedTranscript]]] = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(transcribe, upload): upload for upload in to_send}
+            reported = {id(upload): upload.status for upload in to_send}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in pending:
+                    upload = futures[future]
+                    if upload.status != reported[id(upload)]:
+                        reported[id(upload)] = upload.status
+                        notify(upload)
+                for future in done:
+                    upload = futures[future]
+                    try:
+                        transcript = future.result()
+                    except Exception as e:
+                        update(upload, "failed", error=str(e))
+                        continue
+                    if transcript is None:
+                        update(upload, "failed", error="Transcription failed")
+                        continue
+                    update(upload, "storing")
+                    transcribed.append((upload, transcript))
+                while len(transcribed) >= batch_size or (transcribed and not pending):
+                    self._store_meetings(transcribed[:batch_size], update, started)
+                    transcribed = transcribed[batch_size:]
+
+        for upload, first in repeated:
+            if first.meeting_id is not None:
+                update(upload, "duplicate", meeting_id=first.meeting_id)
+            else:
+                update(upload, "failed", error=first.error)
+        self.db.expire_all()
+        return list(uploads)
+
+    def _store_meetings(
+        self,
+        transcribed: Sequence[Tuple["MeetingUpload", Union["aai.Transcript", StitchedTranscript, DraftTranscript]]],
+        update: Callable[..., None],
+        started: float,
+    ) -> None:
+        """
+        Store transcribed uploads in one transaction.
+
+        As in the write queue, each meeting is stored by a session joined to the transaction with a savepoint:
+        the commit of `_store_meeting` only releases it, and a meeting failing to be stored is rolled back alone.
+        """
+        stored: List[Tuple[MeetingUpload, int, Union["aai.Transcript", StitchedTranscript, DraftTranscript]]] = []
+        try:
+            with self.db.get_bind().connect() as conn:
+                with conn.begin():
+                    for upload, transcript in transcribed:
+                        with Session(bind=conn, join_transaction_mode="create_savepoint") as db:
+                            try:
+                                meeting_id = MeetingService(db, self.transcription_service)._store_meeting(
+                                    transcript, upload.name, upload.date, upload.content_hash
+                                )
+                            except Exception as e:
+                                db.rollback()
+                                update(upload, "failed", error=str(e))
+                            else:
+                                stored.append((upload, meeting_id, transcript))
+        except Exception as e:
+            # The batch could not be committed: none of its meetings were stored
+            for upload, _, _ in stored:
+                update(upload, "failed", error=str(e))
+            return
+        seconds = time.perf_counter() - started
+        for upload, meeting_id, transcript in stored:
+            self._finalize_later(transcript)
+            drafted = isinstance(transcript, DraftTranscript)
+            update(upload, "stored", meeting_id=meeting_id, seconds=seconds, draft=drafted)
+
+    def _transcribe_upload(self, upload_url: str) -> Union["aai.Transcript", DraftTranscript, None]:
+        """Transcript of uploaded audio (only submitted with webhooks, a draft in tiered mode); None when it failed."""
+        if tiered_enabled():
+            return self._transcribe_tiered(upload_url)
+        if webhooks_enabled():
+            # The transcript is stored when the webhook reports its completion
+            transcript = self.transcription_service.submit_audio(upload_url, workspace=self.workspace)
+            if not transcript.id or transcript.status.name == "error":
+                return None
+        else:
+            transcript = self.transcription_service.transcribe_audio(upload_url)
+            if not transcript.id or not transcript.text:
+                return None
+        return transcript
+
+    def _transcribe_tiered(self, upload_url: str) -> Union["aai.Transcript", DraftTranscript, None]:
+        """
+        Submit the best-model transcription of uploaded audio and wait for a fast draft meanwhile.
+
+        When the draft fails, waits for the best-model transcript instead.
+        """
+        final = self.transcription_service.submit_audio(upload_url, workspace=self.workspace)
+        if not final.id or final.status.name == "error":
+            return None
+        draft = self.transcription_service.transcribe_draft(upload_url)
+        if draft.id and draft.text:
+            return DraftTranscript(draft, final)
+        final = self.transcription_service.wait_for_transcript(final.id)
+        return final if final.text else None
+
+    def _finalize_later(self, transcript: Union["aai.Transcript", StitchedTranscript, DraftTranscript]) -> None:
+        """
+        Replace a stored draft once its final transcript completes, from a background thread.
+
+        With webhooks, the webhook reports the completion instead. Either way, `refresh_pending` and remote syncs
+        replace the drafts left behind, e.g. by a restart.
+        """
+        if isinstance(transcript, DraftTranscript) and not webhooks_enabled():
+            bind = self.db.get_bind()
+            engine = getattr(bind, "engine", bind)
+            self.finalizations.append(
+                get_finalizer().submit(finalize_transcript, engine, transcript.id, self.transcription_service)
+            )
+
+    def _store_meeting(
+        self,
+        transcript: Union["aai.Transcript", StitchedTranscript, DraftTranscript],
+        meeting_name: str,
+        meeting_date: Optional[date],
+        content_hash: Optional[str],
+    ) -> int:
+        """
+        Store the meeting of a transcript, and the transcript once there is one, in one transaction; returns the
+        meeting ID.
+        """
+        return self._write(
+            lambda service: service._insert_meeting(transcript, meeting_name, meeting_date, content_hash)
+        )
+
+    def _insert_meeting(
+        self,
+        transcript: Union["aai.Transcript", StitchedTranscript, DraftTranscript],
+        meeting_name: str,
+        meeting_date: Optional[date],
+        content_hash: Optional[str],
+    ) -> int:
+        stitched = isinstance(transcript, StitchedTranscript)
+        drafted = isinstance(transcript, DraftTranscript)
+        with unit_of_work(self.db):
+            meeting = MeetingRepository.insert_or_update(
+                self.db,
+                transcript.id,
+                meeting_name,
+                meeting_date,
+                datetime.now(timezone.utc),
+                transcript.status.name if drafted or (webhooks_enabled() and not stitched) else "transcribed",
+                content_hash=content_hash,
+                segment_ids=" ".join(transcript.segment_ids) if stitched else None,
+                draft_id=transcript.draft.id if drafted else None,
+            )
+            if stitched or transcript.text:
+                self._store_transcript(meeting.id, transcript)
+        return meeting.id
+
+    @staticmethod
+    def _split_audio(stream: BinaryIO) -> List[AudioSegment]:
+        """Segments of a recording to transcribe in segments, none when it is short, not MP3, or not enabled."""
+        segment_ms = segment_duration_ms()
+        if not segment_ms:
+            return []
+        start = stream.tell()
+        overlap_ms = int(os.getenv("ASSEMBLYAI_SEGMENT_OVERLAP_SECONDS", DEFAULT_SEGMENT_OVERLAP_SECONDS)) * 1000
+        segments = split_mp3(stream, segment_ms, overlap_ms)
+        stream.seek(start)
+        return segments if len(segments) > 1 else []
+
+    def _transcribe_segments(self, stream: BinaryIO, segments: List[AudioSegment]) -> Optional[StitchedTranscript]:
+        # Segment offsets are relative to where the stream was split
+        start = stream.tell()
+        segments = [AudioSegment(start + s.offset, s.size, s.start_ms, s.end_ms) for s in segments]
+        return self.transcription_service.transcribe_segments(
+            stream, segments, max_workers=int(os.getenv("ASSEMBLYAI_SEGMENT_WORKERS", DEFAULT_SEGMENT_WORKERS))
+        )
+
+    def complete_transcription(self, transcript: "aai.Transcript") -> Optional[Meeting]:
+        """
+        Record the outcome of a transcript submitted without waiting for it.
+
+        Called when a webhook reports it, or by the polling fallback. Repeated calls for the same transcript
+        only update the status. A completed transcript replaces the draft of its meeting. Deleted meetings are
+        left as they are.
+
+        Returns:
+            The meeting, None when the transcript is not one of this database's meetings and is not imported
+            (see `imports_remote`).
+        """
+        meeting, replaced = self._write(lambda service: service._record_outcome(transcript))
+        if replaced:
+            self._delete_draft(replaced)
+        return meeting
+
+    def _record_outcome(self, transcript: "aai.Transcript") -> Tuple[Optional[Meeting], Optional[str]]:
+        """Database writes of `complete_transcription`: the meeting, and the draft transcript it replaced."""
+        status = transcript.status.name
+        replaced = None
+        with unit_of_work(self.db):
+            meeting = MeetingRepository.get_by_remote_id(self.db, transcript.id)
+            if meeting is None and self._owns(transcript):
+                meeting = Meeting(remote_id=transcript.id, name="", created=datetime.now(timezone.utc))
+                self.db.add(meeting)
+                self.db.flush()
+            if meeting is None or meeting.deleted is not None:
+                return meeting, None
+            meeting.status = status
+            if status == "completed" and meeting.draft_id:
+                replaced = self._replace_draft(meeting, transcript)
+            elif status == "completed" and TranscriptRepository.get_transcript(self.db, meeting.id) is None:
+                # Committed with the transcript, so that a completed meeting always has one
+                self._store_transcript(meeting.id, transcript)
+        return meeting, replaced
+
+    def _replace_draft(self, meeting: Meeting, transcript: "aai.Transcript") -> str:
+        """
+        Store the final transcript of a drafted meeting over its draft, flagging the answers computed meanwhile.
+
+        Returns:
+            The ID of the draft transcript, to delete once committed.
+        """
+        self._store_transcript(meeting.id, transcript)
+        QueryRepository.flag_draft_answers(self.db, meeting.id)
+        draft_id, meeting.draft_id = meeting.draft_id, None
+        return draft_id
+
+    def _delete_draft(self, draft_id: str) -> None:
+        # Deleted drafts are left out of remote syncs
+        try:
+            self.transcription_service.delete_transcript(draft_id)
+        except Exception as e:
+            print(f"Failed to delete the draft transcript {draft_id}: {e}")
+
+    def refresh_pending(self, on_error: Optional[Callable[[Meeting, Exception], None]] = None) -> int:
+        """
+        Polling fallback for missed webhooks: fetch the meetings still queued or processing.
+
+        A meeting that cannot be refreshed (e.g. AssemblyAI unreachable) is skipped until the next call.
+
+        Args:
+            on_error: Called with each meeting skipped and its error.
+
+        Returns:
+            The number of meetings that are no longer pending.
+        """
+        done = 0
+        for meeting in MeetingRepository.get_by_status(self.db, PENDING_STATUSES):
+            self.checkpoint()
+            try:
+                transcript = self.transcription_service.get_transcript(meeting.remote_id)
+                if transcript.status.name not in PENDING_STATUSES:
+                    self.complete_transcription(transcript)
+                    done += 1
+            except Exception as e:
+                print(f"Failed to refresh the pending meeting {meeting.id}: {e}")
+                if on_error:
+                    on_error(meeting, e)
+        return done
+
+    def _store_transcript(
+        self, meeting_id: int, transcript: Union["aai.Transcript", StitchedTranscript, DraftTranscript]
+    ) -> None:
+        """Store a transcript with the data derived from its utterances."""
         TranscriptRepository.insert_or_update(
-            db=self.db, meeting_id=meeting_id, text=transcript.text, transcript=transcript_text
+            db=self.db,
+            meeting_id=meeting_id,
+            text=transcript.text or "",
+            transcript=TranscriptionService.format_transcript(transcript),
         )
+        UtteranceRepository.replace(self.db, meeting_id, TranscriptionService.utterance_rows(transcript))
+        SpeakerStatsRepository.replace(self.db, meeting_id, compute_speaker_stats(transcript.utterances or []))
 
-        return meeting_id
+    def ensure_utterances(self, meeting_id: int) -> int:
+        """
+        Number of stored utterances of a meeting.
+
+        Meetings stored before utterances were kept get them once from their formatted transcript
+        (without timestamps).
+        """
+        if count := UtteranceRepository.count(self.db, meeting_id):
+            return count
+        transcript = TranscriptRepository.get_transcript(self.db, meeting_id)
+        if not transcript or not transcript.transcript:
+            return 0
+        rows = [
+            {"speaker": match["speaker"], "start": None, "end": None, "text": match["text"]}
+            for match in map(_TRANSCRIPT_LINE.match, transcript.transcript.splitlines())
+            if match
+        ]
+        UtteranceRepository.replace(self.db, meeting_id, rows)
+        return len(rows)
+
+    def sync_meetings(self, include_remote: bool = False, force: bool = False) -> Dict[int, Meeting]:
+        """
+        Meetings of the database, once their AssemblyAI transcripts are merged into them if `include_remote` is set.
 
-    def sync_meetings(self, include_remote: bool = False) -> Dict[str, Meeting]:
-        local_meetings = MeetingRepository.get_all(self.db, include_deleted=include_remote)
+        Remote syncs of a database are shared by the whole process (see `sync`): a sync already running is joined,
+        and none runs if one completed less than `ASSEMBLYAI_SYNC_TTL` seconds ago, unless `force` is set.
+        """
+        if not include_remote:
+            return MeetingRepository.get_all(self.db)
+
+        local_meetings: Dict[int, Meeting] = {}
 
-        if include_remote:
-            remote_meetings = self._fetch_remote_meetings()
-            self._merge_meetings(local_meetings, remote_meetings)
+        def sync() -> None:
+            local_meetings.update(MeetingRepository.get_all(self.db, include_deleted=True))
+            self._merge_meetings(local_meetings, self._fetch_remote_meetings())
 
+        get_sync_flight().run(sync_key(self.db.get_bind()), sync, force=force)
+        if not local_meetings:
+            # Synced by another session, or earlier: meetings already loaded by this one may be stale
+            self.db.expire_all()
+            local_meetings = MeetingRepository.get_all(self.db, include_deleted=True)
         return local_meetings
 
     def _fetch_remote_meetings(self) -> Dict[str, Meeting]:
         transcripts: Dict[str, Meeting] = {}
         already_processed = set()
         try:
+            aai = get_assemblyai()
             transcriber = aai.Transcriber()
             params = aai.ListTranscriptParameters()
             page = transcriber.list_transcripts(params)
             while page.transcripts:
                 transcripts |= {
                     t.id: Meeting(
-                        id=t.id,
+                        remote_id=t.id,
                         created=(datetime.fromisoformat(t.created) if t.created else None),
                         status=t.status.name,
                     )
                     for t in page.transcripts
-                    if t.audio_url != "http://deleted_by_user"
+                    if t.audio_url != DELETED_AUDIO_URL
                 }
                 if (
                     not page.page_details.before_id_of_prev_url
@@ -94,50 +779,176 @@ class MeetingService:
         except Exception as e:
             raise RuntimeError(f"Failed to fetch remote meetings: {str(e)}") from e
 
-    def _merge_meetings(self, local: Dict[str, Meeting], remote: Dict[str, Meeting]) -> None:
+    def _merge_meetings(self, local: Dict[int, Meeting], remote: Dict[str, Meeting]) -> None:
         """
         Merge remote meetings into local meetings and update the database.
 
+        Transcripts without a local meeting get one when the database imports them (see `imports_remote`);
+        otherwise only the transcripts of the local meetings are merged.
+
+        Meetings are merged `SYNC_BATCH_SIZE` at a time: the remote transcripts a batch needs are fetched first,
+        then the batch is written in one transaction, so that the database is never locked while AssemblyAI
+        answers.
+
         Args:
             local: Dictionary of local meetings (key: meeting ID, value: Meeting object).
-            remote: Dictionary of remote meetings (key: meeting ID, value: Meeting object).
+            remote: Dictionary of remote meetings (key: AssemblyAI transcript ID, value: Meeting object).
         """
+        replaced: List[str] = []
         try:
             local_transcripts = TranscriptRepository.get_all(self.db, include_deleted=True)
-            for meeting_id, remote_meeting in remote.items():
-                if meeting_id in local:
+            local_by_remote_id = {meeting.remote_id: meeting for meeting in local.values()}
+            # Draft and segment transcripts belong to the meeting of their main transcript
+            secondary_ids = {
+                remote_id
+                for meeting in local.values()
+                for remote_id in meeting.remote_ids
+                if remote_id != meeting.remote_id
+            }
+            imports = self.imports_remote
+            merged = [
+                (remote_id, meeting)
+                for remote_id, meeting in remote.items()
+                if remote_id in local_by_remote_id or (imports and remote_id not in secondary_ids)
+            ]
+            imported = False
+
+            def needs_transcript(remote_id: str, remote_meeting: Meeting) -> bool:
+                local_meeting = local_by_remote_id.get(remote_id)
+                if local_meeting is None:
+                    return True
+                if local_meeting.draft_id:
+                    # The final transcript of a draft completed without being reported
+                    return remote_meeting.status == "completed"
+                return local_meeting.id not in local_transcripts
+
+            for start in range(0, len(merged), SYNC_BATCH_SIZE):
+                batch = merged[start : start + SYNC_BATCH_SIZE]
+                self.checkpoint()
+                fetched = {
+                    remote_id: self.transcription_service.get_transcript(remote_id)
+                    for remote_id, remote_meeting in batch
+                    if needs_transcript(remote_id, remote_meeting)
+                }
+                # Transcripts submitted from other workspaces are left to them
+                batch = [
+                    (remote_id, remote_meeting)
+                    for remote_id, remote_meeting in batch
+                    if remote_id in local_by_remote_id or self._owns(fetched[remote_id])
+                ]
+                imported |= any(remote_id not in local_by_remote_id for remote_id, _ in batch)
+                self.checkpoint()
+                # Drafts are deleted once replaced in a committed batch
+                replaced += self._write(lambda service: service._merge_batch(batch, fetched))
+            if imported:
+                local.update(MeetingRepository.get_all(self.db, include_deleted=True))
+        except Exception as e:
+            raise RuntimeError(f"Failed to merge meetings: {str(e)}") from e
+        finally:
+            for draft_id in replaced:
+                self._delete_draft(draft_id)
+
+    def _merge_batch(self, batch: List[Tuple[str, Meeting]], fetched: Dict[str, "aai.Transcript"]) -> List[str]:
+        """
+        Update the local meetings of a batch of remote ones, adding those missing, and store their `fetched`
+        transcripts, in one transaction.
+
+        Returns:
+            The IDs of the draft transcripts replaced, to delete once committed.
+        """
+        replaced: List[str] = []
+        with unit_of_work(self.db):
+            local = MeetingRepository.get_by_remote_ids(self.db, [remote_id for remote_id, _ in batch])
+            for remote_id, remote_meeting in batch:
+                if remote_id in local:
                     # Update existing meeting with remote data
-                    local_meeting = local[meeting_id]
+                    local_meeting = local[remote_id]
                     local_meeting.created = remote_meeting.created
                     local_meeting.status = remote_meeting.status
                 else:
                     # Add new remote meeting to local database
-                    new_meeting = MeetingRepository.insert_or_update(
+                    local_meeting = MeetingRepository.insert_or_update(
                         self.db,
-                        meeting_id=meeting_id,
+                        remote_id=remote_id,
                         name="",  # Default name, can be updated later
                         meeting_date=None,  # Default date, can be updated later
                         created=remote_meeting.created,
                         status=remote_meeting.status,
                         deleted=None,
                     )
-                    local[meeting_id] = new_meeting
-                if meeting_id not in local_transcripts:
+                remote_transcript = fetched.get(remote_id)
+                if remote_transcript is None:
+                    continue
+                if local_meeting.draft_id:
+                    replaced.append(self._replace_draft(local_meeting, remote_transcript))
+                elif remote_transcript.utterances:
                     # Add new transcript for remote meeting
-                    remote_transcript = TranscriptionService().get_transcript(meeting_id)
-                    if transcript := TranscriptionService.format_transcript(remote_transcript):
-                        TranscriptRepository.insert_or_update(
-                            db=self.db,
-                            meeting_id=meeting_id,
-                            text=remote_transcript.text or "",
-                            transcript=transcript,
-                        )
-
-            # Commit changes to the database
-            self.db.commit()
-        except Exception as e:
-            self.db.rollback()  # Rollback en cas d'erreur
-            raise RuntimeError(f"Failed to merge meetings: {str(e)}") from e
+                    self._store_transcript(local_meeting.id, remote_transcript)
+        return replaced
+
+    def backfill_speaker_stats(self, max_workers: int = DEFAULT_BACKFILL_WORKERS) -> int:
+        """
+        Compute the speaker aggregates of the transcribed meetings that have none yet.
+
+        Transcripts are fetched and aggregated in parallel; results are stored from the calling thread,
+        which owns the database session.
+
+        Returns:
+            The number of meetings backfilled.
+        """
+        done = SpeakerStatsRepository.get_meeting_ids(self.db)
+        meetings = MeetingRepository.get_all(self.db, include_deleted=True)
+        pending = [meeting_id for meeting_id in TranscriptRepository.get_all(self.db) if meeting_id not in done]
+
+        def fetch(meeting: Meeting):
+            transcript = self.transcription_service.get_transcript(meeting.remote_id)
+            return compute_speaker_stats(transcript.utterances or [])
+
+        backfilled = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, meetings[meeting_id]): meeting_id for meeting_id in pending}
+            for future in as_completed(futures):
+                meeting_id = futures[future]
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    print(f"Failed to backfill speaker stats of {meeting_id}: {e}")
+                    continue
+                SpeakerStatsRepository.replace(self.db, meeting_id, stats)
+                backfilled += 1
+        return backfilled
+
+    def backfill_content_hashes(self, max_workers: int = DEFAULT_BACKFILL_WORKERS) -> int:
+        """
+        Hash the audio of the meetings stored before uploads were hashed, downloading it from AssemblyAI.
+
+        Meetings whose audio was deleted are skipped.
+
+        Returns:
+            The number of meetings hashed.
+        """
+        pending = MeetingRepository.get_without_content_hash(self.db)
+
+        def fetch(remote_id: str) -> Optional[str]:
+            audio_url = self.transcription_service.get_transcript(remote_id).audio_url
+            if not audio_url or audio_url == DELETED_AUDIO_URL:
+                return None
+            return self.transcription_service.hash_audio_url(audio_url)
+
+        hashed = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, meeting.remote_id): meeting.id for meeting in pending}
+            for future in as_completed(futures):
+                meeting_id = futures[future]
+                try:
+                    content_hash = future.result()
+                except Exception as e:
+                    print(f"Failed to hash the audio of {meeting_id}: {e}")
+                    continue
+                if content_hash:
+                    MeetingRepository.set_content_hash(self.db, meeting_id, content_hash)
+                    hashed += 1
+        return hashed
 
     @staticmethod
     def _format_meeting_date(meeting_date: Optional[date]) -> Optional[datetime]:
@@ -158,26 +969,139 @@ class MeetingService:
 
 
 class TranscriptionService:
-    def __init__(self):
-        aai.settings.api_key = os.getenv("ASSEMBLYAI_API_KEY")
-        aai.settings.base_url = os.getenv("ASSEMBLYAI_BASE_URL", "https://api.eu.assemblyai.com")
+    """
+    AssemblyAI calls.
+
+    Args:
+        ledger: Where to record the duration, sizes and outcome of the transcription, upload and LeMUR calls.
+    """
+
+    def __init__(self, ledger: Optional[LedgerWriter] = None):
+        self.ledger = ledger
 
-    def transcribe_audio(self, file: str | BinaryIO) -> aai.Transcript:
+    def _call(self, operation: str, **fields: Any) -> ContextManager[Dict[str, Any]]:
+        """Record the call made in the block in the ledger (see `LedgerWriter.timed`)."""
+        return self.ledger.timed(operation, **fields) if self.ledger else nullcontext({})
+
+    @staticmethod
+    def _config(
+        webhook: bool = True, speech_model: Optional["aai.SpeechModel"] = None, workspace: Optional[str] = None
+    ) -> "aai.TranscriptionConfig":
+        """
+        Transcription settings. The webhook of transcripts submitted from a workspace other than the default one
+        is told where to store them, with a `workspace` query parameter.
+        """
+        aai = get_assemblyai()
         config = aai.TranscriptionConfig(
-            speech_model=aai.SpeechModel.best, speaker_labels=True, language_detection=True
+            speech_model=speech_model or aai.SpeechModel.best, speaker_labels=True, language_detection=True
         )
-        transcriber = aai.Transcriber(config=config)
-        transcript = transcriber.transcribe(file)
+        if webhook and (webhook_url := os.getenv("ASSEMBLYAI_WEBHOOK_URL")):
+            if workspace and workspace != DEFAULT_WORKSPACE:
+                webhook_url += ("&" if "?" in webhook_url else "?") + urlencode({"workspace": workspace})
+            secret = os.getenv("ASSEMBLYAI_WEBHOOK_SECRET")
+            config.set_webhook(webhook_url, WEBHOOK_AUTH_HEADER if secret else None, secret)
+        return config
+
+    def transcribe_audio(self, file: str | BinaryIO, webhook: bool = True) -> "aai.Transcript":
+        transcriber = get_assemblyai().Transcriber(config=self._config(webhook))
+        with self._call("transcribe") as call:
+            transcript = transcriber.transcribe(file)
+            call.update(transcript_fields(transcript))
+        return transcript
+
+    def transcribe_draft(self, file: str | BinaryIO) -> "aai.Transcript":
+        """Fast, less accurate transcript (nano model), not reported to the webhook."""
+        aai = get_assemblyai()
+        transcriber = aai.Transcriber(config=self._config(webhook=False, speech_model=aai.SpeechModel.nano))
+        with self._call("transcribe_draft") as call:
+            transcript = transcriber.transcribe(file)
+            call.update(transcript_fields(transcript))
+        return transcript
+
+    def wait_for_transcript(self, transcript_id: str) -> "aai.Transcript":
+        """A submitted transcript, once it is completed or failed."""
+        with self._call("wait", remote_id=transcript_id) as call:
+            transcript = self.get_transcript(transcript_id).wait_for_completion()
+            call.update(transcript_fields(transcript))
+        return transcript
+
+    def transcribe_segments(
+        self, stream: BinaryIO, segments: List[AudioSegment], max_workers: int = DEFAULT_SEGMENT_WORKERS
+    ) -> Optional[StitchedTranscript]:
+        """
+        Transcribe segments of a recording concurrently and stitch their transcripts.
+
+        Segments are read from `stream` one at a time, so that at most `max_workers` of them are held in memory.
+        Their transcriptions are not reported to the webhook, which only knows whole meetings.
+
+        Returns:
+            The stitched transcript, or None when a segment could not be transcribed.
+        """
+        lock = threading.Lock()
+
+        def transcribe(segment: AudioSegment) -> "aai.Transcript":
+            with lock:
+                stream.seek(segment.offset)
+                data = stream.read(segment.size)
+            return self.transcribe_audio(io.BytesIO(data), webhook=False)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            transcripts = list(executor.map(transcribe, segments))
+        if any(not transcript.id or transcript.text is None for transcript in transcripts):
+            return None
+        return stitch_transcripts(segments, transcripts)
+
+    def upload_audio(self, file: str | BinaryIO) -> str:
+        """Upload the audio and return its URL, to be passed to `transcribe_audio` or `submit_audio`."""
+        transcriber = get_assemblyai().Transcriber(config=self._config())
+        with self._call("upload"):
+            return transcriber.upload_file(file)
+
+    @staticmethod
+    def hash_audio_url(audio_url: str) -> str:
+        """SHA-256 of the audio at `audio_url`, streamed in chunks."""
+        import httpx
+
+        aai = get_assemblyai()
+        # Uploaded files are only readable with the API key, which must not leak to other hosts
+        host = urlparse(audio_url).hostname or ""
+        headers = {"authorization": aai.settings.api_key} if host.endswith(".assemblyai.com") else {}
+        digest = hashlib.sha256()
+        with httpx.stream("GET", audio_url, headers=headers, follow_redirects=True, timeout=60) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes(CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def submit_audio(self, file: str | BinaryIO, workspace: Optional[str] = None) -> "aai.Transcript":
+        """Upload the audio and queue its transcription without waiting for the result, from `workspace`."""
+        transcriber = get_assemblyai().Transcriber(config=self._config(workspace=workspace))
+        with self._call("submit") as call:
+            transcript = transcriber.submit(file)
+            call.update(remote_id=transcript.id)
         return transcript
 
-    def lemur_task(self, meeting_id: str, prompt: str) -> str:
-        transcript = aai.Transcript.get_by_id(meeting_id)
-        result = transcript.lemur.task(prompt, final_model=aai.LemurModel.claude3_5_sonnet)
+    def lemur_task(self, remote_id: str, prompt: str, transcript_ids: Optional[List[str]] = None) -> str:
+        """
+        Answer `prompt` about the transcript `remote_id`; `transcript_ids` are those the stored transcript comes from
+        (`Meeting.transcript_ids`): its segments, or its draft.
+        """
+        aai = get_assemblyai()
+        transcript_ids = transcript_ids or [remote_id]
+        with self._call("lemur", remote_id=remote_id, prompt_chars=len(prompt)) as call:
+            if len(transcript_ids) > 1:
+                lemur = aai.TranscriptGroup(transcript_ids=transcript_ids).lemur
+            else:
+                lemur = aai.Transcript.get_by_id(transcript_ids[0]).lemur
+            result = lemur.task(prompt, final_model=aai.LemurModel.claude3_5_sonnet)
+            call.update(answer_chars=len(result.response or ""))
+            if result.usage:
+                call.update(input_tokens=result.usage.input_tokens, output_tokens=result.usage.output_tokens)
         return result.response
 
     @staticmethod
-    def get_transcript(transcript_id: str) -> aai.Transcript:
-        return aai.Transcript.get_by_id(transcript_id)
+    def get_transcript(transcript_id: str) -> "aai.Transcript":
+        return get_assemblyai().Transcript.get_by_id(transcript_id)
 
     @staticmethod
     def format_transcript(transcript) -> str:
@@ -187,6 +1111,14 @@ class TranscriptionService:
             else ""
         )
 
+    @staticmethod
+    def utterance_rows(transcript) -> List[Dict[str, Any]]:
+        """Utterances as `Utterance` rows (without meeting and position)."""
+        return [
+            {"speaker": str(utterance.speaker), "start": utterance.start, "end": utterance.end, "text": utterance.text}
+            for utterance in transcript.utterances or []
+        ]
+
     @staticmethod
     def delete_transcript(transcript_id: str) -> None:
-        aai.Transcript.delete_by_id(transcript_id)
+        get_assemblyai().Transcript.delete_by_id(transcript_id)
@@ -0,0 +1,116 @@
+"""
+Process-wide coalescing of the remote meeting syncs (`MeetingService.sync_meetings(include_remote=True)`).
+
+Every Streamlit session has its own `MeetingService`, so users refreshing the history together would each list the
+AssemblyAI transcripts and write the changes to the same database. Syncs of one database go through a `SingleFlight`
+instead: a sync requested while another one runs waits for it rather than starting its own, and a sync requested
+shortly after one completed (`ASSEMBLYAI_SYNC_TTL` seconds) is skipped, the database being up to date.
+
+With `SYNC_WORKER=true`, the interface does not sync at all: the `worker` module does, in its own process.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from sqlalchemy import Engine
+
+T = TypeVar("T")
+
+DEFAULT_SYNC_TTL = 30.0
+
+
+class _Flight(Generic[T]):
+    def __init__(self):
+        self.future: "Future[T]" = Future()
+        self.finished: Optional[float] = None
+
+
+class SingleFlight(Generic[T]):
+    """
+    Runs a function once for all its concurrent callers, and reuses its result for `ttl` seconds.
+
+    Args:
+        ttl: Seconds a successful result is served to later callers; failures are never reused.
+        clock: Time source, in seconds.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_SYNC_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.runs = 0
+        self.joined = 0
+        self._flights: Dict[Hashable, _Flight[T]] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Hashable, function: Callable[[], T], force: bool = False) -> T:
+        """
+        Result of `function()` for `key`: from the run in progress if any, else from the last run if it succeeded
+        less than `ttl` seconds ago and `force` is false, else from a new run in the calling thread.
+
+        A forced call still joins a run in progress, which started before it and is as fresh as a new one.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and (flight.finished is None or (not force and self._fresh(flight))):
+                self.joined += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.runs += 1
+                leader = True
+        if leader:
+            try:
+                flight.future.set_result(function())
+            except BaseException as error:
+                flight.future.set_exception(error)
+            finally:
+                with self._lock:
+                    flight.finished = self.clock()
+        return flight.future.result()
+
+    def invalidate(self, key: Hashable) -> None:
+        """Make the next call for `key` run again (a run in progress is still joined)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.finished is not None:
+                del self._flights[key]
+
+    def _fresh(self, flight: _Flight[T]) -> bool:
+        return flight.future.exception() is None and self.clock() - flight.finished < self.ttl
+
+
+def sync_ttl() -> float:
+    return float(os.getenv("ASSEMBLYAI_SYNC_TTL", DEFAULT_SYNC_TTL))
+
+
+def sync_worker_enabled() -> bool:
+    """Whether a `meeting-minutes worker` process syncs the databases (`SYNC_WORKER`); the interface only reads them."""
+    return os.getenv("SYNC_WORKER", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+_syncs: Optional[SingleFlight[None]] = None
+_syncs_lock = threading.Lock()
+
+
+def get_sync_flight() -> SingleFlight[None]:
+    """The process-wide `SingleFlight` of remote syncs, keyed by database."""
+    global _syncs
+    with _syncs_lock:
+        if _syncs is None:
+            _syncs = SingleFlight(ttl=sync_ttl())
+        return _syncs
+
+
+def reset_sync_flight() -> None:
+    """Forget past syncs and read `ASSEMBLYAI_SYNC_TTL` again on next use."""
+    global _syncs
+    with _syncs_lock:
+        _syncs = None
+
+
+def sync_key(engine: Engine) -> str:
+    """Key of the syncs of a database: one per database, whatever the engine used to reach it."""
+    return engine.url.render_as_string(hide_password=False)
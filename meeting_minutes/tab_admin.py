@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+import streamlit as st
+
+from meeting_minutes.database import SessionLocal, get_engine
+from meeting_minutes.ledger import ledger_enabled
+from meeting_minutes.models import CallLedger
+from meeting_minutes.repository import CallLedgerRepository
+
+PERIODS = {"24 heures": timedelta(days=1), "7 jours": timedelta(days=7), "30 jours": timedelta(days=30), "Tout": None}
+
+
+def tab_admin():
+    """Durée, consommation et échecs des appels à AssemblyAI, d'après le registre des appels."""
+    import pandas as pd
+
+    st.header("Appels à AssemblyAI")
+    if not ledger_enabled():
+        st.info("Le registre des appels est désactivé (CALL_LEDGER).")
+        return
+    st.caption("Appels de toutes les équipes, enregistrés par lots quelques secondes après leur fin.")
+
+    period = PERIODS[st.selectbox("Période", list(PERIODS), key="admin_period")]
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - period if period else None
+    engine = get_engine()
+    CallLedger.__table__.create(engine, checkfirst=True)
+    with SessionLocal(bind=engine) as db:
+        rollups = CallLedgerRepository.rollup(db, since)
+        failures = CallLedgerRepository.recent_failures(db)
+
+    if not rollups:
+        st.info("Aucun appel enregistré sur la période.")
+    else:
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Opération": rollup.operation,
+                        "Appels": rollup.calls,
+                        "Échecs": rollup.failures,
+                        "p50 (s)": rollup.p50_ms / 1000,
+                        "p95 (s)": rollup.p95_ms / 1000,
+                        "Max (s)": rollup.max_ms / 1000,
+                        "Audio (h)": round(rollup.audio_seconds / 3600, 2),
+                        "Tokens en entrée": rollup.input_tokens,
+                        "Tokens en sortie": rollup.output_tokens,
+                    }
+                    for rollup in rollups
+                ]
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    if failures:
+        st.subheader("Derniers échecs")
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Date (UTC)": call.created,
+                        "Opération": call.operation,
+                        "Transcription": call.remote_id,
+                        "Durée (s)": call.duration_ms / 1000,
+                        "Erreur": call.error,
+                    }
+                    for call in failures
+                ]
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
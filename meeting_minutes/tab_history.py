@@ -1,28 +1,128 @@
+import time
 from typing import Dict
 import streamlit as st
-from st_aggrid import AgGrid, GridOptionsBuilder, ColumnsAutoSizeMode
-import pandas as pd
 from sqlalchemy.orm import Session
 
 from meeting_minutes.models import Meeting, Prompt
-from meeting_minutes.repository import MeetingRepository, PromptRepository, QueryRepository, TranscriptRepository
+from meeting_minutes.repository import (
+    MeetingRepository,
+    PromptRepository,
+    QueryRepository,
+    SpeakerStatsRepository,
+    UtteranceRepository,
+)
 from meeting_minutes.services import MeetingService, TranscriptionService
+from meeting_minutes.sync import sync_worker_enabled
+from meeting_minutes.write_queue import write
+
+
+# Number of utterances loaded at once by the transcript viewer
+TRANSCRIPT_PAGE_SIZE = 50
+# Characters of each question shown in the queries grid
+QUESTION_PREVIEW_LENGTH = 80
+# Passages returned by the semantic search
+SEARCH_RESULTS = 20
+# Seconds between two checks of the meetings still being transcribed, in case a webhook was missed
+PENDING_REFRESH_INTERVAL = 60
+
+
+def _format_duration(milliseconds: int) -> str:
+    return f"{milliseconds // 60000}:{milliseconds // 1000 % 60:02d}"
+
+
+def transcript_viewer(db: Session, meeting_service: MeetingService, meeting_id: int):
+    """Affiche le transcript par fenêtres d'interventions, lues une à une en base."""
+    total = meeting_service.ensure_utterances(meeting_id)
+    if not total:
+        return
+    offset_key = f"transcript_offset_{meeting_id}"
+    offset = st.session_state.get(offset_key, 0)
+
+    st.text("Transcript")
+    col_search, col_speaker = st.columns([1, 1])
+    with col_search:
+        term = st.text_input("Rechercher dans le transcript", key=f"transcript_search_{meeting_id}")
+        if term and (hits := UtteranceRepository.find(db, meeting_id, term)):
+            hit = st.selectbox(
+                f"{len(hits)} résultat(s)",
+                hits,
+                format_func=lambda position: f"Intervention {position + 1}",
+                key=f"transcript_hit_{meeting_id}",
+            )
+            if st.button("Aller au résultat", key=f"transcript_goto_hit_{meeting_id}"):
+                offset = hit
+        elif term:
+            st.caption("Aucun résultat")
+    with col_speaker:
+        speaker = st.selectbox(
+            "Intervenant", UtteranceRepository.get_speakers(db, meeting_id), key=f"transcript_speaker_{meeting_id}"
+        )
+        if st.button("Intervention suivante", key=f"transcript_next_speaker_{meeting_id}"):
+            position = UtteranceRepository.next_for_speaker(db, meeting_id, speaker, after=offset)
+            offset = position if position is not None else offset
+
+    col_previous, col_position, col_next = st.columns([1, 2, 1])
+    with col_previous:
+        if st.button("◀", key=f"transcript_previous_{meeting_id}", disabled=offset == 0):
+            offset = max(0, offset - TRANSCRIPT_PAGE_SIZE)
+    with col_next:
+        if st.button("▶", key=f"transcript_next_{meeting_id}", disabled=offset + TRANSCRIPT_PAGE_SIZE >= total):
+            offset = offset + TRANSCRIPT_PAGE_SIZE
+    st.session_state[offset_key] = offset
+
+    utterances = UtteranceRepository.get_window(db, meeting_id, offset, TRANSCRIPT_PAGE_SIZE)
+    with col_position:
+        st.caption(f"Interventions {offset + 1} à {offset + len(utterances)} sur {total}")
+    with st.container(height=300):
+        for utterance in utterances:
+            timestamp = f"`{_format_duration(utterance.start)}` " if utterance.start is not None else ""
+            st.markdown(f"{timestamp}**[Speaker {utterance.speaker}]** {utterance.text}")
 
 
 def tab_history(db: Session, meeting_service: MeetingService, transcription_service: TranscriptionService):
     """Gestion de l'historique des réunions."""
+    import pandas as pd
+    from st_aggrid import AgGrid, GridOptionsBuilder, ColumnsAutoSizeMode
+
+    # Avec SYNC_WORKER, le worker synchronise la base : l'interface ne fait que la lire
+    worker = sync_worker_enabled()
+    now = time.monotonic()
+    if not worker and now - st.session_state.get("pending_refreshed_at", 0.0) > PENDING_REFRESH_INTERVAL:
+        st.session_state["pending_refreshed_at"] = now
+        failed = []
+        try:
+            meeting_service.refresh_pending(on_error=lambda meeting, e: failed.append(meeting))
+        except Exception as e:
+            st.warning(f"Impossible de mettre à jour les réunions en cours : {e}")
+        if failed:
+            st.warning(
+                f"Le statut de {len(failed)} réunion(s) en cours n'a pas pu être mis à jour, nouvel essai plus tard"
+            )
+
     col_header, col_refresh = st.columns([0.99, 0.01])
     with col_header:
         st.header("Historique")
     with col_refresh:
         if st.button("🔄", help="Mettre à jour la liste des réunions", key="refresh_meetings"):
-            meeting_service.sync_meetings(include_remote=True)
+            if not worker:
+                meeting_service.sync_meetings(include_remote=True)
             st.rerun()
     col1, col2 = st.columns([1, 1])
     meeting_id = None
+    detail = None
     with col1:
         st.subheader("Meetings")
-        if meetings := MeetingRepository.get_all(db):
+        meetings = MeetingRepository.get_all(db)
+        if topic := st.text_input("Rechercher par sujet", key="semantic_search"):
+            from meeting_minutes.search import search_meetings
+
+            hits = search_meetings(db, [topic], k=SEARCH_RESULTS)[0]
+            with st.expander(f"{len(hits)} passages trouvés", expanded=True):
+                for hit in hits:
+                    st.markdown(f"**{meetings[hit.meeting].name}** — {hit.text[:300]}")
+            # Ne garder que les réunions trouvées
+            meetings = {hit.meeting: meetings[hit.meeting] for hit in hits}
+        if meetings:
             # Créer le DataFrame
             df = pd.DataFrame(
                 data=[
@@ -31,7 +131,7 @@ def tab_history(db: Session, meeting_service: MeetingService, transcription_serv
                         "Nom": meeting.name,
                         "Date réunion": str(meeting.date),
                         "Créée": meeting.created,
-                        "Statut": meeting.status,
+                        "Statut": f"{meeting.status} (provisoire)" if meeting.draft_id else meeting.status,
                     }
                     for meeting in meetings.values()
                 ],
@@ -61,19 +161,42 @@ def tab_history(db: Session, meeting_service: MeetingService, transcription_serv
             # Gérer la sélection et les actions
             selected_rows = grid_response["selected_rows"]
             if selected_rows is not None and not selected_rows.empty:
-                meeting_id = selected_rows.iloc[0]["ID"]
-
+                meeting_id = int(selected_rows.iloc[0]["ID"])
+                # Réunion, métadonnées du transcript et questions en une seule requête
+                detail = MeetingRepository.get_detail(db, meeting_id, QUESTION_PREVIEW_LENGTH)
+            if detail is not None:
                 # Section suppression
                 with st.popover(f"Supprimer la réunion {meeting_id}"):
                     st.write("Êtes-vous sûr de vouloir supprimer cette réunion ?")
                     if st.button("Confirmer la suppression", key="confirm_delete_meeting"):
-                        MeetingRepository.soft_delete(db, meeting_id)
-                        TranscriptionService.delete_transcript(meeting_id)
+                        write(db, MeetingRepository.soft_delete, meeting_id)
+                        for transcript_id in detail.meeting.remote_ids:
+                            TranscriptionService.delete_transcript(transcript_id)
                         st.success("Réunion supprimée avec succès")
                         st.rerun()
 
-                if transcript := TranscriptRepository.get_transcript(db, meeting_id):
-                    st.text_area("Transcript", value=transcript.transcript, height=150, disabled=True)
+                if detail.transcript is not None:
+                    if detail.meeting.draft_id:
+                        st.info("Transcription provisoire, remplacée par la version précise dès qu'elle sera prête")
+                    transcript_viewer(db, meeting_service, meeting_id)
+
+                if speaker_stats := SpeakerStatsRepository.get_by_meeting(db, meeting_id):
+                    with st.expander("Statistiques des intervenants"):
+                        st.dataframe(
+                            pd.DataFrame(
+                                data=[
+                                    {
+                                        "Intervenant": stats.speaker,
+                                        "Temps de parole": _format_duration(stats.talk_time_ms),
+                                        "Tours de parole": stats.turns,
+                                        "Interruptions": stats.interruptions,
+                                        "Mots / minute": stats.words_per_minute,
+                                    }
+                                    for stats in speaker_stats.values()
+                                ]
+                            ),
+                            hide_index=True,
+                        )
 
                 # Récupérer les prompts
                 prompts: Dict[int, Prompt] = PromptRepository.get_all(db, include_deleted=False)
@@ -96,9 +219,18 @@ def tab_history(db: Session, meeting_service: MeetingService, transcription_serv
 
                     if st.button("Envoyer"):
                         with st.spinner("La réponse est en cours de génération, veuillez patienter..."):
-                            answer = transcription_service.lemur_task(meeting_id, prompt)
+                            answer = transcription_service.lemur_task(
+                                detail.meeting.remote_id, prompt, detail.meeting.transcript_ids
+                            )
                             if answer:
-                                QueryRepository.store_query(db, meeting_id, prompt, answer)
+                                write(
+                                    db,
+                                    QueryRepository.store_query,
+                                    meeting_id,
+                                    prompt,
+                                    answer,
+                                    draft=detail.meeting.draft_id is not None,
+                                )
                                 st.success("Réponse générée avec succès")
                                 st.text_area("Réponse", value=answer, height=400)
             else:
@@ -108,28 +240,24 @@ def tab_history(db: Session, meeting_service: MeetingService, transcription_serv
     with col2:
         st.subheader("Questions")
         # Récupérer les queries pour ce meeting
-        queries = None
-        if meeting_id:
-            queries = QueryRepository.get_by_meeting(db, meeting_id)
+        queries = detail.queries if detail is not None else None
 
         if queries:
-            # Afficher la liste des questions
+            # Afficher la liste des questions (la réponse n'est chargée que pour la ligne sélectionnée)
             df_queries = pd.DataFrame(
                 data=[
                     {
                         "ID": query.id,
                         "Date": query.created,
-                        "Question": query.question,
-                        "Réponse": query.answer,
+                        "Question": query.question_preview,
                     }
-                    for query in queries.values()
+                    for query in queries
                 ],
-                columns=["ID", "Date", "Question", "Réponse"],
+                columns=["ID", "Date", "Question"],
             )
 
             gb = GridOptionsBuilder.from_dataframe(df_queries)
             gb.configure_selection("single", use_checkbox=False)
-            gb.configure_column("Réponse", hide=True)
             gb.configure_default_column(sort_descending_first=True)
             gb.configure_grid_options(defaultColDef={"sortable": True})
             gb.configure_column("Date", sort="asc")
@@ -146,27 +274,32 @@ def tab_history(db: Session, meeting_service: MeetingService, transcription_serv
 
             # Gérer la sélection et l'affichage de la réponse
             selected_query_rows = grid_response_queries["selected_rows"]
+            selected_query = None
             if selected_query_rows is not None and not selected_query_rows.empty:
-                query_id = int(selected_query_rows.iloc[0]["ID"])
+                selected_query = QueryRepository.get_by_id(db, int(selected_query_rows.iloc[0]["ID"]))
+            if selected_query is not None:
+                query_id = selected_query.id
                 # Section suppression
                 with st.popover(f"Supprimer la question {query_id}"):
                     st.write("Êtes-vous sûr de vouloir supprimer cette question ?")
                     if st.button("Confirmer la suppression", key="confirm_delete_query"):
-                        QueryRepository.soft_delete(db, query_id)
+                        write(db, QueryRepository.soft_delete, query_id)
                         st.success("Question supprimée avec succès")
                         st.rerun()
-                st.text_area("Question", value=selected_query_rows.iloc[0]["Question"], height=100, disabled=True)
-                st.text_area("Réponse", value=selected_query_rows.iloc[0]["Réponse"], height=300, disabled=True)
+                if selected_query.draft:
+                    st.warning("Réponse calculée sur la transcription provisoire de la réunion")
+                st.text_area("Question", value=selected_query.question, height=100, disabled=True)
+                st.text_area("Réponse", value=selected_query.answer, height=300, disabled=True)
                 # Section modification
                 with st.expander("Modifier la réponse"):
                     new_answer = st.text_area(
-                        "Réponse", value=selected_query_rows.iloc[0]["Réponse"], height=300, key=f"query_{query_id}"
+                        "Réponse", value=selected_query.answer, height=300, key=f"query_{query_id}"
                     )
 
                     if st.button("Enregistrer la réponse", key=f"save_{query_id}") and (
-                        new_answer and new_answer != selected_query_rows.iloc[0]["Réponse"]
+                        new_answer and new_answer != selected_query.answer
                     ):
-                        QueryRepository.update_query(db, query_id, answer=new_answer)
+                        write(db, QueryRepository.update_query, query_id, answer=new_answer)
                         st.success("Réponse mise à jour avec succès")
                         st.rerun()
 
@@ -1,32 +1,72 @@
+import os
 import streamlit as st
 from datetime import date
 
+from meeting_minutes.services import MeetingUpload
+from meeting_minutes.sync import sync_worker_enabled
 from meeting_minutes.tabs import Tab
 
+STATUS_LABELS = {
+    "pending": "⏳ En attente",
+    "transcribing": "🎙️ Transcription en cours",
+    "storing": "💾 Enregistrement",
+    "stored": "✅ Ajoutée",
+    "duplicate": "♻️ Déjà transcrite",
+    "failed": "❌ Échec",
+}
+
+
+def _as_date(selected_date):
+    return selected_date if isinstance(selected_date, date) else selected_date[0] if selected_date else None
+
 
 def tab_new(meeting_service):
     st.header("Nouvelle réunion")
-    if st.session_state.get("reset_form", False):
-        meeting_name = st.text_input("Nom de la réunion", value=" ")
-        st.session_state["reset_form"] = False
-    else:
-        meeting_name = st.text_input("Nom de la réunion", value=st.session_state.get("meeting_name", ""))
-    selected_date = st.date_input("Date de la réunion")
-    meeting_date = selected_date if isinstance(selected_date, date) else selected_date[0] if selected_date else None
-    uploaded_file = st.file_uploader("Déposer le fichier mp3", type=["mp3"])
+    # Changer la clé du formulaire le vide après un ajout
+    form = st.session_state.setdefault("new_meeting_form", 0)
+    uploaded_files = st.file_uploader(
+        "Déposer les fichiers mp3", type=["mp3"], accept_multiple_files=True, key=f"files_{form}"
+    )
+
+    uploads = []
+    for i, uploaded_file in enumerate(uploaded_files or []):
+        col_name, col_date = st.columns([3, 1])
+        with col_name:
+            meeting_name = st.text_input(
+                f"Nom de la réunion — {uploaded_file.name}",
+                value=os.path.splitext(uploaded_file.name)[0],
+                key=f"name_{form}_{i}",
+            )
+        with col_date:
+            meeting_date = _as_date(st.date_input("Date", key=f"date_{form}_{i}"))
+        uploads.append(MeetingUpload(uploaded_file, meeting_name.strip(), meeting_date))
 
     if st.button("Ajouter", key="add_meeting"):
-        if not meeting_name:
-            st.error("Veuillez entrer un nom de réunion")
-        elif not meeting_date:
-            st.error("Veuillez sélectionner une date")
-        elif uploaded_file is None:
-            st.error("Veuillez déposer un fichier mp3")
+        if not uploads:
+            st.error("Veuillez déposer au moins un fichier mp3")
+        elif not all(upload.name for upload in uploads):
+            st.error("Veuillez entrer un nom pour chaque réunion")
+        elif not all(upload.date for upload in uploads):
+            st.error("Veuillez sélectionner une date pour chaque réunion")
         else:
+            rows = {id(upload): st.empty() for upload in uploads}
+
+            def show(upload: MeetingUpload):
+                label = f"**{upload.name}** — {STATUS_LABELS[upload.status]}"
+                if upload.seconds is not None:
+                    label += f" en {upload.seconds:.0f} s" + (" (transcription provisoire)" if upload.draft else "")
+                rows[id(upload)].markdown(f"{label} : {upload.error}" if upload.error else label)
+
+            for upload in uploads:
+                show(upload)
             with st.spinner("La transcription est en cours, veuillez patienter..."):
-                if meeting_id := meeting_service.transcribe_meeting(uploaded_file, meeting_name, meeting_date):
-                    # Réinitialiser les champs via rerun
-                    st.session_state["tabs"] = Tab.HISTORY.value
-                    st.session_state["reset_form"] = True
-                    meeting_service.sync_meetings(include_remote=True)
-                    st.rerun()
+                meeting_service.transcribe_meetings(uploads, on_progress=show)
+            if failed := [upload for upload in uploads if upload.status == "failed"]:
+                st.error(f"{len(failed)} réunion(s) sur {len(uploads)} n'ont pas pu être transcrites")
+            else:
+                # Réinitialiser le formulaire via rerun
+                st.session_state["tabs"] = Tab.HISTORY.value
+                st.session_state["new_meeting_form"] = form + 1
+                if not sync_worker_enabled():
+                    meeting_service.sync_meetings(include_remote=True, force=True)
+                st.rerun()
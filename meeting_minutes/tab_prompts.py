@@ -1,14 +1,15 @@
 import streamlit as st
-import streamlit as st
-from st_aggrid import AgGrid, GridOptionsBuilder, ColumnsAutoSizeMode
-import pandas as pd
 from sqlalchemy.orm import Session
 
 from meeting_minutes.repository import PromptRepository
+from meeting_minutes.write_queue import write
 
 
 def tab_prompts(db: Session):
     """Gestion des prompts prédéfinis."""
+    import pandas as pd
+    from st_aggrid import AgGrid, GridOptionsBuilder, ColumnsAutoSizeMode
+
     st.header("Gestion des prompts prédéfinis")
 
     # Récupérer les prompts existants
@@ -54,7 +55,7 @@ def tab_prompts(db: Session):
         with st.popover(f"Supprimer le prompt {selected_prompt_rows.iloc[0]['Nom']}"):
             st.write("Êtes-vous sûr de vouloir supprimer ce prompt ?")
             if st.button("Confirmer la suppression", key=f"delete_{prompt_id}"):
-                PromptRepository.soft_delete(db, prompt_id)
+                write(db, PromptRepository.soft_delete, prompt_id)
                 st.success("Prompt supprimé avec succès")
                 st.rerun()
 
@@ -67,7 +68,7 @@ def tab_prompts(db: Session):
 
             if st.button("Enregistrer les modifications", key=f"save_{prompt_id}"):
                 if new_name and new_prompt:
-                    PromptRepository.update(db, prompt_id, new_name, new_prompt)
+                    write(db, PromptRepository.update, prompt_id, new_name, new_prompt)
                     st.success("Prompt mis à jour avec succès")
                     st.rerun()
 
@@ -87,7 +88,7 @@ def tab_prompts(db: Session):
 
         if st.button("Ajouter le prompt"):
             if new_prompt_name and new_prompt_text:
-                PromptRepository.create(db, new_prompt_name, new_prompt_text)
+                write(db, PromptRepository.create, new_prompt_name, new_prompt_text)
                 st.success("Prompt ajouté avec succès")
                 st.session_state.new_prompt_name = ""
                 st.session_state.new_prompt_text = ""
@@ -5,3 +5,4 @@ class Tab(Enum):
     NEW_MEETING = "Nouvelle réunion"
     HISTORY = "Historique"
     PROMPTS = "Prompts prédéfinis"
+    ADMIN = "Administration"
@@ -0,0 +1,250 @@
+"""
+Streaming bulk export and import of the meeting database.
+
+Rows are read through a server-side cursor and written batch by batch, so memory use does not depend on the
+database size (except for the map of meeting IDs kept by imports).
+
+Imports merge the dump into the target database, whose IDs may already be taken by other meetings: meetings are
+upserted on their AssemblyAI transcript ID and get the ID of the target database, and the rows of the other
+tables are attached to it. Queries and prompts are inserted with new IDs, unless an identical one is already
+there; the other tables are upserted on their primary key. Importing the same dump twice is a no-op.
+
+The search index is not exported: its rows are only valid in the database they were indexed in. Rebuild the index
+of the target database after an import (`search.rebuild_index`).
+"""
+
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, insert, select
+from sqlalchemy.orm import Session
+
+from .database import Base
+from .models import Meeting, Prompt, Query, SpeakerStats, Transcript, Utterance
+from .repository import upsert_rows
+
+# Export and import order follows foreign keys, so that an import never references a missing meeting
+TABLES: Dict[str, type[Base]] = {
+    "meetings": Meeting,
+    "prompts": Prompt,
+    "transcripts": Transcript,
+    "queries": Query,
+    "speaker_stats": SpeakerStats,
+    "utterances": Utterance,
+}
+# Tables whose rows belong to a meeting (`meeting` column)
+MEETING_TABLES = ("transcripts", "queries", "speaker_stats", "utterances")
+# Columns telling whether a row imported without its ID is already in the database
+NATURAL_KEYS: Dict[str, List[str]] = {"prompts": ["name", "prompt"], "queries": ["meeting", "question", "created"]}
+FORMATS = ("jsonl", "parquet")
+DEFAULT_BATCH_SIZE = 1000
+
+
+def iter_batches(db: Session, model: type[Base], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Yield the rows of `model` as lists of dicts, streamed from a server-side cursor."""
+    table = model.__table__
+    stmt = select(table).order_by(*table.primary_key.columns)
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+    for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_parsers(model: type[Base]) -> Dict[str, Callable[[str], Any]]:
+    """Parsers turning the ISO strings of a JSONL dump back into dates."""
+    parsers: Dict[str, Callable[[str], Any]] = {}
+    for column in model.__table__.columns:
+        if isinstance(column.type, DateTime):
+            parsers[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            parsers[column.name] = date.fromisoformat
+    return parsers
+
+
+def _arrow_schema(model: type[Base]):
+    import pyarrow as pa
+
+    def arrow_type(column):
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        if isinstance(column.type, Boolean):
+            return pa.bool_()
+        if isinstance(column.type, Float):
+            return pa.float64()
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us")  # SQLite stores naive datetimes
+        if isinstance(column.type, Date):
+            return pa.date32()
+        return pa.string()
+
+    return pa.schema([(column.name, arrow_type(column)) for column in model.__table__.columns])
+
+
+def write_jsonl(batches: Iterable[List[Dict]], path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for batch in batches:
+            file.writelines(json.dumps(row, default=_json_default, ensure_ascii=False) + "\n" for row in batch)
+            count += len(batch)
+    return count
+
+
+def read_jsonl(path: str, model: type[Base], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    parsers = _json_parsers(model)
+    batch: List[Dict] = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            for name, parse in parsers.items():
+                if row.get(name) is not None:
+                    row[name] = parse(row[name])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def write_parquet(batches: Iterable[List[Dict]], path: str, model: type[Base]) -> int:
+    """Write each batch as a Parquet row group (requires `pyarrow`)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(model)
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def read_parquet(path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    import pyarrow.parquet as pq
+
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield record_batch.to_pylist()
+
+
+def _dump_path(folder: str, table: str, file_format: str) -> str:
+    return os.path.join(folder, f"{table}.{file_format}")
+
+
+def export_database(
+    db: Session,
+    folder: str,
+    file_format: str = "jsonl",
+    tables: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Export tables to `folder`, one `<table>.<format>` file per table.
+
+    Returns:
+        The number of exported rows per table.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format {file_format}, expected one of {FORMATS}")
+    os.makedirs(folder, exist_ok=True)
+    counts: Dict[str, int] = {}
+    for name in tables or TABLES:
+        model = TABLES[name]
+        batches = iter_batches(db, model, batch_size)
+        path = _dump_path(folder, name, file_format)
+        counts[name] = write_jsonl(batches, path) if file_format == "jsonl" else write_parquet(batches, path, model)
+    return counts
+
+
+def _read_dump(path: str, model: type[Base], file_format: str, batch_size: int) -> Iterator[List[Dict]]:
+    return read_jsonl(path, model, batch_size) if file_format == "jsonl" else read_parquet(path, batch_size)
+
+
+def _import_meetings(db: Session, rows: List[Dict], meeting_ids: Dict[int, int], write: bool = True) -> int:
+    """
+    Upsert meetings on their AssemblyAI transcript ID, and record the target ID of each source ID in
+    `meeting_ids`. Without `write`, only records the IDs of the meetings already in the database.
+    """
+    if write:
+        upsert_rows(db, Meeting, [{k: v for k, v in row.items() if k != "id"} for row in rows], ["remote_id"])
+    source_ids = {row["remote_id"]: row["id"] for row in rows}
+    stmt = select(Meeting.id, Meeting.remote_id).filter(Meeting.remote_id.in_(source_ids))
+    for target_id, remote_id in db.execute(stmt):
+        meeting_ids[source_ids[remote_id]] = target_id
+    return len(rows)
+
+
+def _insert_new(db: Session, model: type[Base], rows: List[Dict], keys: List[str]) -> int:
+    """Insert the rows, without their ID, that no row matches on `keys`; returns the number of rows given."""
+    rows = [{k: v for k, v in row.items() if k != "id"} for row in rows]
+    columns = [model.__table__.c[key] for key in keys]
+    stmt = select(*columns).filter(columns[0].in_({row[keys[0]] for row in rows}))
+    existing = {tuple(row) for row in db.execute(stmt)}
+    new = []
+    for row in rows:
+        key = tuple(row[key] for key in keys)
+        if key not in existing:
+            existing.add(key)
+            new.append(row)
+    if new:
+        db.execute(insert(model), new)
+    db.commit()
+    return len(rows)
+
+
+def import_database(
+    db: Session,
+    folder: str,
+    file_format: str = "jsonl",
+    tables: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Import the dumps found in `folder`, one batch per transaction.
+
+    Rows of the other tables are left out when their meeting is not in the meetings of the dump, or not in the
+    database when `meetings` is not imported.
+
+    Returns:
+        The number of imported rows per table.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format {file_format}, expected one of {FORMATS}")
+    names = [name for name in TABLES if not tables or name in tables]
+    # Target database ID of each meeting ID of the dump
+    meeting_ids: Dict[int, int] = {}
+    meetings_path = _dump_path(folder, "meetings", file_format)
+    if "meetings" not in names and set(names) & set(MEETING_TABLES) and os.path.exists(meetings_path):
+        for batch in _read_dump(meetings_path, Meeting, file_format, batch_size):
+            _import_meetings(db, batch, meeting_ids, write=False)
+    counts: Dict[str, int] = {}
+    for name in names:
+        model = TABLES[name]
+        path = _dump_path(folder, name, file_format)
+        if not os.path.exists(path):
+            continue
+        counts[name] = 0
+        for batch in _read_dump(path, model, file_format, batch_size):
+            if name == "meetings":
+                counts[name] += _import_meetings(db, batch, meeting_ids)
+                continue
+            if name in MEETING_TABLES:
+                batch = [
+                    {**row, "meeting": meeting_ids[row["meeting"]]} for row in batch if row["meeting"] in meeting_ids
+                ]
+            if not batch:
+                continue
+            if name in NATURAL_KEYS:
+                counts[name] += _insert_new(db, model, batch, NATURAL_KEYS[name])
+            else:
+                counts[name] += upsert_rows(db, model, batch)
+    return counts
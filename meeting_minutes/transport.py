@@ -0,0 +1,197 @@
+"""
+HTTP transport shared by every AssemblyAI call.
+
+It pools keep-alive connections, retries throttled or failed requests with jittered exponential backoff, adapts
+the number of concurrent requests to the provider's answers (additive increase, multiplicative decrease on 429
+and 5xx) and records latency and retry metrics per endpoint.
+"""
+
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional
+
+import httpx
+
+# Statuses meaning the request was not processed and can be sent again whatever the method
+THROTTLING_STATUSES = {429, 503}
+# Statuses retried for idempotent methods only
+SERVER_ERROR_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Errors raised before the request reached the server, retried whatever the method; after others (e.g. a read
+# timeout), a POST may already have created a transcript or LeMUR task, and sending it again would pay twice
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+_ID_SEGMENT = re.compile(r"/(?=[^/]*\d)[0-9a-zA-Z_-]{16,}(?=/|$)")
+
+
+def endpoint_name(request: httpx.Request) -> str:
+    """`METHOD /path` with resource IDs replaced by `{id}`, e.g. `GET /v2/transcript/{id}`."""
+    return f"{request.method} {_ID_SEGMENT.sub('/{id}', request.url.path)}"
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit following the provider's capacity (AIMD).
+
+    Each successful response raises the limit by `1 / limit`; a throttled or failed one halves it.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 32):
+        self.minimum = minimum
+        self.maximum = maximum
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def __enter__(self) -> "AdaptiveLimiter":
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+            self._in_flight += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self) -> None:
+        with self._condition:
+            self._limit = min(self.maximum, self._limit + 1 / self._limit)
+            self._condition.notify()
+
+    def on_throttle(self) -> None:
+        with self._condition:
+            self._limit = max(self.minimum, self._limit / 2)
+
+
+@dataclass
+class EndpointMetrics:
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    failures: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def snapshot(self) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+
+        def percentile(rank: float) -> float:
+            return latencies[min(len(latencies) - 1, int(rank * len(latencies)))] if latencies else 0.0
+
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "p50_ms": round(percentile(0.50) * 1000, 1),
+            "p95_ms": round(percentile(0.95) * 1000, 1),
+        }
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    `httpx` transport adding retries, adaptive concurrency and metrics around a pooled `HTTPTransport`.
+
+    Requests whose body is a stream (e.g. an uploaded file) cannot be replayed and are sent only once.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.BaseTransport] = None,
+        max_connections: int = 20,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        limiter: Optional[AdaptiveLimiter] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._transport = transport or httpx.HTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=30
+            )
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = limiter or AdaptiveLimiter(maximum=max_connections)
+        self._sleep = sleep
+        self._metrics: Dict[str, EndpointMetrics] = {}
+        self._metrics_lock = threading.Lock()
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Counters and latency percentiles per endpoint."""
+        with self._metrics_lock:
+            return {endpoint: metrics.snapshot() for endpoint, metrics in sorted(self._metrics.items())}
+
+    def _endpoint_metrics(self, endpoint: str) -> EndpointMetrics:
+        with self._metrics_lock:
+            return self._metrics.setdefault(endpoint, EndpointMetrics())
+
+    def _should_retry(
+        self, request: httpx.Request, status_code: Optional[int], error: Optional[httpx.TransportError]
+    ) -> bool:
+        if not isinstance(request.stream, httpx.ByteStream):
+            return False
+        if status_code in THROTTLING_STATUSES or isinstance(error, UNSENT_ERRORS):
+            return True
+        return (status_code is None or status_code in SERVER_ERROR_STATUSES) and request.method in IDEMPOTENT_METHODS
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        # "Full jitter": uniform between 0 and the exponential cap, but never before the server's `Retry-After`
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        if response is not None:
+            try:
+                delay = max(delay, min(self.backoff_max, float(response.headers["Retry-After"])))
+            except (KeyError, ValueError):
+                pass
+        return delay
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        metrics = self._endpoint_metrics(endpoint_name(request))
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            error: Optional[httpx.TransportError] = None
+            with self.limiter:
+                start = time.perf_counter()
+                try:
+                    response = self._transport.handle_request(request)
+                except httpx.TransportError as e:
+                    error = e
+                elapsed = time.perf_counter() - start
+            status_code = response.status_code if response is not None else None
+            with self._metrics_lock:
+                metrics.requests += 1
+                metrics.latencies.append(elapsed)
+                if status_code in THROTTLING_STATUSES:
+                    metrics.throttled += 1
+
+            if status_code is not None and status_code < 500 and status_code != 429:
+                self.limiter.on_success()
+                return response
+            self.limiter.on_throttle()
+            if attempt >= self.max_retries or not self._should_retry(request, status_code, error):
+                with self._metrics_lock:
+                    metrics.failures += 1
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self._backoff(attempt, response)
+            if response is not None:
+                response.close()
+            with self._metrics_lock:
+                metrics.retries += 1
+            attempt += 1
+            self._sleep(delay)
+
+    def close(self) -> None:
+        self._transport.close()
@@ -0,0 +1,263 @@
+"""
+Background worker keeping the databases in sync with AssemblyAI: `meeting-minutes worker`.
+
+Every `WORKER_INTERVAL` seconds, give or take `WORKER_JITTER` of it (so that workers started together drift apart), the
+worker merges the AssemblyAI transcripts into each database, storing the transcripts still missing, then completes the
+meetings still queued or processing. A lease row in each database lets a single worker do so at a time: the others stand
+by, and one of them takes over once the lease expires (`WORKER_LEASE_SECONDS`, three intervals by default) or is
+released on shutdown. The lease is renewed while a sync runs, which stops if it cannot be. With `SYNC_WORKER=true`, the
+interface leaves syncing to the worker and only reads the database.
+
+`GET /health` (200 or 503, with a JSON summary) and `GET /metrics` (Prometheus text format) are served on
+`WORKER_PORT`.
+"""
+
+import json
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, Optional
+
+from sqlalchemy import Engine
+
+from .database import SessionLocal
+from .repository import LeaseRepository
+from .services import MeetingService, TranscriptionService, get_transcription_service
+
+DEFAULT_INTERVAL = 60.0
+DEFAULT_JITTER = 0.1
+DEFAULT_PORT = 8081
+# Name of the lease row of the sync job
+SYNC_LEASE = "sync"
+
+
+@dataclass
+class WorkerMetrics:
+    cycles: int = 0
+    syncs: int = 0
+    failures: int = 0
+    # Syncs skipped because another worker held the lease
+    standby: int = 0
+    # Meetings found no longer pending
+    completed: int = 0
+    # Syncs aborted because their lease could not be renewed
+    lost_leases: int = 0
+    last_cycle: Optional[float] = None
+    last_success: Optional[float] = None
+    last_duration: float = 0.0
+    last_failed: bool = False
+    # Whether this worker held the lease of each workspace at the last cycle
+    leader: Dict[str, bool] = field(default_factory=dict)
+
+
+class SyncWorker:
+    """
+    Periodic remote sync of the databases returned by `engines` (by workspace name), one lease per database.
+
+    Args:
+        engines: Databases to sync, called at every cycle so that new workspaces are picked up.
+        interval: Mean seconds between two cycles.
+        jitter: Fraction of `interval` by which each wait varies at random.
+        lease_seconds: Seconds a lease lasts without renewal (default: three intervals).
+        owner: Name of this worker in the leases (default: host and process ID).
+    """
+
+    def __init__(
+        self,
+        engines: Callable[[], Dict[str, Engine]],
+        interval: float = DEFAULT_INTERVAL,
+        jitter: float = DEFAULT_JITTER,
+        lease_seconds: Optional[float] = None,
+        owner: Optional[str] = None,
+        transcription_service: Optional[TranscriptionService] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.engines = engines
+        self.interval = interval
+        self.jitter = jitter
+        self.lease_seconds = lease_seconds or 3 * interval
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.transcription_service = transcription_service or get_transcription_service()
+        self.metrics = WorkerMetrics()
+        self._rng = rng or random.Random()
+        self._stopped = threading.Event()
+
+    def run_once(self) -> None:
+        """Sync every database whose lease this worker holds or can take."""
+        start = time.monotonic()
+        failed = False
+        for name, engine in self.engines().items():
+            try:
+                failed |= not self._sync(name, engine)
+            except Exception as e:
+                # Typically the lease could not be read or written: the database is unreachable or locked
+                print(f"Worker cycle of {name} failed: {e}")
+                self.metrics.leader[name] = False
+                self.metrics.failures += 1
+                failed = True
+        self.metrics.cycles += 1
+        self.metrics.last_cycle = time.time()
+        self.metrics.last_duration = time.monotonic() - start
+        self.metrics.last_failed = failed
+        if not failed:
+            self.metrics.last_success = self.metrics.last_cycle
+
+    def _sync(self, name: str, engine: Engine) -> bool:
+        """Sync one database if this worker gets its lease; False when the sync failed."""
+        with SessionLocal(bind=engine) as db:
+            leader = LeaseRepository.acquire(db, SYNC_LEASE, self.owner, self.lease_seconds)
+            self.metrics.leader[name] = leader
+            if not leader:
+                self.metrics.standby += 1
+                return True
+            with self._renewing(name, engine) as checkpoint:
+                service = MeetingService(db, self.transcription_service, checkpoint=checkpoint)
+                try:
+                    service.sync_meetings(include_remote=True, force=True)
+                    self.metrics.completed += service.refresh_pending()
+                except Exception as e:
+                    db.rollback()
+                    print(f"Sync of {name} failed: {e}")
+                    self.metrics.failures += 1
+                    return False
+            self.metrics.syncs += 1
+            return True
+
+    @contextmanager
+    def _renewing(self, name: str, engine: Engine) -> Iterator[Callable[[], None]]:
+        """
+        Renew the lease of a database every third of its duration while the block runs, from another thread and
+        session (the sync's may be waiting for AssemblyAI, or writing).
+
+        Yields:
+            A checkpoint raising once the lease is lost: taken by another worker, or not renewed in time.
+        """
+        lost = threading.Event()
+        done = threading.Event()
+
+        def renew() -> None:
+            expires = time.monotonic() + self.lease_seconds
+            while not done.wait(self.lease_seconds / 3):
+                try:
+                    with SessionLocal(bind=engine) as db:
+                        held = LeaseRepository.acquire(db, SYNC_LEASE, self.owner, self.lease_seconds)
+                    if held:
+                        expires = time.monotonic() + self.lease_seconds
+                except Exception as e:
+                    print(f"Lease renewal of {name} failed: {e}")
+                    # Still held, unless it expires before the next attempt
+                    held = time.monotonic() + self.lease_seconds / 3 < expires
+                if not held:
+                    lost.set()
+                    return
+
+        def checkpoint() -> None:
+            if lost.is_set():
+                raise RuntimeError(f"Sync lease of {name} lost")
+
+        thread = threading.Thread(target=renew, name=f"lease-{name}", daemon=True)
+        thread.start()
+        try:
+            yield checkpoint
+        finally:
+            done.set()
+            thread.join()
+            if lost.is_set():
+                self.metrics.leader[name] = False
+                self.metrics.lost_leases += 1
+
+    def next_delay(self) -> float:
+        """Seconds until the next cycle: `interval`, give or take `jitter` of it."""
+        return self.interval * (1 + self._rng.uniform(-self.jitter, self.jitter))
+
+    def run(self) -> None:
+        """Run cycles until `stop`, then release the leases held."""
+        try:
+            while not self._stopped.is_set():
+                self.run_once()
+                self._stopped.wait(self.next_delay())
+        finally:
+            self.release()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def release(self) -> None:
+        """Release the leases held, so that a standby worker takes over at its next cycle."""
+        for name, engine in self.engines().items():
+            if self.metrics.leader.get(name):
+                with SessionLocal(bind=engine) as db:
+                    LeaseRepository.release(db, SYNC_LEASE, self.owner)
+                self.metrics.leader[name] = False
+
+    def healthy(self) -> bool:
+        """Whether the last cycle succeeded and is less than two intervals old."""
+        last_cycle = self.metrics.last_cycle
+        return (
+            last_cycle is not None
+            and not self.metrics.last_failed
+            and time.time() - last_cycle < 2 * self.interval * (1 + self.jitter)
+        )
+
+
+def render_metrics(worker: SyncWorker) -> str:
+    """Worker metrics in the Prometheus text format."""
+    metrics = worker.metrics
+    lines = []
+    for name, kind, value, help_text in (
+        ("cycles_total", "counter", metrics.cycles, "Sync cycles run"),
+        ("syncs_total", "counter", metrics.syncs, "Databases synced"),
+        ("failures_total", "counter", metrics.failures, "Failed syncs"),
+        ("standby_total", "counter", metrics.standby, "Syncs left to the worker holding the lease"),
+        ("completed_total", "counter", metrics.completed, "Meetings found no longer pending"),
+        ("lost_leases_total", "counter", metrics.lost_leases, "Syncs aborted because their lease was lost"),
+        ("last_success_timestamp_seconds", "gauge", metrics.last_success or 0, "End of the last successful cycle"),
+        ("last_cycle_duration_seconds", "gauge", metrics.last_duration, "Duration of the last cycle"),
+    ):
+        lines += [
+            f"# HELP meeting_minutes_worker_{name} {help_text}",
+            f"# TYPE meeting_minutes_worker_{name} {kind}",
+            f"meeting_minutes_worker_{name} {value}",
+        ]
+    lines += [
+        "# HELP meeting_minutes_worker_leader Whether this worker holds the sync lease of the workspace",
+        "# TYPE meeting_minutes_worker_leader gauge",
+    ]
+    lines += [
+        f'meeting_minutes_worker_leader{{workspace="{name}"}} {int(leader)}'
+        for name, leader in sorted(metrics.leader.items())
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def serve_health(worker: SyncWorker, port: int = DEFAULT_PORT, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve `/health` and `/metrics` of `worker` from a daemon thread; `shutdown()` the returned server to stop."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == "/health":
+                code = 200 if worker.healthy() else 503
+                body = json.dumps({"healthy": code == 200, "owner": worker.owner, **asdict(worker.metrics)}).encode()
+                content_type = "application/json"
+            elif self.path == "/metrics":
+                code, body, content_type = 200, render_metrics(worker).encode(), "text/plain; version=0.0.4"
+            else:
+                code, body, content_type = 404, b"Not found", "text/plain"
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="worker-health", daemon=True).start()
+    return server
@@ -0,0 +1,187 @@
+"""
+Workspaces: one database per team, so that teams do not contend on the same SQLite lock.
+
+The `default` workspace is the historical database (`DATABASE_URL` / `DB_PATH`). Other workspaces are SQLite files
+in `WORKSPACES_DIR` (default `data/workspaces`), or the databases of `WORKSPACE_DATABASE_URL` when it is set, a URL
+template containing `{workspace}`.
+
+Engines are opened on first use and kept in an LRU cache of at most `WORKSPACE_MAX_OPEN` engines; the least
+recently used one is disposed of when another has to be opened.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, create_db_engine, get_database_url, init_db
+from .write_queue import close_write_queue
+
+if TYPE_CHECKING:
+    from .search import SearchHit
+
+DEFAULT_WORKSPACE = "default"
+DEFAULT_WORKSPACES_DIR = os.path.join("data", "workspaces")
+DEFAULT_MAX_OPEN = 8
+
+_WORKSPACE_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+T = TypeVar("T")
+
+
+def validate_workspace(name: str) -> str:
+    """Workspace names are used in file names: lowercase letters, digits, `-` and `_`."""
+    if not _WORKSPACE_NAME.match(name):
+        raise ValueError(f"Invalid workspace name {name!r}: use lowercase letters, digits, '-' and '_'")
+    return name
+
+
+def get_current_workspace() -> str:
+    """Workspace selected by the `WORKSPACE` environment variable."""
+    return os.getenv("WORKSPACE", DEFAULT_WORKSPACE)
+
+
+def _workspaces_dir() -> str:
+    return os.getenv("WORKSPACES_DIR", DEFAULT_WORKSPACES_DIR)
+
+
+def workspace_url(name: str) -> str:
+    """Database URL of a workspace."""
+    if validate_workspace(name) == DEFAULT_WORKSPACE:
+        return get_database_url()
+    if template := os.getenv("WORKSPACE_DATABASE_URL"):
+        return template.format(workspace=name)
+    return f"sqlite:///{os.path.join(_workspaces_dir(), name + '.db')}"
+
+
+def workspace_exists(name: str) -> bool:
+    """Whether a workspace was created; always true with `WORKSPACE_DATABASE_URL`, whose databases are not listed."""
+    return bool(os.getenv("WORKSPACE_DATABASE_URL")) or name in list_workspaces()
+
+
+def list_workspaces() -> List[str]:
+    """The default workspace followed by the SQLite workspaces found in `WORKSPACES_DIR`, sorted by name."""
+    folder = _workspaces_dir()
+    names = set()
+    if not os.getenv("WORKSPACE_DATABASE_URL") and os.path.isdir(folder):
+        names = {file[:-3] for file in os.listdir(folder) if file.endswith(".db") and _WORKSPACE_NAME.match(file[:-3])}
+    names.discard(DEFAULT_WORKSPACE)
+    return [DEFAULT_WORKSPACE, *sorted(names)]
+
+
+class EngineCache:
+    """
+    Workspace engines, opened lazily, with at most `max_open` of them open at once.
+
+    Evicted engines are disposed of, once the writes queued for their database are committed (see
+    `write_queue.close_write_queue`): their idle connections are closed, and connections still checked out are
+    closed when returned, so sessions in progress are not interrupted.
+    """
+
+    def __init__(self, max_open: int = DEFAULT_MAX_OPEN, url: Callable[[str], str] = workspace_url):
+        self.max_open = max_open
+        self._url = url
+        self._engines: "OrderedDict[str, Engine]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Engine:
+        evicted: List[Engine] = []
+        with self._lock:
+            if name in self._engines:
+                self._engines.move_to_end(name)
+                return self._engines[name]
+            engine = create_db_engine(self._url(name))
+            init_db(engine)
+            self._engines[name] = engine
+            while len(self._engines) > self.max_open:
+                evicted.append(self._engines.popitem(last=False)[1])
+        # Outside the lock: the queued writes of the evicted databases are committed first
+        for old in evicted:
+            _close(old)
+        return engine
+
+    def open_workspaces(self) -> List[str]:
+        with self._lock:
+            return list(self._engines)
+
+    def dispose(self) -> None:
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            _close(engine)
+
+
+def _close(engine: Engine) -> None:
+    close_write_queue(engine)
+    engine.dispose()
+
+
+@lru_cache(maxsize=1)
+def get_engine_cache() -> EngineCache:
+    """Process-wide engine cache, sized by `WORKSPACE_MAX_OPEN`."""
+    return EngineCache(int(os.getenv("WORKSPACE_MAX_OPEN", DEFAULT_MAX_OPEN)))
+
+
+def get_workspace_engine(name: Optional[str] = None) -> Engine:
+    """Engine of a workspace (default: the current one), tables created on first use."""
+    return get_engine_cache().get(name or get_current_workspace())
+
+
+def get_workspace_db(name: Optional[str] = None) -> Iterator[Session]:
+    """Dependency for a database session on a workspace, whose name is available as `db.info["workspace"]`"""
+    name = name or get_current_workspace()
+    db = SessionLocal(bind=get_workspace_engine(name), info={"workspace": name})
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def map_workspaces(
+    query: Callable[[Session], T], workspaces: Optional[Sequence[str]] = None, max_workers: int = 4
+) -> Dict[str, T]:
+    """
+    Run `query` on every workspace (default: all of them), each with its own session, in parallel.
+    The workspace name is available to `query` as `db.info["workspace"]`.
+
+    Returns:
+        The result of `query` per workspace, in the order of `workspaces`.
+    """
+    workspaces = list(workspaces or list_workspaces())
+
+    def run(name: str) -> T:
+        with SessionLocal(bind=get_workspace_engine(name), info={"workspace": name}) as db:
+            return query(db)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(workspaces, executor.map(run, workspaces)))
+
+
+def export_workspaces(
+    folder: str, file_format: str = "jsonl", workspaces: Optional[Sequence[str]] = None, **options
+) -> Dict[str, Dict[str, int]]:
+    """Export each workspace to `folder/<workspace>/` (see `transfer.export_database`)."""
+    from .transfer import export_database
+
+    return map_workspaces(
+        lambda db: export_database(db, os.path.join(folder, db.info["workspace"]), file_format, **options),
+        workspaces,
+    )
+
+
+def search_workspaces(
+    question: str, k: int = 10, workspaces: Optional[Sequence[str]] = None
+) -> List[Tuple[str, "SearchHit"]]:
+    """Best `k` passages across workspaces, as `(workspace, hit)` pairs by decreasing score."""
+    from .search import search_meetings
+
+    results = map_workspaces(lambda db: search_meetings(db, [question], k)[0], workspaces)
+    hits = [(workspace, hit) for workspace, workspace_hits in results.items() for hit in workspace_hits]
+    return sorted(hits, key=lambda item: item[1].score, reverse=True)[:k]
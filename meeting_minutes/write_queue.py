@@ -0,0 +1,196 @@
+"""
+Optional single-writer path for repository writes (`DB_WRITE_QUEUE=true`).
+
+Writes are handed to one thread per database, which runs those arriving close together in a single database
+transaction (group commit): one lock acquisition and one fsync for the whole group instead of one per write.
+Engines opened again on a database share its queue; close it with `close_write_queue` before disposing of the
+engine (`workspaces.EngineCache` does so for the workspaces it evicts).
+
+Each write runs in its own session joined to the group's transaction with a savepoint, so the `commit()` calls of
+the repositories only release their savepoint, and a failing write is rolled back alone. Callers get a `Future`,
+resolved once the group is committed.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import Connection, Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+T = TypeVar("T")
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_DELAY = 0.005  # seconds waited for more writes once one is queued
+
+_Write = Tuple[Callable[..., Any], tuple, dict, Future]
+
+
+class WriteQueue:
+    """
+    Writer thread running `operation(db, *args, **kwargs)` calls in group-committed transactions.
+
+    Args:
+        engine: Database written to.
+        max_batch: Maximum number of writes per transaction.
+        max_delay: Seconds to wait for more writes before committing a group.
+    """
+
+    def __init__(self, engine: Engine, max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = DEFAULT_MAX_DELAY):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.transactions = 0
+        self.writes = 0
+        self._queue: "queue.SimpleQueue[Optional[_Write]]" = queue.SimpleQueue()
+        # Objects returned by the repositories stay readable once their session is closed
+        self._sessions = sessionmaker(
+            autoflush=False, expire_on_commit=False, join_transaction_mode="create_savepoint"
+        )
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def submit(self, operation: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """Queue `operation(db, *args, **kwargs)`; the future holds its result once committed."""
+        if self._closed:
+            raise RuntimeError("Write queue is closed")
+        future: "Future[T]" = Future()
+        self._queue.put((operation, args, kwargs, future))
+        return future
+
+    def close(self) -> None:
+        """Commit the queued writes and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+
+    def _next_group(self) -> Tuple[List[_Write], bool]:
+        group = [self._queue.get()]
+        if group[0] is None:
+            return [], True
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch:
+            try:
+                write = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if write is None:
+                return group, True
+            group.append(write)
+        return group, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            group, stop = self._next_group()
+            if group:
+                self._commit_group(group)
+
+    def _commit_group(self, group: List[_Write]) -> None:
+        results: List[Tuple[Future, Any, Optional[BaseException]]] = []
+        try:
+            with self.engine.connect() as conn:
+                with conn.begin():
+                    if conn.dialect.name == "sqlite":
+                        # Write lock first: a group upgrading from reads would fail at once while another writes
+                        conn.exec_driver_sql("BEGIN IMMEDIATE")
+                    for operation, args, kwargs, future in group:
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        with self._sessions(bind=conn) as db:
+                            try:
+                                results.append((future, operation(db, *args, **kwargs), None))
+                            except Exception as e:
+                                db.rollback()
+                                results.append((future, None, e))
+        except Exception as e:
+            # The group could not be committed: none of its writes happened
+            for _, _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.transactions += 1
+        self.writes += len(results)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+def write_queue_enabled() -> bool:
+    return os.getenv("DB_WRITE_QUEUE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+# Write queues by database URL
+_queues: Dict[str, WriteQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def _database(engine: Engine) -> str:
+    return engine.url.render_as_string(hide_password=False)
+
+
+def get_write_queue(engine: Engine) -> WriteQueue:
+    """Write queue of the database of `engine`, started on first use."""
+    with _queues_lock:
+        queue = _queues.get(_database(engine))
+        if queue is None or queue.closed:
+            queue = _queues[_database(engine)] = WriteQueue(engine)
+        return queue
+
+
+def close_write_queue(engine: Engine) -> None:
+    """Commit the queued writes to the database of `engine` and stop its writer thread, if it has one."""
+    with _queues_lock:
+        queue = _queues.pop(_database(engine), None)
+    if queue is not None:
+        queue.close()
+
+
+def _queueable(db: Session) -> bool:
+    """
+    Whether the writes of `db` can go through a write queue. They cannot when `db` is bound to a connection (its
+    transaction is committed by its owner, e.g. a write queue or a batch of uploads, which waiting for the queue
+    would deadlock), to an in-memory SQLite database (private to its engine), or to an async driver (which only
+    runs in its event loop).
+    """
+    bind = db.get_bind()
+    if isinstance(bind, Connection) or bind.dialect.is_async:
+        return False
+    return not (bind.url.get_backend_name() == "sqlite" and bind.url.database in (None, "", ":memory:"))
+
+
+def _holds_write_lock(db: Session) -> bool:
+    """Whether the open transaction of `db` has written to its SQLite database, locking it until it ends."""
+    if not db.in_transaction():
+        return False
+    connection = db.connection()
+    return connection.dialect.name == "sqlite" and connection.connection.driver_connection.in_transaction
+
+
+def write(db: Session, operation: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run the repository write `operation(db, *args, **kwargs)`.
+
+    With `DB_WRITE_QUEUE` enabled it goes through the write queue of the session's database instead, in a session
+    of the queue, and this waits for its group to be committed. The session must not have written in its open
+    transaction then (e.g. within a `unit_of_work`): the queue would wait for its lock, and this for the queue.
+
+    Raises:
+        RuntimeError: The write is queued while the session holds the write lock of its SQLite database.
+    """
+    if not write_queue_enabled() or not _queueable(db):
+        return operation(db, *args, **kwargs)
+    if _holds_write_lock(db):
+        raise RuntimeError("Cannot queue a write while the session has uncommitted writes: commit them first")
+    return get_write_queue(db.get_bind()).submit(operation, *args, **kwargs).result()
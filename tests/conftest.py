@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from meeting_minutes.database import create_db_engine, init_db
+from meeting_minutes.services import reset_assemblyai
+from tests.fake_assemblyai import FakeAssemblyAI
+
+
+@pytest.fixture
+def fake_assemblyai(monkeypatch):
+    """Local AssemblyAI stand-in, with the environment pointing the SDK at it."""
+    with FakeAssemblyAI() as fake:
+        monkeypatch.setenv("ASSEMBLYAI_API_KEY", "test-key")
+        monkeypatch.setenv("ASSEMBLYAI_BASE_URL", fake.base_url)
+        monkeypatch.setenv("ASSEMBLYAI_BACKOFF_BASE", "0.01")
+        reset_assemblyai()
+        yield fake
+    reset_assemblyai()
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    """SQLite database file in the test folder, with the current schema."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'meetings.db'}")
+    init_db(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def file_sessions(file_engine):
+    """Session factory of `file_engine`, for tests opening several sessions (e.g. one per thread)."""
+    return sessionmaker(bind=file_engine)
+
+
+@pytest.fixture
+def file_db(file_sessions):
+    """Session on `file_engine`."""
+    with file_sessions() as db:
+        yield db
+
+
+@pytest.fixture(autouse=True)
+def no_call_ledger(monkeypatch):
+    """Keep the calls of the shared `TranscriptionService` out of the ledger of the default database."""
+    monkeypatch.setenv("CALL_LEDGER", "false")
@@ -0,0 +1,312 @@
+"""
+Local stand-in for the subset of the AssemblyAI REST API used by the application.
+
+Point `ASSEMBLYAI_BASE_URL` (or `aai.settings.base_url`) at `FakeAssemblyAI.base_url` to exercise the real SDK
+without network access, e.g. in tests or for local load testing. Transcripts submitted with a `webhook_url` get a
+completion event posted to it once processed, like AssemblyAI does.
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_UTTERANCES = [
+    {"speaker": "A", "text": "Bonjour à tous, commençons la réunion.", "start": 0, "end": 2500},
+    {"speaker": "B", "text": "Merci. Le premier point concerne le budget.", "start": 2600, "end": 6000},
+    {"speaker": "A", "text": "Très bien, passons au planning.", "start": 6100, "end": 8000},
+]
+
+
+def _utterance(utterance: Dict[str, Any]) -> Dict[str, Any]:
+    words = utterance["text"].split()
+    step = (utterance["end"] - utterance["start"]) // max(len(words), 1)
+    return {
+        **utterance,
+        "confidence": 0.9,
+        "words": [
+            {
+                "text": word,
+                "start": utterance["start"] + i * step,
+                "end": utterance["start"] + (i + 1) * step,
+                "confidence": 0.9,
+                "speaker": utterance["speaker"],
+            }
+            for i, word in enumerate(words)
+        ],
+    }
+
+
+class FakeAssemblyAI:
+    """
+    Threaded HTTP server answering like AssemblyAI.
+
+    Args:
+        processing_delay: Seconds a transcript stays `processing` before it is `completed`.
+        processing_delays: Processing delay per speech model (e.g. `{"nano": 0.1, "best": 1}`), overriding
+            `processing_delay`.
+        latency: Seconds added to every response.
+        utterances: Utterances returned for every completed transcript.
+        max_concurrency: Requests beyond this number of concurrent requests are throttled (429).
+    """
+
+    def __init__(
+        self,
+        processing_delay: float = 0.0,
+        latency: float = 0.0,
+        utterances: Optional[List[Dict[str, Any]]] = None,
+        max_concurrency: Optional[int] = None,
+        processing_delays: Optional[Dict[str, float]] = None,
+    ):
+        self.processing_delay = processing_delay
+        self.processing_delays = processing_delays or {}
+        self.latency = latency
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.faults: deque = deque()
+        self.disconnects = 0
+        self.utterances = utterances if utterances is not None else DEFAULT_UTTERANCES
+        self.transcripts: Dict[str, Dict[str, Any]] = {}
+        self.uploads: Dict[str, bytes] = {}
+        self.webhook_deliveries: List[tuple] = []
+        self.requests: Counter = Counter()
+        self.lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAssemblyAI":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _dispatch(self, method: str) -> None:
+                if self.headers.get("Transfer-Encoding") == "chunked":
+                    body = b""
+                    while size := int(self.rfile.readline().split(b";")[0], 16):
+                        body += self.rfile.read(size)
+                        self.rfile.readline()
+                    self.rfile.readline()
+                else:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = self.rfile.read(length) if length else b""
+                url = urlparse(self.path)
+                with fake.lock:
+                    fake.requests[f"{method} {fake.route(url.path)}"] += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    throttled = fake.max_concurrency is not None and fake.in_flight > fake.max_concurrency
+                    fault = fake.faults.popleft() if fake.faults and not throttled else None
+                    disconnect = fake.disconnects > 0 and not throttled and not fault
+                    if disconnect:
+                        fake.disconnects -= 1
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    if throttled:
+                        code, payload = 429, {"error": "Too many concurrent requests"}
+                    elif fault:
+                        code, payload = fault, {"error": "Injected fault"}
+                    else:
+                        code, payload = fake.handle(method, url.path, parse_qs(url.query), body)
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+                if disconnect:
+                    # Processed, but the client never gets the answer
+                    self.close_connection = True
+                    return
+                raw = isinstance(payload, bytes)
+                data = payload if raw else json.dumps(payload).encode()
+                self.send_response(code)
+                if code == 429:
+                    self.send_header("Retry-After", "0")
+                self.send_header("Content-Type", "audio/mpeg" if raw else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "FakeAssemblyAI":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def inject(self, status_code: int, count: int = 1) -> None:
+        """Answer the next `count` requests with `status_code`."""
+        with self.lock:
+            self.faults.extend([status_code] * count)
+
+    def inject_disconnect(self, count: int = 1) -> None:
+        """Process the next `count` requests, then close their connection without answering."""
+        with self.lock:
+            self.disconnects += count
+
+    @staticmethod
+    def route(path: str) -> str:
+        """Path with transcript IDs replaced by `{id}`, used to count requests per endpoint."""
+        parts = path.rstrip("/").split("/")
+        if len(parts) > 3 and parts[1:3] == ["v2", "transcript"]:
+            parts[3] = "{id}"
+        return "/".join(parts)
+
+    def add_transcript(
+        self, audio_url: str = "https://example.com/audio.mp3", transcript_id: Optional[str] = None, **fields: Any
+    ) -> str:
+        transcript_id = transcript_id or uuid.uuid4().hex
+        with self.lock:
+            self.transcripts[transcript_id] = {
+                "id": transcript_id,
+                "audio_url": audio_url,
+                "created": datetime.now(timezone.utc).isoformat(),
+                "submitted_at": time.monotonic(),
+                **fields,
+            }
+        return transcript_id
+
+    def send_webhook(self, transcript_id: str, status: str = "completed") -> int:
+        """Post a completion event to the `webhook_url` of a transcript and return the HTTP status received."""
+        with self.lock:
+            stored = dict(self.transcripts[transcript_id])
+        headers = {"Content-Type": "application/json"}
+        if stored.get("webhook_auth_header_name"):
+            headers[stored["webhook_auth_header_name"]] = stored.get("webhook_auth_header_value") or ""
+        request = urllib.request.Request(
+            stored["webhook_url"],
+            data=json.dumps({"transcript_id": transcript_id, "status": status}).encode(),
+            headers=headers,
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                code = response.status
+        except urllib.error.HTTPError as e:
+            code = e.code
+        with self.lock:
+            self.webhook_deliveries.append((transcript_id, code))
+        return code
+
+    def delay_of(self, stored: Dict[str, Any]) -> float:
+        """Processing delay of a stored transcript, from its speech model."""
+        return self.processing_delays.get(stored.get("speech_model"), self.processing_delay)
+
+    def _schedule_webhook(self, transcript_id: str) -> None:
+        with self.lock:
+            delay = self.delay_of(self.transcripts[transcript_id])
+        timer = threading.Timer(delay, self.send_webhook, args=(transcript_id,))
+        timer.daemon = True
+        timer.start()
+
+    def _transcript(self, transcript_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            stored = self.transcripts.get(transcript_id)
+        if stored is None:
+            return None
+        completed = time.monotonic() - stored["submitted_at"] >= self.delay_of(stored)
+        utterances = [_utterance(u) for u in self.utterances] if completed else None
+        return {
+            "id": stored["id"],
+            "audio_url": stored["audio_url"],
+            "status": "completed" if completed else "processing",
+            "text": " ".join(u["text"] for u in self.utterances) if completed else None,
+            "utterances": utterances,
+            "words": [w for u in utterances for w in u["words"]] if utterances else None,
+            "audio_duration": self.utterances[-1]["end"] // 1000 if completed and self.utterances else None,
+            "speech_model": stored.get("speech_model"),
+            "language_detection": stored.get("language_detection"),
+            "speaker_labels": stored.get("speaker_labels"),
+            "webhook_url": stored.get("webhook_url"),
+        }
+
+    def handle(self, method: str, path: str, params: Dict[str, List[str]], body: bytes):
+        parts = path.rstrip("/").split("/")
+        if method == "POST" and path == "/v2/upload":
+            upload_id = uuid.uuid4().hex
+            with self.lock:
+                self.uploads[upload_id] = body
+            return 200, {"upload_url": f"{self.base_url}/cdn/{upload_id}"}
+        if method == "GET" and len(parts) == 3 and parts[1] == "cdn":
+            with self.lock:
+                audio = self.uploads.get(parts[2])
+            return (200, audio) if audio is not None else (404, {"error": "Upload not found"})
+        if path == "/v2/transcript":
+            if method == "POST":
+                request = json.loads(body or b"{}")
+                transcript_id = self.add_transcript(**request)
+                if request.get("webhook_url"):
+                    self._schedule_webhook(transcript_id)
+                return 200, self._transcript(transcript_id)
+            with self.lock:
+                items = list(self.transcripts.values())
+            return 200, {
+                "page_details": {
+                    "current_url": path,
+                    "limit": len(items),
+                    "result_count": len(items),
+                    "prev_url": None,
+                    "next_url": None,
+                },
+                "transcripts": [
+                    {
+                        "id": t["id"],
+                        "audio_url": t["audio_url"],
+                        "created": t["created"],
+                        "resource_url": f"{path}/{t['id']}",
+                        "status": self._transcript(t["id"])["status"],
+                    }
+                    for t in items
+                ],
+            }
+        if len(parts) == 4 and parts[1:3] == ["v2", "transcript"]:
+            transcript_id = parts[3]
+            if method == "DELETE":
+                with self.lock:
+                    if transcript_id in self.transcripts:
+                        self.transcripts[transcript_id]["audio_url"] = "http://deleted_by_user"
+            if transcript := self._transcript(transcript_id):
+                return 200, transcript
+            return 404, {"error": "Transcript not found"}
+        if method == "POST" and path.startswith("/lemur/v3/generate/"):
+            request = json.loads(body or b"{}")
+            return 200, {
+                "request_id": uuid.uuid4().hex,
+                "response": f"Réponse à : {request.get('prompt', '')}",
+                "usage": {"input_tokens": 100, "output_tokens": 20},
+            }
+        return 404, {"error": f"Unknown endpoint {method} {path}"}
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from meeting_minutes.analytics import compute_speaker_stats
+
+
+def _utterance(speaker, start, end, text):
+    return SimpleNamespace(speaker=speaker, start=start, end=end, text=text, words=None)
+
+
+def test_compute_speaker_stats():
+    # Arrange
+    utterances = [
+        _utterance("A", 0, 30_000, "un deux trois quatre"),
+        _utterance("A", 30_000, 60_000, "cinq six"),
+        _utterance("B", 55_000, 85_000, "sept huit neuf"),  # starts before A has finished
+        _utterance("A", 90_000, 120_000, "dix"),
+    ]
+
+    # Act
+    stats = {row["speaker"]: row for row in compute_speaker_stats(utterances)}
+
+    # Assert
+    assert stats["A"] == {
+        "speaker": "A",
+        "talk_time_ms": 90_000,
+        "turns": 2,
+        "interruptions": 0,
+        "words": 7,
+        "words_per_minute": 4.7,
+    }
+    assert stats["B"]["talk_time_ms"] == 30_000
+    assert stats["B"]["turns"] == 1
+    assert stats["B"]["interruptions"] == 1
+    assert stats["B"]["words_per_minute"] == 6.0
+
+
+def test_compute_speaker_stats_empty():
+    assert compute_speaker_stats([]) == []
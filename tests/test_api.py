@@ -0,0 +1,227 @@
+import io
+import socket
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from meeting_minutes.api import create_app
+from meeting_minutes.database import SessionLocal
+from meeting_minutes.models import Meeting, Prompt, Transcript
+from meeting_minutes.repository import MeetingRepository
+from meeting_minutes.services import WEBHOOK_AUTH_HEADER, TranscriptionService, reset_assemblyai
+from meeting_minutes.workspaces import get_engine_cache, get_workspace_engine
+
+
+@pytest.fixture
+def database_url(file_engine, file_db, fake_assemblyai):
+    fake_assemblyai.add_transcript(transcript_id="m1")
+    file_db.add(Meeting(id=1, remote_id="m1", name="Budget", created=datetime(2025, 1, 6, 10), status="completed"))
+    file_db.add(Transcript(meeting=1, text="Hello", transcript="[Speaker A] Hello"))
+    file_db.add(Prompt(name="Résumé", prompt="Résume la réunion"))
+    file_db.commit()
+    return file_engine.url.render_as_string(hide_password=False)
+
+
+@pytest.fixture
+def client(database_url, fake_assemblyai):
+    with TestClient(create_app(database_url)) as client:
+        yield client
+
+
+def test_list_and_get_meetings(client):
+    # Act
+    meetings = client.get("/meetings").json()
+    meeting = client.get("/meetings/1").json()
+
+    # Assert
+    assert [(m["id"], m["remote_id"]) for m in meetings] == [(1, "m1")]
+    assert meeting["name"] == "Budget"
+    assert client.get("/meetings/999").status_code == 404
+
+
+def test_get_transcript(client):
+    # Act
+    response = client.get("/meetings/1/transcript")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["transcript"] == "[Speaker A] Hello"
+
+
+def test_ask_question_and_run_prompt(client, fake_assemblyai):
+    # Act
+    asked = client.post("/meetings/1/queries", json={"question": "Quel budget ?"})
+    prompt_id = client.get("/prompts").json()[0]["id"]
+    prompted = client.post(f"/meetings/1/prompts/{prompt_id}")
+
+    # Assert
+    assert asked.status_code == 201
+    assert asked.json()["answer"] == "Réponse à : Quel budget ?"
+    assert prompted.json()["question"] == "Résume la réunion"
+    assert {q["id"] for q in client.get("/meetings/1/queries").json()} == {asked.json()["id"], prompted.json()["id"]}
+    assert fake_assemblyai.requests["POST /lemur/v3/generate/task"] == 2
+
+
+def test_submit_meeting(client, fake_assemblyai):
+    # Act
+    response = client.post(
+        "/meetings",
+        files={"file": ("meeting.mp3", io.BytesIO(b"ID3fake"), "audio/mpeg")},
+        data={"name": "Upload", "meeting_date": "2025-01-07"},
+    )
+
+    # Assert
+    assert response.status_code == 202
+    meeting = response.json()
+    assert meeting["remote_id"] in fake_assemblyai.transcripts
+    assert meeting["date"] == "2025-01-07"
+    assert fake_assemblyai.requests["POST /v2/upload"] == 1
+
+
+def test_submit_duplicate_meeting(client, fake_assemblyai):
+    # Arrange
+    upload = {"files": {"file": ("meeting.mp3", io.BytesIO(b"ID3fake"), "audio/mpeg")}, "data": {"name": "Upload"}}
+    first = client.post("/meetings", **upload)
+
+    # Act
+    upload["files"]["file"][1].seek(0)
+    second = client.post("/meetings", **upload)
+
+    # Assert
+    assert second.status_code == 200
+    assert second.json()["id"] == first.json()["id"]
+    assert fake_assemblyai.requests["POST /v2/transcript"] == 1
+
+
+def test_delete_meeting(client, fake_assemblyai):
+    # Act
+    response = client.delete("/meetings/1")
+
+    # Assert
+    assert response.status_code == 204
+    assert client.get("/meetings/1").status_code == 404
+    assert client.get("/meetings?include_deleted=true").json()[0]["deleted"] is not None
+
+
+def test_delete_drafted_meeting(client, fake_assemblyai, file_db):
+    # Arrange
+    for remote_id in ("final", "draft"):
+        fake_assemblyai.add_transcript(transcript_id=remote_id)
+    meeting = MeetingRepository.insert_or_update(
+        file_db, "final", "Réunion", None, None, "processing", draft_id="draft"
+    )
+
+    # Act
+    response = client.delete(f"/meetings/{meeting.id}")
+    client.post("/webhooks/assemblyai", json={"transcript_id": "final", "status": "completed"})
+
+    # Assert
+    assert response.status_code == 204
+    assert {fake_assemblyai.transcripts[remote_id]["audio_url"] for remote_id in ("final", "draft")} == {
+        "http://deleted_by_user"
+    }
+    deleted = next(m for m in client.get("/meetings?include_deleted=true").json() if m["remote_id"] == "final")
+    assert deleted["status"] == "processing"
+    assert client.get(f"/meetings/{meeting.id}/transcript").status_code == 404
+
+
+def test_transcript_webhook(client, fake_assemblyai, file_db, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("ASSEMBLYAI_WEBHOOK_SECRET", "s3cret")
+    fake_assemblyai.add_transcript(transcript_id="w1")
+    fake_assemblyai.add_transcript(
+        transcript_id="elsewhere", webhook_url="https://minutes.example.com/webhooks/assemblyai?workspace=team-a"
+    )
+    MeetingRepository.insert_or_update(file_db, "w1", "Réunion", None, None, "queued")
+    event = {"transcript_id": "w1", "status": "completed"}
+    headers = {WEBHOOK_AUTH_HEADER: "s3cret"}
+
+    # Act
+    rejected = client.post("/webhooks/assemblyai", json=event, headers={WEBHOOK_AUTH_HEADER: "wrong"})
+    accepted = client.post("/webhooks/assemblyai", json=event, headers=headers)
+    replayed = client.post("/webhooks/assemblyai", json=event, headers=headers)
+    foreign = client.post("/webhooks/assemblyai", json={**event, "transcript_id": "elsewhere"}, headers=headers)
+
+    # Assert
+    assert rejected.status_code == 401
+    assert accepted.status_code == replayed.status_code == foreign.status_code == 204
+    meetings = {m["remote_id"]: m for m in client.get("/meetings").json()}
+    assert sorted(meetings) == ["m1", "w1"]
+    assert meetings["w1"]["status"] == "completed"
+    transcript = client.get(f"/meetings/{meetings['w1']['id']}/transcript").json()["transcript"]
+    assert transcript.startswith("[Speaker A] Bonjour")
+
+
+def test_transcript_webhook_of_another_workspace(client, fake_assemblyai, tmp_path, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("WORKSPACES_DIR", str(tmp_path / "workspaces"))
+    monkeypatch.setenv("ASSEMBLYAI_WEBHOOK_URL", "https://minutes.example.com/webhooks/assemblyai")
+    get_engine_cache.cache_clear()
+    fake_assemblyai.add_transcript(transcript_id="t1")
+    with SessionLocal(bind=get_workspace_engine("team-a")) as db:
+        MeetingRepository.insert_or_update(db, "t1", "Équipe A", None, None, "queued")
+    event = {"transcript_id": "t1", "status": "completed"}
+
+    # Act
+    webhook_url = TranscriptionService._config(workspace="team-a").webhook_url
+    routed = client.post("/webhooks/assemblyai?workspace=team-a", json=event)
+    unknown = client.post("/webhooks/assemblyai?workspace=team-b", json=event)
+    invalid = client.post("/webhooks/assemblyai?workspace=../escape", json=event)
+    with SessionLocal(bind=get_workspace_engine("team-a")) as db:
+        meeting = MeetingRepository.get_by_remote_id(db, "t1")
+    get_engine_cache().dispose()
+    get_engine_cache.cache_clear()
+
+    # Assert
+    assert webhook_url == "https://minutes.example.com/webhooks/assemblyai?workspace=team-a"
+    assert routed.status_code == unknown.status_code == 204 and invalid.status_code == 400
+    assert meeting.status == "completed"
+    assert [m["remote_id"] for m in client.get("/meetings").json()] == ["m1"]
+    assert not (tmp_path / "workspaces" / "team-b.db").exists()
+
+
+@pytest.fixture
+def api_server(database_url, fake_assemblyai, monkeypatch):
+    """The API served over HTTP, registered as the webhook receiver of new transcripts."""
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    monkeypatch.setenv("ASSEMBLYAI_WEBHOOK_URL", f"{base_url}/webhooks/assemblyai")
+    monkeypatch.setenv("ASSEMBLYAI_WEBHOOK_SECRET", "s3cret")
+    reset_assemblyai()
+    server = uvicorn.Server(uvicorn.Config(create_app(database_url), log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield base_url
+    server.should_exit = True
+    thread.join()
+
+
+def test_webhook_completes_submitted_meeting(api_server, fake_assemblyai):
+    # Arrange
+    import httpx
+
+    fake_assemblyai.processing_delay = 0.2
+
+    # Act
+    with httpx.Client(base_url=api_server) as http:
+        upload = {"file": ("meeting.mp3", io.BytesIO(b"ID3webhook"), "audio/mpeg")}
+        submitted = http.post("/meetings", files=upload, data={"name": "Hook"}).json()
+        deadline = time.monotonic() + 5
+        while http.get(f"/meetings/{submitted['id']}").json()["status"] != "completed":
+            assert time.monotonic() < deadline, "webhook not received"
+            time.sleep(0.05)
+        transcript = http.get(f"/meetings/{submitted['id']}/transcript")
+
+    # Assert
+    assert submitted["status"] == "processing"
+    assert fake_assemblyai.webhook_deliveries == [(submitted["remote_id"], 204)]
+    assert transcript.status_code == 200
+    assert fake_assemblyai.requests["GET /v2/transcript/{id}"] == 1
@@ -0,0 +1,64 @@
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from meeting_minutes.ledger import LedgerWriter
+from meeting_minutes.models import CallLedger
+from meeting_minutes.repository import CallLedgerRepository
+from meeting_minutes.services import TranscriptionService
+
+
+def test_batched_entries_and_rollup(file_engine, file_sessions):
+    # Arrange
+    ledger = LedgerWriter(file_engine, batch_size=100, flush_seconds=5)
+    old = datetime(2024, 1, 1)
+
+    # Act
+    for duration in range(1, 201):
+        ledger.record("transcribe", duration, audio_seconds=60.0)
+    for i in range(1, 51):
+        ledger.record("lemur", 10 * i, input_tokens=100, output_tokens=20, **({"outcome": "error"} if i > 45 else {}))
+    ledger.record("upload", 5000, created=old)
+    ledger.flush()
+    db = file_sessions()
+    rollups = {rollup.operation: rollup for rollup in CallLedgerRepository.rollup(db)}
+    recent = CallLedgerRepository.rollup(db, since=old + timedelta(days=1))
+    ledger.close()
+
+    # Assert
+    assert (ledger.batches, ledger.written, ledger.dropped) == (3, 251, 0)
+    transcribe, lemur = rollups["transcribe"], rollups["lemur"]
+    assert (transcribe.calls, transcribe.p50_ms, transcribe.p95_ms, transcribe.max_ms) == (200, 100, 190, 200)
+    assert transcribe.audio_seconds == 12000
+    assert (lemur.calls, lemur.failures, lemur.p50_ms, lemur.p95_ms) == (50, 5, 250, 480)
+    assert (lemur.input_tokens, lemur.output_tokens) == (5000, 1000)
+    assert [rollup.operation for rollup in recent] == ["lemur", "transcribe"]
+    assert [call.duration_ms for call in CallLedgerRepository.recent_failures(db, limit=2)] == [500, 490]
+
+
+def test_transcription_service_records_its_calls(fake_assemblyai, file_engine, file_sessions):
+    # Arrange
+    ledger = LedgerWriter(file_engine, flush_seconds=5)
+    service = TranscriptionService(ledger=ledger)
+
+    # Act
+    transcript = service.transcribe_audio(io.BytesIO(b"ID3 audio"), webhook=False)
+    answer = service.lemur_task(transcript.id, "Résume")
+    fake_assemblyai.inject(500, count=50)
+    with pytest.raises(Exception):
+        service.lemur_task(transcript.id, "Liste les actions")
+    ledger.close()
+
+    # Assert
+    calls = file_sessions().query(CallLedger).order_by(CallLedger.id).all()
+    assert [(call.operation, call.remote_id, call.outcome) for call in calls] == [
+        ("transcribe", transcript.id, "ok"),
+        ("lemur", transcript.id, "ok"),
+        ("lemur", transcript.id, "error"),
+    ]
+    assert calls[0].audio_seconds == transcript.audio_duration
+    assert (calls[1].prompt_chars, calls[1].answer_chars) == (6, len(answer))
+    assert (calls[1].input_tokens, calls[1].output_tokens) == (100, 20)
+    assert calls[2].error and calls[2].answer_chars is None
+    assert all(call.duration_ms >= 0 for call in calls)
@@ -0,0 +1,96 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from meeting_minutes.database import create_db_engine, init_db
+from meeting_minutes.migrations import IntegerKeyMigration, migrate_integer_keys
+from meeting_minutes.repository import MeetingRepository, QueryRepository, TranscriptRepository
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE meetings (id VARCHAR(255) PRIMARY KEY, name TEXT NOT NULL, date DATE, created DATETIME, "
+    "status TEXT, deleted DATETIME, content_hash VARCHAR(64))",
+    "CREATE INDEX ix_meetings_content_hash ON meetings (content_hash)",
+    "CREATE TABLE transcripts (meeting VARCHAR(255) PRIMARY KEY REFERENCES meetings (id), text TEXT NOT NULL, "
+    "transcript TEXT NOT NULL, deleted DATETIME)",
+    "CREATE TABLE queries (id INTEGER PRIMARY KEY, meeting VARCHAR(255) NOT NULL REFERENCES meetings (id), "
+    "question TEXT NOT NULL, answer TEXT NOT NULL, created DATETIME NOT NULL, deleted DATETIME)",
+]
+
+
+def _legacy_engine(tmp_path, meetings):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+        for i in range(meetings):
+            remote_id = f"transcript-{i:04d}"
+            conn.execute(
+                text("INSERT INTO meetings (id, name) VALUES (:id, :name)"), {"id": remote_id, "name": f"M{i}"}
+            )
+            conn.execute(
+                text("INSERT INTO transcripts (meeting, text, transcript) VALUES (:id, 'texte', '[Speaker A] texte')"),
+                {"id": remote_id},
+            )
+            _ask(conn, remote_id, f"Question {i}")
+    return engine
+
+
+def _ask(conn, remote_id, question):
+    conn.execute(
+        text("INSERT INTO queries (meeting, question, answer, created) VALUES (:id, :q, 'R', '2025-01-06 10:00:00')"),
+        {"id": remote_id, "q": question},
+    )
+
+
+def test_online_migration_keeps_concurrent_writes(tmp_path):
+    # Arrange
+    engine = _legacy_engine(tmp_path, meetings=10)
+
+    # Act
+    with engine.connect() as conn:
+        migration = IntegerKeyMigration(conn, batch_size=3)
+        migration.start()
+        migration.copy()
+        # The application keeps writing to the old tables while rows are copied
+        with engine.begin() as app:
+            app.execute(text("UPDATE meetings SET name = 'Renommée' WHERE id = 'transcript-0002'"))
+            _ask(app, "transcript-0002", "Question tardive")
+            app.execute(text("INSERT INTO meetings (id, name) VALUES ('transcript-late', 'Nouvelle')"))
+            app.execute(text("DELETE FROM transcripts WHERE meeting = 'transcript-0005'"))
+            _ask(app, "transcript-gone", "Orpheline")
+        caught_up = migration.catch_up()
+        migration.finish()
+
+    # Assert
+    assert caught_up == 4
+    assert migration.copied == {"meetings": 10, "transcripts": 10, "queries": 10}
+    db = sessionmaker(bind=engine)()
+    renamed = MeetingRepository.get_by_remote_id(db, "transcript-0002")
+    assert isinstance(renamed.id, int) and renamed.name == "Renommée"
+    assert sorted(q.question for q in QueryRepository.get_by_meeting(db, renamed.id).values()) == [
+        "Question 2",
+        "Question tardive",
+    ]
+    assert MeetingRepository.get_by_remote_id(db, "transcript-late").name == "Nouvelle"
+    assert TranscriptRepository.get_transcript(db, MeetingRepository.get_by_remote_id(db, "transcript-0005").id) is None
+    assert len(TranscriptRepository.get_all(db)) == 9
+    # Queries of meetings that never existed are not carried over
+    assert db.execute(text("SELECT COUNT(*) FROM queries")).scalar() == 11
+    inspector = inspect(engine)
+    assert {"_new_meetings", "_migration_changes"}.isdisjoint(inspector.get_table_names())
+    assert "ix_meetings_content_hash" in {index["name"] for index in inspector.get_indexes("meetings")}
+    assert {fk["referred_table"] for fk in inspector.get_foreign_keys("queries")} == {"meetings"}
+
+
+def test_init_db_migrates_once(tmp_path):
+    # Arrange
+    engine = _legacy_engine(tmp_path, meetings=2)
+
+    # Act
+    init_db(engine)
+    init_db(engine)
+
+    # Assert
+    assert migrate_integer_keys(engine) is None
+    db = sessionmaker(bind=engine)()
+    meeting = MeetingRepository.insert_or_update(db, "transcript-new", "Après", None, None, "completed")
+    assert sorted(MeetingRepository.get_all(db)) == [1, 2, meeting.id] and meeting.id == 3
@@ -1,22 +1,38 @@
 import pytest
 from datetime import datetime, date, timezone
 from meeting_minutes.models import Meeting, Prompt, Query, Transcript
-from meeting_minutes.repository import MeetingRepository, PromptRepository, QueryRepository, TranscriptRepository
-from sqlalchemy import create_engine
+from meeting_minutes.database import SessionLocal, create_db_engine, init_db
+from meeting_minutes.repository import (
+    MeetingRepository,
+    PromptRepository,
+    QueryRepository,
+    SpeakerStatsRepository,
+    TranscriptRepository,
+    UtteranceRepository,
+    unit_of_work,
+    upsert_rows,
+)
+from sqlalchemy import event, inspect, text
 from sqlalchemy.orm import sessionmaker
 
 
-@pytest.fixture
-def db_session():
-    engine = create_engine("sqlite:///:memory:")
+@pytest.fixture(params=["memory", "file"])
+def db_session(request):
+    if request.param == "file":
+        yield request.getfixturevalue("file_db")
+        return
+    engine = create_db_engine("sqlite:///:memory:")
     Meeting.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    return Session()
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
 
 
 def test_meeting_get_all(db_session):
     # Arrange
-    meeting = Meeting(id="test-id", name="Test Meeting", date=date.today(), created=datetime.now(), status="pending")
+    meeting = Meeting(
+        id=1, remote_id="test-id", name="Test Meeting", date=date.today(), created=datetime.now(), status="pending"
+    )
     db_session.add(meeting)
     db_session.commit()
 
@@ -25,14 +41,14 @@ def test_meeting_get_all(db_session):
 
     # Assert
     assert len(result) == 1
-    assert "test-id" in result
-    assert result["test-id"].name == "Test Meeting"
+    assert 1 in result
+    assert result[1].name == "Test Meeting"
 
 
 def test_meeting_soft_delete(db_session):
     # Arrange
-    meeting_id = "test-id"
-    meeting = Meeting(id=meeting_id, name="Test Meeting", status="pending")
+    meeting_id = 1
+    meeting = Meeting(id=meeting_id, remote_id="test-id", name="Test Meeting", status="pending")
     db_session.add(meeting)
     db_session.commit()
 
@@ -46,31 +62,65 @@ def test_meeting_soft_delete(db_session):
 
 def test_meeting_insert_or_update(db_session):
     # Arrange
-    meeting_id = "test-id"
+    remote_id = "test-id"
     name = "Test Meeting"
     meeting_date = date.today()
     created = datetime.now(timezone.utc)
     status = "pending"
 
     # Act - Insert
-    meeting = MeetingRepository.insert_or_update(db_session, meeting_id, name, meeting_date, created, status)
+    meeting = MeetingRepository.insert_or_update(db_session, remote_id, name, meeting_date, created, status)
 
     # Assert
-    assert meeting.id == meeting_id
+    assert meeting.id == 1
+    assert meeting.remote_id == remote_id
     assert meeting.name == name
 
     # Act - Update
     new_name = "Updated Meeting"
-    updated = MeetingRepository.insert_or_update(db_session, meeting_id, new_name, meeting_date, created, status)
+    updated = MeetingRepository.insert_or_update(db_session, remote_id, new_name, meeting_date, created, status)
 
     # Assert
-    assert updated.id == meeting_id
+    assert updated.id == meeting.id
     assert updated.name == new_name
 
 
+def test_meeting_search(db_session):
+    # Arrange
+    db_session.add(Meeting(id=1, remote_id="r1", name="Budget review", status="completed"))
+    db_session.add(Meeting(id=2, remote_id="r2", name="Weekly", status="completed"))
+    db_session.add(Meeting(id=3, remote_id="r3", name="100% off_site", status="completed"))
+    db_session.add(Transcript(meeting=2, text="We discussed the BUDGET.", transcript=""))
+    db_session.commit()
+
+    # Act / Assert
+    assert set(MeetingRepository.search(db_session, "budget")) == {1, 2}
+    assert set(MeetingRepository.search(db_session, "0% off_")) == {3}
+    assert set(MeetingRepository.search(db_session, "%")) == {3}
+
+
+def test_upsert_rows(db_session):
+    # Arrange
+    rows = [
+        {"id": 1, "remote_id": "r1", "name": "First", "status": "queued"},
+        {"id": 2, "remote_id": "r2", "name": "Second", "status": "queued"},
+    ]
+    upsert_rows(db_session, Meeting, rows)
+
+    # Act
+    upsert_rows(db_session, Meeting, [{"id": 2, "remote_id": "r2", "name": "Second", "status": "completed"}])
+
+    # Assert
+    db_session.expire_all()
+    result = MeetingRepository.get_all(db_session)
+    assert len(result) == 2
+    assert result[1].status == "queued"
+    assert result[2].status == "completed"
+
+
 def test_transcript_store_and_get(db_session):
     # Arrange
-    meeting_id = "test-id"
+    meeting_id = 1
     text = "Original text"
     transcript = "Transcribed text"
 
@@ -94,7 +144,7 @@ def test_transcript_store_and_get(db_session):
 
 def test_transcript_get_nonexistent(db_session):
     # Act
-    result = TranscriptRepository.get_transcript(db_session, "nonexistent-id")
+    result = TranscriptRepository.get_transcript(db_session, 999)
 
     # Assert
     assert result is None
@@ -102,7 +152,7 @@ def test_transcript_get_nonexistent(db_session):
 
 def test_transcript_get_all(db_session):
     # Arrange
-    meeting_id = "test-id"
+    meeting_id = 1
     transcript = Transcript(meeting=meeting_id, text="Original text", transcript="Transcribed text")
     db_session.add(transcript)
     db_session.commit()
@@ -119,7 +169,7 @@ def test_transcript_get_all(db_session):
 
 def test_transcript_soft_delete(db_session):
     # Arrange
-    meeting_id = "test-id"
+    meeting_id = 1
     transcript = Transcript(meeting=meeting_id, text="Original text", transcript="Transcribed text")
     db_session.add(transcript)
     db_session.commit()
@@ -219,7 +269,7 @@ def test_prompt_soft_delete(db_session):
 
 def test_query_get_by_meeting(db_session):
     # Arrange
-    meeting_id = "test-id"
+    meeting_id = 1
     query = Query(meeting=meeting_id, question="Test question", answer="Test answer")
     db_session.add(query)
     db_session.commit()
@@ -236,7 +286,7 @@ def test_query_get_by_meeting(db_session):
 
 def test_query_store_query(db_session):
     # Arrange
-    meeting_id = "test-id"
+    meeting_id = 1
     question = "Test question"
     answer = "Test answer"
 
@@ -251,7 +301,7 @@ def test_query_store_query(db_session):
 
 def test_query_soft_delete(db_session):
     # Arrange
-    meeting_id = "test-id"
+    meeting_id = 1
     query = Query(meeting=meeting_id, question="Test question", answer="Test answer")
     db_session.add(query)
     db_session.commit()
@@ -266,7 +316,7 @@ def test_query_soft_delete(db_session):
 
 def test_query_get_all_history(db_session):
     # Arrange
-    meeting_id = "test-id"
+    meeting_id = 1
     query = Query(meeting=meeting_id, question="Test question", answer="Test answer")
     db_session.add(query)
     db_session.commit()
@@ -282,3 +332,148 @@ def test_query_get_all_history(db_session):
     assert 1 in result
     assert result[1].question == "Test question"
     assert result[1].deleted is not None
+
+
+def test_speaker_stats_replace_and_get(db_session):
+    # Arrange
+    meeting_id = 1
+    row = {"talk_time_ms": 1000, "turns": 1, "interruptions": 0, "words": 3, "words_per_minute": 180.0}
+    SpeakerStatsRepository.replace(db_session, meeting_id, [{"speaker": "A", **row}, {"speaker": "B", **row}])
+
+    # Act
+    SpeakerStatsRepository.replace(db_session, meeting_id, [{"speaker": "A", **row, "turns": 2}])
+    result = SpeakerStatsRepository.get_by_meeting(db_session, meeting_id)
+
+    # Assert
+    assert list(result) == ["A"]
+    assert result["A"].turns == 2
+    assert SpeakerStatsRepository.get_meeting_ids(db_session) == {meeting_id}
+
+
+def test_utterance_window_and_navigation(db_session):
+    # Arrange
+    meeting_id = 1
+    utterances = [
+        {"speaker": "A" if i % 3 else "B", "start": i * 1000, "end": i * 1000 + 900, "text": f"line {i}"}
+        for i in range(120)
+    ]
+    utterances[75]["text"] = "Le 100% du budget"
+    UtteranceRepository.replace(db_session, meeting_id, utterances)
+
+    # Act
+    window = UtteranceRepository.get_window(db_session, meeting_id, 100, 50)
+
+    # Assert
+    assert UtteranceRepository.count(db_session, meeting_id) == 120
+    assert [u.position for u in window] == list(range(100, 120))
+    assert UtteranceRepository.find(db_session, meeting_id, "100%") == [75]
+    assert UtteranceRepository.find(db_session, meeting_id, "LINE 11", limit=2) == [11, 110]
+    assert UtteranceRepository.get_speakers(db_session, meeting_id) == ["A", "B"]
+    assert UtteranceRepository.next_for_speaker(db_session, meeting_id, "B", 0) == 3
+    assert UtteranceRepository.next_for_speaker(db_session, meeting_id, "B", 117) == 0
+
+
+def test_query_get_by_id(db_session):
+    # Arrange
+    stored = QueryRepository.store_query(db_session, 1, "Q" * 200, "A" * 10_000)
+
+    # Act
+    query = QueryRepository.get_by_id(db_session, stored.id)
+
+    # Assert
+    assert (query.question, query.answer) == ("Q" * 200, "A" * 10_000)
+
+
+def test_meeting_get_detail_in_one_statement(db_session):
+    # Arrange
+    meeting = MeetingRepository.insert_or_update(db_session, "test-id", "Réunion", None, datetime.now(), "completed")
+    meeting_id = meeting.id
+    TranscriptRepository.insert_or_update(db_session, meeting_id, "texte", "[Speaker A] texte")
+    kept = [
+        QueryRepository.store_query(db_session, meeting_id, f"Question {i} " + "Q" * 200, "A", datetime(2024, 1, i))
+        for i in (1, 2)
+    ]
+    deleted = QueryRepository.store_query(db_session, meeting_id, "Supprimée", "A")
+    QueryRepository.soft_delete(db_session, deleted.id)
+    # A collection already loaded in the session, deleted query included, is replaced
+    loaded = MeetingRepository.get_all(db_session)[meeting_id]
+    assert len(loaded.queries_rel) == 3
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    # Act
+    detail = MeetingRepository.get_detail(db_session, meeting_id, question_length=10)
+    summary = [(query.id, query.created, query.question_preview) for query in detail.queries]
+    transcript_deleted = detail.transcript.deleted
+
+    # Assert
+    assert len(statements) == 1
+    assert detail.meeting.name == "Réunion"
+    assert transcript_deleted is None
+    assert summary == [(query.id, query.created, query.question[:10]) for query in reversed(kept)]
+    assert MeetingRepository.get_detail(db_session, 999) is None
+
+
+def test_unit_of_work_commits_once_without_refresh(db_session):
+    # Arrange
+    db = SessionLocal(bind=db_session.get_bind())
+    statements, commits = [], []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2].split()[0]))
+    event.listen(db.get_bind(), "commit", lambda conn: commits.append(conn))
+
+    # Act
+    with unit_of_work(db):
+        meeting = MeetingRepository.insert_or_update(db, "test-id", "Réunion", None, datetime.now(), "completed")
+        questions = [QueryRepository.store_query(db, meeting.id, f"Question {i}", "Réponse") for i in (1, 2)]
+    read_back = [(query.meeting, query.id, query.created is not None) for query in questions]
+
+    # Assert
+    assert len(commits) == 1
+    # The lookup of an existing meeting, then the inserts; nothing is reloaded after them
+    assert statements == ["SELECT", "INSERT", "INSERT", "INSERT"]
+    assert read_back == [(meeting.id, questions[0].id, True), (meeting.id, questions[1].id, True)]
+    assert sorted(QueryRepository.get_by_meeting(db_session, meeting.id)) == [q.id for q in questions]
+    db.close()
+
+
+def test_unit_of_work_rolls_back_nested_blocks(db_session):
+    # Arrange
+    kept = MeetingRepository.insert_or_update(db_session, "kept", "Gardée", None, datetime.now(), "completed")
+
+    # Act
+    with pytest.raises(ValueError):
+        with unit_of_work(db_session):
+            MeetingRepository.insert_or_update(db_session, "lost", "Perdue", None, datetime.now(), "completed")
+            with unit_of_work(db_session):
+                PromptRepository.create(db_session, "Résumé", "Résume la réunion")
+                raise ValueError("boom")
+    prompt = PromptRepository.create(db_session, "Actions", "Liste les actions", refresh=True)
+
+    # Assert
+    assert list(MeetingRepository.get_all(db_session)) == [kept.id]
+    assert [p.name for p in PromptRepository.get_all(db_session).values()] == ["Actions"] == [prompt.name]
+    # Outside of any block, writes commit again
+    db_session.rollback()
+    assert PromptRepository.get_by_name(db_session, "Actions") is not None
+
+
+def test_init_db_adds_missing_columns(tmp_path):
+    # Arrange
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE meetings "
+                "(id VARCHAR(255) PRIMARY KEY, name TEXT, date DATE, created DATETIME, status TEXT, deleted DATETIME)"
+            )
+        )
+        conn.execute(text("INSERT INTO meetings (id, name) VALUES ('m1', 'Legacy')"))
+
+    # Act
+    init_db(engine)
+
+    # Assert
+    inspector = inspect(engine)
+    assert "content_hash" in {column["name"] for column in inspector.get_columns("meetings")}
+    assert "ix_meetings_content_hash" in {index["name"] for index in inspector.get_indexes("meetings")}
+    assert MeetingRepository.get_by_remote_id(sessionmaker(bind=engine)(), "m1").content_hash is None
@@ -0,0 +1,207 @@
+import shutil
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from meeting_minutes.database import SessionLocal, create_db_engine, init_db
+from meeting_minutes.models import SearchChunk
+from meeting_minutes.repository import MeetingRepository, TranscriptRepository, unit_of_work
+from meeting_minutes.search import (
+    SearchIndex,
+    chunk_transcript,
+    get_search_index,
+    index_folder,
+    rebuild_index,
+    reset_search_indexes,
+    search_meetings,
+    vectorize,
+    wait_for_indexing,
+)
+
+
+def test_chunk_transcript():
+    transcript = "\n\n".join(f"[Speaker {s}] " + " ".join(["mot"] * 50) for s in "ABABA")
+
+    chunks = chunk_transcript(transcript, words=120)
+
+    assert [len(chunk.split()) for chunk in chunks] == [150, 100]
+    assert chunk_transcript(" ".join(["mot"] * 250), words=120) == ["mot " * 119 + "mot"] * 2 + ["mot " * 9 + "mot"]
+
+
+def test_vectorize_is_normalised_and_stable():
+    vectors = vectorize(["Le budget du projet", "", "le BUDGET du projet"], dimensions=64)
+
+    assert vectors.shape == (3, 64)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), [1, 0, 1], rtol=1e-6)
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+
+
+def test_search_index_persists_and_grows(tmp_path):
+    folder = str(tmp_path / "index")
+    index = SearchIndex(folder, dimensions=256)
+    topics = ["budget", "planning", "client", "qualité", "risque", "équipe", "livraison"]
+    texts = [f"réunion sur le sujet {topics[i % 7]}" for i in range(2500)]
+    texts[1234] = "changement de tarif"
+    rows = index.add(texts)
+    index.remove(rows[:10])
+
+    reopened = SearchIndex(folder)
+    results = reopened.search(["tarif", "sujet qualité"], k=3, block_rows=100)
+
+    assert reopened.dimensions == 256
+    assert reopened.rows == 2500
+    assert reopened.chunks == 2490
+    assert [row for row, _ in results[0]] == [1234]
+    assert [row % 7 for row, _ in results[1]] == [3, 3, 3]
+    assert all(row >= 10 for row, _ in results[1])
+
+
+def test_transcript_writes_update_the_index(file_db):
+    # Arrange
+    pricing, hiring = (
+        MeetingRepository.insert_or_update(file_db, remote_id, remote_id, None, None, "completed").id
+        for remote_id in ("pricing", "hiring")
+    )
+    TranscriptRepository.insert_or_update(
+        file_db, pricing, "", "[Speaker A] Le changement de prix entre en vigueur en mars.\n"
+    )
+    TranscriptRepository.insert_or_update(
+        file_db, hiring, "", "[Speaker A] Nous recrutons deux développeurs.\n"
+    )
+    wait_for_indexing()
+
+    # Act
+    before = search_meetings(file_db, ["changement de prix", "recrutement développeurs"], k=1)
+    TranscriptRepository.soft_delete(file_db, pricing)
+    after = search_meetings(file_db, ["changement de prix"], k=1)
+
+    # Assert
+    assert [[hit.meeting for hit in hits] for hits in before] == [[pricing], [hiring]]
+    assert after == [[]] or after[0][0].meeting != pricing
+    assert file_db.query(SearchChunk).filter(SearchChunk.meeting == pricing).count() == 0
+    assert rebuild_index(file_db) == 1
+
+
+def test_index_writers_of_one_folder_never_share_rows(tmp_path):
+    # Arrange: the index of a database, opened by two processes
+    folder = str(tmp_path / "index")
+    app, worker = SearchIndex(folder, dimensions=256), SearchIndex(folder, dimensions=256)
+
+    # Act
+    app_rows = app.add(["budget du projet"])
+    worker_rows = worker.add(["changement de tarif"])
+    after_gap = app.add(["recrutement"], start=10)
+    results = app.search(["tarif"], k=1)
+
+    # Assert
+    assert (app_rows, worker_rows, after_gap) == ([0], [1], [10])
+    assert [row for row, _ in results[0]] == [1]
+    assert SearchIndex(folder).rows == 11
+
+
+def test_index_writes_follow_the_transaction(file_db):
+    # Arrange
+    meeting_id = MeetingRepository.insert_or_update(file_db, "m1", "Réunion", None, None, "completed").id
+    TranscriptRepository.insert_or_update(file_db, meeting_id, "", "[Speaker A] Le changement de prix en mars.\n")
+    wait_for_indexing()
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with unit_of_work(file_db):
+            TranscriptRepository.insert_or_update(file_db, meeting_id, "", "[Speaker A] Nous recrutons.\n")
+            raise RuntimeError("rolled back")
+    rolled_back = search_meetings(file_db, ["changement de prix", "recrutons"], k=1)
+    TranscriptRepository.insert_or_update(file_db, meeting_id, "", "[Speaker A] Nous recrutons.\n")
+    wait_for_indexing()
+    committed = search_meetings(file_db, ["changement de prix", "recrutons"], k=1)
+
+    # Assert
+    assert [[hit.meeting for hit in hits] for hits in rolled_back] == [[meeting_id], []]
+    assert [[hit.meeting for hit in hits] for hits in committed] == [[], [meeting_id]]
+
+
+def test_index_folder_per_database(tmp_path, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("SEARCH_INDEX_PATH", str(tmp_path / "indexes"))
+    urls = [f"sqlite:///{tmp_path / name}" for name in ("a/meetings.db", "b/meetings.db")]
+    urls += ["postgresql+psycopg://app:secret@db/minutes_a", "postgresql+psycopg://app:other@db/minutes_b"]
+
+    # Act
+    folders = [index_folder(SimpleNamespace(url=url)) for url in urls]
+    engines = [create_db_engine(urls[0]) for _ in range(2)]
+    for engine in engines:
+        init_db(engine)
+    indexes = []
+    for engine in engines:
+        with SessionLocal(bind=engine) as db:
+            indexes.append(get_search_index(db))
+        engine.dispose()
+
+    # Assert
+    assert len(set(folders)) == 4
+    assert all(folder.startswith(str(tmp_path / "indexes")) for folder in folders)
+    assert "secret" not in folders[2]
+    assert indexes[0] is indexes[1] and indexes[0].folder == folders[0]
+
+
+def test_index_is_restored_when_it_does_not_match_the_database(file_db):
+    # Arrange
+    meeting_id = MeetingRepository.insert_or_update(file_db, "m1", "Réunion", None, None, "completed").id
+    TranscriptRepository.insert_or_update(file_db, meeting_id, "", "[Speaker A] Le changement de prix en mars.\n")
+    wait_for_indexing()
+    shutil.rmtree(get_search_index(file_db).folder)
+    reset_search_indexes()
+
+    # Act
+    hits = search_meetings(file_db, ["changement de prix"], k=1)
+
+    # Assert
+    assert [hit.meeting for hit in hits[0]] == [meeting_id]
+    assert get_search_index(file_db).chunks == 1
+
+
+def test_transcripts_are_indexed_once_committed(file_db):
+    # Arrange
+    meeting_id = MeetingRepository.insert_or_update(file_db, "m1", "Réunion", None, None, "completed").id
+    index = get_search_index(file_db)
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with unit_of_work(file_db):
+            TranscriptRepository.insert_or_update(file_db, meeting_id, "", "[Speaker A] Nous recrutons.\n")
+            raise RuntimeError("rolled back")
+    wait_for_indexing()
+    rolled_back = index.rows
+    with unit_of_work(file_db):
+        TranscriptRepository.insert_or_update(file_db, meeting_id, "", "[Speaker A] Le changement de prix en mars.\n")
+        uncommitted = index.rows, file_db.query(SearchChunk).count()
+    wait_for_indexing()
+    hits = search_meetings(file_db, ["changement de prix"], k=1)
+
+    # Assert
+    assert rolled_back == 0
+    assert uncommitted == (0, 0)
+    assert [hit.meeting for hit in hits[0]] == [meeting_id]
+
+
+def test_transcripts_of_a_shared_transaction_are_indexed_once_it_commits(file_engine, file_sessions):
+    # Arrange: as the write queue and batched uploads do
+    with file_sessions() as db:
+        meeting_id = MeetingRepository.insert_or_update(db, "m1", "Réunion", None, None, "completed").id
+
+    # Act
+    with file_engine.connect() as conn:
+        with conn.begin():
+            with Session(bind=conn, join_transaction_mode="create_savepoint") as db:
+                TranscriptRepository.insert_or_update(db, meeting_id, "", "[Speaker A] Le changement de prix.\n")
+            wait_for_indexing()
+            with file_sessions() as db:
+                before_commit = db.query(SearchChunk).count()
+    wait_for_indexing()
+
+    # Assert
+    assert before_commit == 0
+    with file_sessions() as db:
+        assert [hit.meeting for hit in search_meetings(db, ["changement de prix"], k=1)[0]] == [meeting_id]
@@ -0,0 +1,192 @@
+import io
+import struct
+from types import SimpleNamespace
+
+from meeting_minutes.audio import AudioSegment, mp3_frames, split_mp3
+from meeting_minutes.models import Meeting
+from meeting_minutes.repository import TranscriptRepository, UtteranceRepository
+from meeting_minutes.segments import stitch_transcripts
+from meeting_minutes.services import MeetingService, TranscriptionService
+
+# MPEG 1 Layer III, 128 kbit/s, 44.1 kHz: 417-byte frames of 1152 samples
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_SIZE = 417
+FRAME_MS = 1152 * 1000 / 44100
+ID3_TAG = b"ID3\x03\x00\x00\x00\x00\x00\x20" + b"\x00" * 32
+
+
+def make_mp3(duration_ms: int) -> bytes:
+    """Silent MP3 whose frames carry their index, so that a fake transcriber knows where a segment starts."""
+    frames = int(duration_ms / FRAME_MS) + 1
+    return ID3_TAG + b"".join(
+        FRAME_HEADER + struct.pack(">I", i) + b"\x00" * (FRAME_SIZE - 8) for i in range(frames)
+    )
+
+
+# Two-second utterances every 2.5 seconds; a third speaker joins after 40 seconds
+SCRIPT = [
+    SimpleNamespace(
+        speaker="ABC"[i % 3] if i >= 16 else "AB"[i % 2],
+        start=1000 + 2500 * i,
+        end=3000 + 2500 * i,
+        text=f"Phrase {i}.",
+    )
+    for i in range(23)
+]
+
+
+class ScriptedTranscriber(TranscriptionService):
+    """Transcribes a segment of `make_mp3` audio as the part of `SCRIPT` it covers, diarized on its own."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe_audio(self, file, webhook=True):
+        self.calls += 1
+        data = file.read()
+        frames = list(mp3_frames(io.BytesIO(data)))
+        start = round(struct.unpack(">I", data[4:8])[0] * FRAME_MS)
+        end = start + round(len(frames) * FRAME_MS)
+        utterances = []
+        labels = {}
+        for utterance in SCRIPT:
+            if utterance.end > start and utterance.start < end:
+                # Speakers are labelled in order of appearance, as diarization does
+                if utterance.speaker not in labels:
+                    labels[utterance.speaker] = "ABC"[len(labels)]
+                utterances.append(
+                    SimpleNamespace(
+                        speaker=labels[utterance.speaker],
+                        start=max(utterance.start, start) - start,
+                        end=min(utterance.end, end) - start,
+                        text=utterance.text,
+                    )
+                )
+        return SimpleNamespace(
+            id=f"segment-{start}",
+            text=" ".join(u.text for u in utterances),
+            utterances=utterances,
+            status=SimpleNamespace(name="completed"),
+        )
+
+
+def test_split_mp3():
+    segments = split_mp3(io.BytesIO(make_mp3(60_000)), 20_000, 5_000)
+
+    assert [(s.start_ms // 1000, s.end_ms // 1000) for s in segments] == [(0, 20), (14, 35), (29, 49), (44, 60)]
+    assert segments[0].offset == len(ID3_TAG)
+    assert all(s.offset % FRAME_SIZE == len(ID3_TAG) % FRAME_SIZE for s in segments)
+    assert all(b.start_ms <= a.end_ms - 5_000 for a, b in zip(segments, segments[1:]))
+    assert split_mp3(io.BytesIO(b"RIFF" + b"\xff" * 1000), 20_000, 5_000) == []
+
+
+def test_stitch_transcripts():
+    audio = make_mp3(60_000)
+    segments = split_mp3(io.BytesIO(audio), 20_000, 5_000)
+    transcriber = ScriptedTranscriber()
+    transcripts = [transcriber.transcribe_audio(io.BytesIO(audio[s.offset : s.offset + s.size])) for s in segments]
+
+    stitched = stitch_transcripts(segments, transcripts)
+
+    # Segment 2 calls the second speaker "A": labels are reconciled, and utterances in the overlaps kept once
+    assert transcripts[1].utterances[0].speaker == "A"
+    assert [(u.speaker, u.start, u.end, u.text) for u in stitched.utterances] == [
+        (u.speaker, u.start, u.end, u.text) for u in SCRIPT
+    ]
+    assert stitched.id == transcripts[0].id
+    assert stitched.segment_ids == [t.id for t in transcripts]
+
+
+def _utterance(speaker, words, start, with_words=True):
+    """Utterance of `words` said one per second from `start`, each lasting 900 ms."""
+    timed = [
+        SimpleNamespace(text=word, start=start + 1000 * i, end=start + 1000 * i + 900) for i, word in enumerate(words)
+    ]
+    return SimpleNamespace(
+        speaker=speaker, start=start, end=timed[-1].end, text=" ".join(words), words=timed if with_words else None
+    )
+
+
+def test_stitch_utterances_crossing_the_cut():
+    # Arrange: the first segment hears one utterance where the second one hears three, all past the middle
+    segments = [AudioSegment(0, 0, 0, 22_000), AudioSegment(0, 0, 14_000, 34_000)]
+
+    def transcripts(with_words):
+        first = [_utterance("A", ["un", "deux", "trois", "quatre", "cinq", "six"], 16_000, with_words)]
+        second = [
+            _utterance("A", words, start, with_words)
+            for words, start in ((["un", "deux"], 2_000), (["trois", "quatre"], 4_000), (["cinq", "six"], 6_000))
+        ]
+        return [SimpleNamespace(id="first", utterances=first), SimpleNamespace(id="second", utterances=second)]
+
+    # Act
+    split = stitch_transcripts(segments, transcripts(with_words=True))
+    whole = stitch_transcripts(segments, transcripts(with_words=False))
+
+    # Assert
+    assert [(u.start, u.end, u.text) for u in split.utterances] == [
+        (16_000, 17_900, "un deux"),
+        (18_000, 19_900, "trois quatre"),
+        (20_000, 21_900, "cinq six"),
+    ]
+    assert split.text.split() == ["un", "deux", "trois", "quatre", "cinq", "six"]
+    assert whole.text.split() == ["un", "deux", "trois", "quatre", "cinq", "six"]
+
+
+def test_stitch_cuts_where_no_utterance_is_running():
+    # Arrange: the second segment starts an utterance at 18 s, inside one of the first segment
+    segments = [AudioSegment(0, 0, 0, 20_000), AudioSegment(0, 0, 14_000, 34_000)]
+    first = [_utterance("A", ["un", "deux", "trois", "quatre"], 16_000, with_words=False)]
+    second = [
+        _utterance("A", ["un", "deux"], 2_000, with_words=False),
+        _utterance("A", ["trois", "quatre"], 4_000, with_words=False),
+        _utterance("B", ["cinq", "six"], 6_000, with_words=False),
+    ]
+
+    # Act
+    stitched = stitch_transcripts(
+        segments, [SimpleNamespace(id="first", utterances=first), SimpleNamespace(id="second", utterances=second)]
+    )
+
+    # Assert
+    assert [(u.speaker, u.text) for u in stitched.utterances] == [("A", "un deux trois quatre"), ("B", "cinq six")]
+
+
+def test_transcribe_meeting_in_segments(file_db, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("ASSEMBLYAI_SEGMENT_MINUTES", "0.5")
+    monkeypatch.setenv("ASSEMBLYAI_SEGMENT_OVERLAP_SECONDS", "5")
+    transcriber = ScriptedTranscriber()
+    service = MeetingService(file_db, transcriber)
+    audio = io.BytesIO(make_mp3(60_000))
+
+    # Act
+    meeting_id = service.transcribe_meeting(audio, "Longue réunion")
+    audio.seek(0)
+    duplicate_id = service.transcribe_meeting(audio, "Longue réunion")
+
+    # Assert
+    meeting = file_db.get(Meeting, meeting_id)
+    assert duplicate_id == meeting_id
+    assert transcriber.calls == 3
+    assert meeting.remote_id == "segment-0"
+    assert len(meeting.transcript_ids) == 3 and meeting.transcript_ids[0] == "segment-0"
+    assert UtteranceRepository.count(file_db, meeting_id) == len(SCRIPT)
+    transcript = TranscriptRepository.get_transcript(file_db, meeting_id)
+    assert transcript.transcript.splitlines()[-1] == "[Speaker B] Phrase 22."
+
+
+def test_sync_keeps_segments_in_their_meeting(fake_assemblyai, file_db, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("ASSEMBLYAI_SEGMENT_MINUTES", "0.5")
+    monkeypatch.setenv("ASSEMBLYAI_SEGMENT_OVERLAP_SECONDS", "5")
+    service = MeetingService(file_db, TranscriptionService())
+    meeting_id = service.transcribe_meeting(io.BytesIO(make_mp3(60_000)), "Longue réunion")
+
+    # Act
+    synced = service.sync_meetings(include_remote=True, force=True)
+
+    # Assert
+    assert len(fake_assemblyai.transcripts) == 3
+    assert list(synced) == [meeting_id]
+    assert set(synced[meeting_id].transcript_ids) == set(fake_assemblyai.transcripts)
@@ -1,8 +1,19 @@
+import hashlib
+import io
+import sqlite3
 import pytest
 from datetime import datetime, timezone, date
 from unittest.mock import Mock, patch
-from meeting_minutes.services import MeetingService, TranscriptionService
-from meeting_minutes.models import Meeting
+from meeting_minutes.services import MeetingService, MeetingUpload, TranscriptionService, reset_assemblyai
+from meeting_minutes.models import Meeting, Transcript
+from meeting_minutes.repository import (
+    MeetingRepository,
+    QueryRepository,
+    SpeakerStatsRepository,
+    TranscriptRepository,
+    UtteranceRepository,
+)
+from sqlalchemy import event
 
 
 @pytest.fixture
@@ -31,7 +42,10 @@ def test_transcribe_meeting(meeting_service):
 
 def test_sync_meetings(meeting_service):
     # Mock local meetings
-    local_meetings = {"1": Meeting(id="1", name="Meeting 1"), "2": Meeting(id="2", name="Meeting 2")}
+    local_meetings = {
+        1: Meeting(id=1, remote_id="r1", name="Meeting 1"),
+        2: Meeting(id=2, remote_id="r2", name="Meeting 2"),
+    }
 
     with patch("meeting_minute.repository.MeetingRepository") as mock_repo:
         mock_repo.get_all.return_value = list(local_meetings.values())
@@ -58,13 +72,242 @@ def test_format_meeting_date():
 
 
 def test_merge_meetings(meeting_service):
-    local = {"1": Meeting(id="1", name="Local Meeting")}
+    local = {1: Meeting(id=1, remote_id="r1", name="Local Meeting")}
     remote = {
-        "1": Meeting(id="1", status="completed", created=datetime.now()),
-        "2": Meeting(id="2", status="processing", created=datetime.now()),
+        "r1": Meeting(remote_id="r1", status="completed", created=datetime.now()),
+        "r2": Meeting(remote_id="r2", status="processing", created=datetime.now()),
     }
 
     meeting_service._merge_meetings(local, remote)
 
-    assert "1" in local
-    assert local["1"].status == "completed"
+    assert 1 in local
+    assert local[1].status == "completed"
+
+
+def test_backfill_speaker_stats(fake_assemblyai, file_db):
+    # Arrange
+    for meeting_id, remote_id in ((1, "m1"), (2, "m2")):
+        fake_assemblyai.add_transcript(transcript_id=remote_id)
+        file_db.add(Meeting(id=meeting_id, remote_id=remote_id, name=remote_id, status="completed"))
+        file_db.add(Transcript(meeting=meeting_id, text="", transcript=""))
+    file_db.commit()
+
+    # Act
+    backfilled = MeetingService(file_db).backfill_speaker_stats(max_workers=2)
+
+    # Assert
+    assert backfilled == 2
+    assert set(SpeakerStatsRepository.get_by_meeting(file_db, 1)) == {"A", "B"}
+    assert MeetingService(file_db).backfill_speaker_stats() == 0
+
+
+def test_ensure_utterances_from_legacy_transcript(file_db):
+    # Arrange
+    file_db.add(Transcript(meeting=1, text="", transcript="[Speaker A] Bonjour\n\n[Speaker B] Merci\n"))
+    file_db.commit()
+
+    # Act
+    count = MeetingService(file_db).ensure_utterances(1)
+
+    # Assert
+    assert count == 2
+    assert [(u.speaker, u.text) for u in UtteranceRepository.get_window(file_db, 1, 0, 10)] == [
+        ("A", "Bonjour"),
+        ("B", "Merci"),
+    ]
+
+
+def test_transcribe_meeting_deduplicates_uploads(fake_assemblyai, file_db):
+    # Arrange
+    service = MeetingService(file_db, TranscriptionService())
+    audio = b"ID3" + bytes(range(256)) * 1000
+
+    # Act
+    first = service.transcribe_meeting(io.BytesIO(audio), "Réunion", date(2024, 1, 1))
+    second = service.transcribe_meeting(io.BytesIO(audio), "Réunion (bis)", date(2024, 1, 1))
+
+    # Assert
+    assert second == first
+    assert file_db.get(Meeting, first).content_hash == hashlib.sha256(audio).hexdigest()
+    assert fake_assemblyai.requests["POST /v2/transcript"] == 1
+
+
+def test_backfill_content_hashes(fake_assemblyai, file_db):
+    # Arrange
+    audio_url = TranscriptionService().upload_audio(io.BytesIO(b"ID3audio"))
+    fake_assemblyai.add_transcript(audio_url, transcript_id="m1")
+    fake_assemblyai.add_transcript("http://deleted_by_user", transcript_id="m2")
+    for remote_id in ("m1", "m2"):
+        MeetingRepository.insert_or_update(file_db, remote_id, remote_id, None, None, "completed")
+
+    # Act
+    hashed = MeetingService(file_db).backfill_content_hashes(max_workers=2)
+
+    # Assert
+    assert hashed == 1
+    assert MeetingRepository.get_by_content_hash(file_db, hashlib.sha256(b"ID3audio").hexdigest()).remote_id == "m1"
+    assert [meeting.remote_id for meeting in MeetingRepository.get_without_content_hash(file_db)] == ["m2"]
+
+
+def test_refresh_pending(fake_assemblyai, file_db):
+    # Arrange
+    fake_assemblyai.add_transcript(transcript_id="done")
+    missing, done, _ = (
+        MeetingRepository.insert_or_update(file_db, remote_id, remote_id, None, None, status)
+        for remote_id, status in (("missing", "queued"), ("done", "processing"), ("old", "completed"))
+    )
+    errors = []
+
+    # Act
+    refreshed = MeetingService(file_db).refresh_pending(on_error=lambda meeting, e: errors.append(meeting.remote_id))
+
+    # Assert
+    assert refreshed == 1
+    assert errors == ["missing"] and file_db.get(Meeting, missing.id).status == "queued"
+    assert file_db.get(Meeting, done.id).status == "completed"
+    assert UtteranceRepository.count(file_db, done.id) == 3
+    assert MeetingService(file_db).refresh_pending() == 0
+
+
+def test_transcribe_meetings_concurrently_in_batches(fake_assemblyai, tmp_path, file_engine, file_db):
+    # Arrange
+    service = MeetingService(file_db, TranscriptionService())
+    existing = service.transcribe_meeting(io.BytesIO(b"ID3 existing"), "Existante")
+    fake_assemblyai.latency = 0.1
+    uploads = [
+        MeetingUpload(io.BytesIO(f"ID3 audio {i}".encode()), f"Réunion {i}", date(2024, 1, i + 1)) for i in range(5)
+    ]
+    uploads += [
+        MeetingUpload(io.BytesIO(b"ID3 audio 0"), "Copie"),
+        MeetingUpload(io.BytesIO(b"ID3 existing"), "Existante (bis)"),
+        MeetingUpload(str(tmp_path / "missing.mp3"), "Absente"),
+    ]
+    commits = []
+    event.listen(file_engine, "commit", lambda conn: commits.append(conn))
+    progress = []
+
+    # Act
+    service.transcribe_meetings(
+        uploads, max_workers=3, batch_size=2, on_progress=lambda upload: progress.append((upload.name, upload.status))
+    )
+
+    # Assert
+    assert [upload.status for upload in uploads] == ["stored"] * 5 + ["duplicate", "duplicate", "failed"]
+    assert uploads[5].meeting_id == uploads[0].meeting_id and uploads[6].meeting_id == existing
+    assert "missing.mp3" in uploads[7].error
+    assert fake_assemblyai.requests["POST /v2/transcript"] == 6
+    assert fake_assemblyai.max_in_flight > 1
+    # One commit ending the lookups, then 5 meetings stored 2 per transaction
+    assert len(commits) == 1 + 3
+    meetings = MeetingRepository.get_all(file_db)
+    assert sorted(meeting.name for meeting in meetings.values()) == ["Existante"] + [f"Réunion {i}" for i in range(5)]
+    assert meetings[uploads[4].meeting_id].date == date(2024, 1, 5)
+    assert UtteranceRepository.count(file_db, uploads[4].meeting_id) == 3
+    assert "transcribing" in {status for _, status in progress} and ("Réunion 0", "stored") in progress
+
+
+def test_tiered_transcription_replaces_draft(fake_assemblyai, file_db, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("ASSEMBLYAI_TIERED", "true")
+    monkeypatch.setenv("ASSEMBLYAI_POLLING_INTERVAL", "0.05")
+    reset_assemblyai()
+    fake_assemblyai.processing_delays = {"nano": 0.0, "best": 1.0}
+    service = MeetingService(file_db, TranscriptionService())
+
+    # Act
+    meeting_id = service.transcribe_meeting(io.BytesIO(b"ID3 audio"), "Réunion", date(2024, 1, 1))
+    drafted = MeetingRepository.get_detail(file_db, meeting_id)
+    draft_id, draft_status, draft_ids = drafted.meeting.draft_id, drafted.meeting.status, drafted.meeting.transcript_ids
+    synced = service.sync_meetings(include_remote=True, force=True)
+    query = QueryRepository.store_query(file_db, meeting_id, "Résumé ?", "Réponse provisoire")
+    service.finalizations[0].result(timeout=10)
+    file_db.expire_all()
+    final = MeetingRepository.get_detail(file_db, meeting_id)
+
+    # Assert
+    models = {t["id"]: t["speech_model"] for t in fake_assemblyai.transcripts.values()}
+    assert models[draft_id] == "nano" and models[final.meeting.remote_id] == "best"
+    assert draft_status == "processing" and drafted.transcript is not None
+    assert draft_ids == [draft_id]
+    # The draft transcript is not imported as a meeting of its own
+    assert list(synced) == [meeting_id]
+    assert final.meeting.status == "completed" and final.meeting.draft_id is None
+    assert final.meeting.transcript_ids == [final.meeting.remote_id]
+    assert [q.draft for q in final.queries] == [True] and query.id == final.queries[0].id
+    assert UtteranceRepository.count(file_db, meeting_id) == 3
+    assert fake_assemblyai.transcripts[draft_id]["audio_url"] == "http://deleted_by_user"
+    assert list(service.sync_meetings(include_remote=True, force=True)) == [meeting_id]
+
+
+def test_sync_does_not_lock_the_database_while_fetching(fake_assemblyai, file_engine, file_db):
+    # Arrange
+    class LockProbe(TranscriptionService):
+        """Checks that another connection could write while each transcript is fetched."""
+
+        locked = []
+
+        def get_transcript(self, transcript_id):
+            with sqlite3.connect(file_engine.url.database, timeout=0) as conn:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                except sqlite3.OperationalError:
+                    self.locked.append(transcript_id)
+            return super().get_transcript(transcript_id)
+
+    for remote_id in ("m1", "m2", "m3"):
+        fake_assemblyai.add_transcript(transcript_id=remote_id)
+        MeetingRepository.insert_or_update(file_db, remote_id, remote_id, None, None, "processing")
+    service = MeetingService(file_db, LockProbe())
+
+    # Act
+    meetings = service.sync_meetings(include_remote=True, force=True)
+
+    # Assert
+    assert LockProbe.locked == []
+    assert {meeting.status for meeting in meetings.values()} == {"completed"}
+    assert all(UtteranceRepository.count(file_db, meeting_id) == 3 for meeting_id in meetings)
+
+
+def test_sync_leaves_out_the_transcripts_of_other_workspaces(fake_assemblyai, file_sessions, monkeypatch):
+    # Arrange
+    for remote_id in ("mine", "lost"):
+        fake_assemblyai.add_transcript(transcript_id=remote_id)
+    for remote_id in ("theirs", "their-webhook"):
+        fake_assemblyai.add_transcript(
+            transcript_id=remote_id, webhook_url="https://minutes.example.com/webhooks/assemblyai?workspace=team-a"
+        )
+    with file_sessions() as db:
+        MeetingRepository.insert_or_update(db, "mine", "Réunion", None, None, "queued")
+
+    def sync(workspace):
+        with file_sessions(info={"workspace": workspace}) as db:
+            meetings = MeetingService(db, TranscriptionService()).sync_meetings(include_remote=True, force=True)
+            return sorted(meeting.remote_id for meeting in meetings.values())
+
+    def complete(workspace, remote_id):
+        with file_sessions(info={"workspace": workspace}) as db:
+            service = MeetingService(db, TranscriptionService())
+            meeting = service.complete_transcription(service.transcription_service.get_transcript(remote_id))
+            return meeting and (meeting.remote_id, meeting.status)
+
+    # Act
+    workspace_meetings = sync("team-b")
+    default_meetings = sync("default")
+    fake_assemblyai.add_transcript(transcript_id="late")
+    completed = {workspace: complete(workspace, "late") for workspace in ("team-b", "default")}
+    foreign = complete("default", "their-webhook")
+    monkeypatch.setenv("ASSEMBLYAI_IMPORT_REMOTE", "false")
+    fake_assemblyai.add_transcript(transcript_id="disabled")
+    disabled = (sync("default"), complete("default", "disabled"))
+
+    # Assert
+    assert workspace_meetings == ["mine"]
+    assert default_meetings == ["lost", "mine"]
+    assert completed == {"team-b": None, "default": ("late", "completed")}
+    assert foreign is None
+    assert disabled == (["late", "lost", "mine"], None)
+    with file_sessions() as db:
+        lost = MeetingRepository.get_by_remote_id(db, "lost")
+        assert TranscriptRepository.get_transcript(db, lost.id)
+        assert MeetingRepository.get_by_remote_id(db, "theirs") is None
+
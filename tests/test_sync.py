@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from meeting_minutes.repository import MeetingRepository
+from meeting_minutes.services import MeetingService, TranscriptionService
+from meeting_minutes.sync import SingleFlight, reset_sync_flight
+
+
+@pytest.fixture(autouse=True)
+def fresh_syncs():
+    reset_sync_flight()
+    yield
+    reset_sync_flight()
+
+
+def test_single_flight_coalesces_and_caches():
+    # Arrange
+    now = [0.0]
+    flight = SingleFlight(ttl=30, clock=lambda: now[0])
+    calls = []
+    start_line = threading.Barrier(8)
+
+    def slow():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return len(calls)
+
+    def failing():
+        raise ValueError("boom")
+
+    def caller(results):
+        start_line.wait()
+        results.append(flight.run("db", slow))
+
+    # Act
+    results = []
+    threads = [threading.Thread(target=caller, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cached = flight.run("db", slow)
+    forced = flight.run("db", slow, force=True)
+    other = flight.run("other", slow)
+    now[0] = 31
+    expired = flight.run("db", slow)
+
+    # Assert
+    assert results == [1] * 8 and (flight.runs, flight.joined) == (4, 8)
+    assert (cached, forced, other, expired) == (1, 2, 3, 4)
+    with pytest.raises(ValueError):
+        flight.run("failing", failing)
+    with pytest.raises(ValueError):
+        flight.run("failing", failing)
+    assert flight.runs == 6
+
+
+def test_concurrent_syncs_list_transcripts_once(fake_assemblyai, file_sessions, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("ASSEMBLYAI_SYNC_TTL", "60")
+    with file_sessions() as db:
+        for _ in range(3):
+            MeetingRepository.insert_or_update(db, fake_assemblyai.add_transcript(), "Réunion", None, None, "queued")
+    fake_assemblyai.latency = 0.1
+    sessions = 10
+    start_line = threading.Barrier(sessions)
+    synced = []
+
+    def session():
+        with file_sessions() as db:
+            service = MeetingService(db, TranscriptionService())
+            start_line.wait()
+            synced.append(sorted(meeting.remote_id for meeting in service.sync_meetings(include_remote=True).values()))
+
+    # Act
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    listed = fake_assemblyai.requests["GET /v2/transcript"]
+    with file_sessions() as db:
+        service = MeetingService(db, TranscriptionService())
+        service.sync_meetings(include_remote=True)
+        cached = fake_assemblyai.requests["GET /v2/transcript"]
+        service.sync_meetings(include_remote=True, force=True)
+
+    # Assert
+    assert synced == [sorted(fake_assemblyai.transcripts)] * sessions
+    assert listed == 1 and fake_assemblyai.requests["GET /v2/transcript/{id}"] == 3
+    assert cached == listed
+    assert fake_assemblyai.requests["GET /v2/transcript"] == 2
@@ -0,0 +1,108 @@
+import json
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from meeting_minutes.database import create_db_engine
+from meeting_minutes.models import Meeting, Prompt, Query, SpeakerStats, Transcript, Utterance
+from meeting_minutes.repository import MeetingRepository, PromptRepository, QueryRepository, TranscriptRepository
+from meeting_minutes.transfer import export_database, import_database
+
+
+def _session(url):
+    engine = create_db_engine(url)
+    Meeting.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+@pytest.fixture
+def source_db(file_db):
+    file_db.add(
+        Meeting(
+            id=1,
+            remote_id="m1",
+            name="Budget",
+            date=date(2025, 1, 6),
+            created=datetime(2025, 1, 6, 10),
+            status="completed",
+        )
+    )
+    file_db.add(Meeting(id=2, remote_id="m2", name="Retro", status="completed", deleted=datetime(2025, 1, 8)))
+    file_db.add(Transcript(meeting=1, text="Hello", transcript="[Speaker A] Hello"))
+    file_db.add(Query(meeting=1, question="Q?", answer="A.", created=datetime(2025, 1, 6, 11), draft=True))
+    file_db.add(Prompt(name="Résumé", prompt="Résume la réunion"))
+    file_db.add(
+        SpeakerStats(meeting=1, speaker="A", talk_time_ms=900, turns=1, interruptions=0, words=1, words_per_minute=66.7)
+    )
+    file_db.add(Utterance(meeting=1, position=0, speaker="A", start=0, end=900, text="Hello"))
+    file_db.commit()
+    return file_db
+
+
+@pytest.mark.parametrize("file_format", ["jsonl", "parquet"])
+def test_export_import_roundtrip(source_db, tmp_path, file_format):
+    # Arrange
+    folder = tmp_path / "dump"
+    target_db = _session(f"sqlite:///{tmp_path / 'target.db'}")
+
+    # Act
+    exported = export_database(source_db, str(folder), file_format, batch_size=1)
+    imported = import_database(target_db, str(folder), file_format, batch_size=1)
+    imported_again = import_database(target_db, str(folder), file_format)
+
+    # Assert
+    assert exported == {
+        "meetings": 2,
+        "prompts": 1,
+        "transcripts": 1,
+        "queries": 1,
+        "speaker_stats": 1,
+        "utterances": 1,
+    }
+    assert imported == exported == imported_again
+    meetings = MeetingRepository.get_all(target_db, include_deleted=True)
+    assert meetings[1].remote_id == "m1"
+    assert meetings[1].date == date(2025, 1, 6)
+    assert meetings[1].created == datetime(2025, 1, 6, 10)
+    assert meetings[2].deleted is not None
+    assert [(q.question, q.draft) for q in QueryRepository.get_by_meeting(target_db, 1).values()] == [("Q?", True)]
+
+
+def test_export_jsonl_is_one_row_per_line(source_db, tmp_path):
+    # Act
+    export_database(source_db, str(tmp_path), "jsonl", tables=["meetings"])
+
+    # Assert
+    lines = (tmp_path / "meetings.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [(json.loads(line)["id"], json.loads(line)["remote_id"]) for line in lines] == [(1, "m1"), (2, "m2")]
+    assert not (tmp_path / "queries.jsonl").exists()
+
+
+def test_import_into_a_database_with_other_meetings(source_db, tmp_path):
+    # Arrange: the target database has its own meeting 1 and prompt 1
+    folder = str(tmp_path / "dump")
+    export_database(source_db, folder)
+    target_db = _session(f"sqlite:///{tmp_path / 'target.db'}")
+    target_db.add(Meeting(id=1, remote_id="t1", name="Cible", status="completed"))
+    target_db.add(Transcript(meeting=1, text="Bonjour", transcript="[Speaker A] Bonjour"))
+    target_db.add(Query(meeting=1, question="Cible ?", answer="Oui."))
+    target_db.add(Prompt(name="Actions", prompt="Liste les actions"))
+    target_db.commit()
+
+    # Act
+    import_database(target_db, folder)
+    import_database(target_db, folder)
+
+    # Assert
+    meetings = {m.remote_id: m for m in MeetingRepository.get_all(target_db, include_deleted=True).values()}
+    assert sorted(meetings) == ["m1", "m2", "t1"]
+    kept, imported = meetings["t1"], meetings["m1"]
+    assert (kept.id, kept.name, imported.name) == (1, "Cible", "Budget")
+    assert TranscriptRepository.get_transcript(target_db, kept.id).text == "Bonjour"
+    assert TranscriptRepository.get_transcript(target_db, imported.id).text == "Hello"
+    assert [q.question for q in QueryRepository.get_by_meeting(target_db, kept.id).values()] == ["Cible ?"]
+    assert [q.question for q in QueryRepository.get_by_meeting(target_db, imported.id).values()] == ["Q?"]
+    assert sorted(p.name for p in PromptRepository.get_all(target_db).values()) == ["Actions", "Résumé"]
+    assert target_db.query(SpeakerStats.meeting).all() == [(imported.id,)]
+    assert target_db.query(Utterance.meeting).all() == [(imported.id,)]
@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from meeting_minutes.services import MeetingService, TranscriptionService, get_http_transport
+from meeting_minutes.transport import AdaptiveLimiter, ResilientTransport
+
+
+@pytest.fixture
+def client(fake_assemblyai):
+    transport = ResilientTransport(max_retries=3, backoff_base=0, sleep=lambda delay: None)
+    with httpx.Client(base_url=fake_assemblyai.base_url, transport=transport) as client:
+        yield client
+
+
+def test_retries_throttled_requests(client, fake_assemblyai):
+    # Arrange
+    fake_assemblyai.inject(429, count=2)
+
+    # Act
+    response = client.get("/v2/transcript")
+
+    # Assert
+    assert response.status_code == 200
+    metrics = client._transport.metrics()["GET /v2/transcript"]
+    assert metrics["requests"] == 3
+    assert metrics["retries"] == 2
+    assert metrics["throttled"] == 2
+    assert metrics["failures"] == 0
+
+
+def test_gives_up_after_max_retries(client, fake_assemblyai):
+    # Arrange
+    fake_assemblyai.inject(502, count=10)
+
+    # Act
+    response = client.get("/v2/transcript")
+
+    # Assert
+    assert response.status_code == 502
+    assert client._transport.metrics()["GET /v2/transcript"]["failures"] == 1
+
+
+def test_does_not_retry_server_errors_on_post(client, fake_assemblyai):
+    # Arrange
+    fake_assemblyai.inject(500)
+
+    # Act
+    response = client.post("/v2/transcript", json={"audio_url": "https://example.com/a.mp3"})
+
+    # Assert
+    assert response.status_code == 500
+    assert fake_assemblyai.requests["POST /v2/transcript"] == 1
+
+
+def test_does_not_resend_a_post_the_server_may_have_processed(client, fake_assemblyai):
+    # Arrange
+    fake_assemblyai.inject_disconnect()
+
+    # Act
+    with pytest.raises(httpx.RemoteProtocolError):
+        client.post("/v2/transcript", json={"audio_url": "https://example.com/a.mp3"})
+    fake_assemblyai.inject_disconnect()
+    response = client.get("/v2/transcript")
+
+    # Assert
+    assert fake_assemblyai.requests["POST /v2/transcript"] == 1
+    assert len(fake_assemblyai.transcripts) == 1
+    assert response.status_code == 200 and fake_assemblyai.requests["GET /v2/transcript"] == 2
+
+
+def test_retries_a_post_that_could_not_connect():
+    # Arrange
+    attempts = []
+
+    def refuse_once(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("Connection refused", request=request)
+        return httpx.Response(200, json={"id": "t1"})
+
+    transport = ResilientTransport(httpx.MockTransport(refuse_once), backoff_base=0, sleep=lambda delay: None)
+
+    # Act
+    with httpx.Client(base_url="https://api.assemblyai.test", transport=transport) as client:
+        response = client.post("/v2/transcript", json={"audio_url": "https://example.com/a.mp3"})
+
+    # Assert
+    assert response.json() == {"id": "t1"} and len(attempts) == 2
+
+
+def test_endpoint_metrics_group_transcript_ids(client, fake_assemblyai):
+    # Arrange
+    ids = [fake_assemblyai.add_transcript() for _ in range(3)]
+
+    # Act
+    for transcript_id in ids:
+        client.get(f"/v2/transcript/{transcript_id}")
+
+    # Assert
+    assert client._transport.metrics()["GET /v2/transcript/{id}"]["requests"] == 3
+
+
+def test_adaptive_limiter():
+    # Arrange
+    limiter = AdaptiveLimiter(initial=8, minimum=1, maximum=10)
+
+    # Act / Assert
+    limiter.on_throttle()
+    assert limiter.limit == 4
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.limit == 10
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.limit == 1
+
+
+def test_sdk_calls_survive_throttling(fake_assemblyai):
+    # Arrange: the stand-in only accepts 2 concurrent requests
+    fake_assemblyai.max_concurrency = 2
+    fake_assemblyai.latency = 0.02
+    ids = [fake_assemblyai.add_transcript() for _ in range(16)]
+    service = TranscriptionService()
+
+    # Act
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        transcripts = list(executor.map(service.get_transcript, ids))
+
+    # Assert
+    assert [t.id for t in transcripts] == ids
+    metrics = get_http_transport().metrics()["GET /v2/transcript/{id}"]
+    assert metrics["failures"] == 0
+    assert metrics["throttled"] > 0
+    assert get_http_transport().limiter.limit < 8
+
+
+def test_remote_sync_retries_throttled_list(fake_assemblyai):
+    # Arrange
+    fake_assemblyai.add_transcript()
+    fake_assemblyai.inject(429, count=3)
+
+    # Act
+    remote = MeetingService(db_session=None)._fetch_remote_meetings()
+
+    # Assert
+    assert len(remote) == 1
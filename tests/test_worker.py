@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import pytest
+
+from meeting_minutes.models import WorkerLease
+from meeting_minutes.repository import LeaseRepository, MeetingRepository
+from meeting_minutes.services import TranscriptionService
+from meeting_minutes.sync import reset_sync_flight
+from meeting_minutes.worker import SYNC_LEASE, SyncWorker, serve_health
+
+
+@pytest.fixture(autouse=True)
+def fresh_syncs():
+    reset_sync_flight()
+    yield
+    reset_sync_flight()
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+
+def test_workers_share_one_lease(fake_assemblyai, file_engine, file_sessions):
+    # Arrange
+    known = [fake_assemblyai.add_transcript() for _ in range(2)]
+    with file_sessions() as db:
+        for remote_id in known:
+            MeetingRepository.insert_or_update(db, remote_id, "Réunion", None, None, "queued")
+    fake_assemblyai.add_transcript(
+        transcript_id="other-workspace", webhook_url="https://minutes.example.com/webhooks/assemblyai?workspace=team-a"
+    )
+    service = TranscriptionService()
+    workers = {
+        owner: SyncWorker(lambda: {"default": file_engine}, interval=60, owner=owner, transcription_service=service)
+        for owner in ("a", "b")
+    }
+
+    # Act
+    workers["a"].run_once()
+    workers["b"].run_once()
+    first = {owner: (worker.metrics.syncs, worker.metrics.standby) for owner, worker in workers.items()}
+    workers["a"].release()
+    workers["b"].run_once()
+    workers["a"].run_once()
+
+    # Assert
+    assert first == {"a": (1, 0), "b": (0, 1)}
+    assert (workers["b"].metrics.syncs, workers["a"].metrics.standby) == (1, 1)
+    assert workers["b"].metrics.leader == {"default": True} and workers["a"].metrics.leader == {"default": False}
+    assert fake_assemblyai.requests["GET /v2/transcript"] == 2
+    meetings = MeetingRepository.get_all(file_sessions())
+    assert sorted(meeting.remote_id for meeting in meetings.values()) == sorted(known)
+    assert {meeting.status for meeting in meetings.values()} == {"completed"}
+    assert all(54 <= workers["a"].next_delay() <= 66 for _ in range(100))
+
+
+def test_lease_is_renewed_while_a_sync_outlasts_it(fake_assemblyai, file_engine, file_sessions):
+    # Arrange: a sync takes about 1.3 s, four times the lease
+    def add_meetings():
+        with file_sessions() as db:
+            for _ in range(12):
+                remote_id = fake_assemblyai.add_transcript()
+                MeetingRepository.insert_or_update(db, remote_id, "Réunion", None, None, "queued")
+
+    add_meetings()
+    fake_assemblyai.latency = 0.1
+    service = TranscriptionService()
+    workers = {
+        owner: SyncWorker(
+            lambda: {"default": file_engine}, interval=60, lease_seconds=0.3, owner=owner, transcription_service=service
+        )
+        for owner in ("a", "b", "c")
+    }
+
+    def steal_lease():
+        with file_sessions() as db:
+            db.query(WorkerLease).update({"owner": "c", "expires": datetime(2100, 1, 1)})
+            db.commit()
+
+    # Act
+    leader = threading.Thread(target=workers["a"].run_once)
+    leader.start()
+    time.sleep(0.6)
+    workers["b"].run_once()
+    leader.join()
+    LeaseRepository.release(file_sessions(), SYNC_LEASE, "a")
+    add_meetings()
+    leader = threading.Thread(target=workers["b"].run_once)
+    leader.start()
+    time.sleep(0.4)
+    steal_lease()
+    leader.join()
+
+    # Assert
+    assert workers["b"].metrics.standby == 1
+    assert (workers["a"].metrics.syncs, workers["a"].metrics.lost_leases) == (1, 0)
+    assert (workers["b"].metrics.failures, workers["b"].metrics.lost_leases) == (1, 1)
+    assert workers["b"].metrics.leader == {"default": False}
+    assert MeetingRepository.get_by_status(file_sessions(), ["queued"])
+
+
+def test_health_and_metrics(fake_assemblyai, file_engine):
+    # Arrange
+    worker = SyncWorker(lambda: {"default": file_engine}, interval=60, transcription_service=TranscriptionService())
+    server = serve_health(worker, port=0, host="127.0.0.1")
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Act
+    before = _get(f"{url}/health")
+    worker.run_once()
+    healthy = _get(f"{url}/health")
+    metrics = _get(f"{url}/metrics")
+    fake_assemblyai.inject(500, count=50)
+    worker.run_once()
+    failing = _get(f"{url}/health")
+    server.shutdown()
+
+    # Assert
+    assert before[0] == 503
+    assert healthy[0] == 200 and json.loads(healthy[1])["syncs"] == 1
+    assert "meeting_minutes_worker_syncs_total 1" in metrics[1]
+    assert 'meeting_minutes_worker_leader{workspace="default"} 1' in metrics[1]
+    assert failing[0] == 503 and json.loads(failing[1])["failures"] == 1
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from meeting_minutes.cli import main
+from meeting_minutes.repository import MeetingRepository, TranscriptRepository
+from meeting_minutes.search import wait_for_indexing
+from meeting_minutes.workspaces import (
+    EngineCache,
+    get_engine_cache,
+    list_workspaces,
+    map_workspaces,
+    search_workspaces,
+    workspace_url,
+)
+
+
+@pytest.fixture
+def workspaces_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'meetings.db'}")
+    monkeypatch.setenv("WORKSPACES_DIR", str(tmp_path / "workspaces"))
+    get_engine_cache.cache_clear()
+    yield tmp_path / "workspaces"
+    get_engine_cache().dispose()
+    get_engine_cache.cache_clear()
+
+
+def test_workspace_url(workspaces_dir, monkeypatch):
+    assert workspace_url("default") == f"sqlite:///{workspaces_dir.parent / 'meetings.db'}"
+    assert workspace_url("team-a") == f"sqlite:///{workspaces_dir / 'team-a.db'}"
+    with pytest.raises(ValueError):
+        workspace_url("../escape")
+
+    monkeypatch.setenv("WORKSPACE_DATABASE_URL", "postgresql+psycopg://db/minutes_{workspace}")
+    assert workspace_url("team-a") == "postgresql+psycopg://db/minutes_team-a"
+
+
+def test_engine_cache_evicts_least_recently_used(workspaces_dir):
+    # Arrange
+    cache = EngineCache(max_open=2)
+    engines = {name: cache.get(name) for name in ("a", "b")}
+
+    # Act
+    cache.get("a")
+    cache.get("c")
+
+    # Assert
+    assert cache.open_workspaces() == ["a", "c"]
+    assert engines["b"].pool.checkedin() == 0
+    assert cache.get("b") is not engines["b"]
+    assert list_workspaces() == ["default", "a", "b", "c"]
+    cache.dispose()
+
+
+def test_cross_workspace_queries(workspaces_dir, tmp_path):
+    # Arrange
+    def store(db, remote_id, text):
+        meeting = MeetingRepository.insert_or_update(db, remote_id, remote_id, None, None, "completed")
+        TranscriptRepository.insert_or_update(db, meeting.id, "", text)
+
+    for workspace, remote_id, text in (
+        ("team-a", "pricing", "[Speaker A] Le changement de prix entre en vigueur en mars."),
+        ("team-b", "hiring", "[Speaker A] Nous recrutons deux développeurs."),
+    ):
+        map_workspaces(lambda db: store(db, remote_id, text), [workspace])
+    wait_for_indexing()
+
+    # Act
+    counts = map_workspaces(lambda db: len(MeetingRepository.get_all(db)))
+    hits = search_workspaces("changement de prix", k=1)
+    main(["export", str(tmp_path / "dump"), "--all-workspaces", "--tables", "meetings"])
+
+    # Assert
+    assert counts == {"default": 0, "team-a": 1, "team-b": 1}
+    assert [(workspace, hit.meeting) for workspace, hit in hits] == [("team-a", 1)]
+    exported = (tmp_path / "dump" / "team-b" / "meetings.jsonl").read_text().splitlines()
+    assert [json.loads(line)["remote_id"] for line in exported] == ["hiring"]
@@ -0,0 +1,134 @@
+import pytest
+
+from meeting_minutes.database import DEFAULT_SQLITE_BUSY_TIMEOUT, DEFAULT_SQLITE_JOURNAL_MODE, create_db_engine
+from meeting_minutes.models import Prompt
+from meeting_minutes.repository import MeetingRepository, PromptRepository, TranscriptRepository
+from meeting_minutes.services import MeetingService, TranscriptionService
+from meeting_minutes.sync import reset_sync_flight
+from meeting_minutes.workspaces import EngineCache
+from meeting_minutes.write_queue import WriteQueue, close_write_queue, get_write_queue, write
+
+
+def test_group_commit(file_engine, file_sessions):
+    # Arrange
+    queue = WriteQueue(file_engine, max_delay=0.2)
+
+    def failing(db):
+        db.add(Prompt(name="rolled back", prompt=""))
+        db.flush()
+        raise ValueError("boom")
+
+    # Act
+    futures = [
+        queue.submit(PromptRepository.create, "first", "Résume"),
+        queue.submit(failing),
+        queue.submit(PromptRepository.update, 999, "missing", ""),
+        queue.submit(PromptRepository.create, "second", "Liste les actions"),
+    ]
+    queue.close()
+
+    # Assert
+    assert futures[0].result().id == 1
+    assert futures[3].result().name == "second"
+    with pytest.raises(ValueError, match="boom"):
+        futures[1].result()
+    with pytest.raises(ValueError, match="not found"):
+        futures[2].result()
+    assert queue.transactions == 1
+    prompts = PromptRepository.get_all(file_sessions())
+    assert sorted(prompt.name for prompt in prompts.values()) == ["first", "second"]
+    with pytest.raises(RuntimeError):
+        queue.submit(PromptRepository.create, "late", "")
+
+
+def test_write_goes_through_the_queue_when_enabled(file_engine, file_sessions, monkeypatch):
+    monkeypatch.delenv("DB_WRITE_QUEUE", raising=False)
+    db = file_sessions()
+
+    write(db, PromptRepository.create, "direct", "")
+    monkeypatch.setenv("DB_WRITE_QUEUE", "true")
+    queued = write(db, PromptRepository.create, "queued", "")
+
+    assert queued.name == "queued"
+    assert get_write_queue(file_engine).writes == 1
+    assert len(PromptRepository.get_all(db)) == 2
+    get_write_queue(file_engine).close()
+
+
+def test_write_refuses_to_queue_behind_uncommitted_writes(file_engine, file_sessions, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("DB_WRITE_QUEUE", "true")
+    db = file_sessions()
+    db.add(Prompt(name="uncommitted", prompt=""))
+    db.flush()
+
+    # Act
+    with pytest.raises(RuntimeError, match="uncommitted writes"):
+        write(db, PromptRepository.create, "queued", "")
+    db.commit()
+    queued = write(db, PromptRepository.create, "queued", "")
+
+    # Assert
+    assert queued.name == "queued"
+    assert len(PromptRepository.get_all(db)) == 2
+    close_write_queue(file_engine)
+
+
+def test_file_engines_wait_for_the_write_lock(file_engine):
+    # Act
+    with file_engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+
+    # Assert
+    assert journal_mode == DEFAULT_SQLITE_JOURNAL_MODE
+    assert busy_timeout == DEFAULT_SQLITE_BUSY_TIMEOUT
+
+
+def test_engines_of_a_database_share_its_queue(tmp_path):
+    # Arrange
+    cache = EngineCache(max_open=1, url=lambda name: f"sqlite:///{tmp_path / name}.db")
+    reopened = create_db_engine(f"sqlite:///{tmp_path / 'a'}.db")
+
+    # Act
+    queue = get_write_queue(cache.get("a"))
+    shared = get_write_queue(reopened)
+    cache.get("b")
+    replaced = get_write_queue(reopened)
+
+    # Assert
+    assert shared is queue
+    assert queue.closed and not queue._thread.is_alive()
+    assert replaced is not queue and not replaced.closed
+    close_write_queue(reopened)
+    reopened.dispose()
+    cache.dispose()
+
+
+def test_meeting_writes_go_through_the_queue(fake_assemblyai, file_engine, file_sessions, monkeypatch):
+    # Arrange
+    reset_sync_flight()
+    monkeypatch.setenv("DB_WRITE_QUEUE", "true")
+    stored, synced, webhooked = (fake_assemblyai.add_transcript() for _ in range(3))
+    service = TranscriptionService()
+
+    # Act
+    with file_sessions() as db:
+        meetings = MeetingService(db, service)
+        meetings._store_meeting(service.get_transcript(stored), "Stockée", None, None)
+        MeetingRepository.insert_or_update(db, synced, "Synchronisée", None, None, "queued")
+        meetings.sync_meetings(include_remote=True, force=True)
+        MeetingRepository.insert_or_update(db, webhooked, "Notifiée", None, None, "queued")
+        completed = meetings.complete_transcription(service.get_transcript(webhooked))
+        writes = get_write_queue(file_engine).writes
+
+    # Assert
+    assert writes == 3
+    assert completed.status == "completed"
+    with file_sessions() as db:
+        for remote_id in (stored, synced, webhooked):
+            meeting = MeetingRepository.get_by_remote_id(db, remote_id)
+            assert meeting.status == "completed"
+            assert TranscriptRepository.get_transcript(db, meeting.id)
+    close_write_queue(file_engine)
+    reset_sync_flight()